@@ -0,0 +1,35 @@
+from django.contrib import admin
+from .models import CubeSnapshot, CubePartition, DashboardSnapshot, BiReport, ReportArtifact
+
+
+@admin.register(CubeSnapshot)
+class CubeSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['name', 'version', 'fact_count', 'built_at', 'refreshed_at']
+    exclude = ['data']
+    readonly_fields = ['name', 'version', 'fact_count', 'built_at', 'refreshed_at']
+
+
+@admin.register(CubePartition)
+class CubePartitionAdmin(admin.ModelAdmin):
+    list_display = ['partition', 'marked_at']
+
+
+@admin.register(DashboardSnapshot)
+class DashboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['scope', 'key', 'stale', 'computed_at']
+    list_filter = ['scope', 'stale']
+    readonly_fields = ['stats', 'computed_at']
+
+
+@admin.register(BiReport)
+class BiReportAdmin(admin.ModelAdmin):
+    list_display = ['name', 'report_type', 'format', 'schedule_type', 'next_run', 'last_rendered', 'is_active']
+    list_filter = ['report_type', 'format', 'schedule_type', 'is_active']
+    search_fields = ['name']
+
+
+@admin.register(ReportArtifact)
+class ReportArtifactAdmin(admin.ModelAdmin):
+    list_display = ['report', 'period', 'format', 'size', 'row_count', 'created_at']
+    list_filter = ['format']
+    readonly_fields = ['data_version', 'content_hash', 'path', 'size', 'row_count', 'created_at']
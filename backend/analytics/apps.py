@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'analytics'
+
+    def ready(self):
+        from users.sync import track_deletions
+        from .cube import connect_partition_tracking
+        from .customers import connect_cache_invalidation
+        from .dashboard import connect_stale_tracking
+        from .models import BiReport
+        from .reports import connect_period_close
+        from .series import connect_cache_invalidation as connect_series_invalidation
+
+        connect_cache_invalidation()
+        connect_series_invalidation()
+        connect_partition_tracking()
+        connect_stale_tracking()
+        connect_period_close()
+        track_deletions(BiReport)
@@ -0,0 +1,610 @@
+"""
+Pre-aggregated sales and budget cube for the BI dashboard, the OLAP source
+of ``BiDashboard`` on the frontend.
+
+Dimensions and their levels, coarsest first:
+
+- ``Time``: ``Year``, ``Quarter``, ``Month`` of the transaction date
+- ``Product``: ``Category``, ``Brand``, ``Item``
+- ``Customer``: ``Segment``, ``Customer``
+- ``Geography``: ``Region`` of the customer, else the budget's location
+
+Measures are ``sales_amount``, ``expense_amount`` and ``budget_amount``
+(``sale``, ``expense`` and ``allocation`` transactions) and
+``transaction_count``. Sync jobs whose ``config['cube']`` maps their columns
+(``date``, ``amount`` and optionally ``customer`` code and ``item`` SKU) add
+their synced rows as sales.
+
+Facts are kept at month x item x customer x budget grain, and every
+combination of dimensions is pre-aggregated from them into columnar NumPy
+arrays held in memory, so a slice, roll-up or drill-down is a mask and a
+``bincount`` over the smallest cuboid that covers it. Attributes (category,
+segment, region...) are looked up when the cube is built, so editing them
+never touches the facts.
+
+The facts and dimension tables persist in a ``CubeSnapshot`` that processes
+load on start. Writes mark the partitions they touch (a month of
+transactions, a sync job's rows, or the dimension tables) and ``refresh``,
+run every minute by Celery beat, recomputes only those partitions with
+grouped SQL and saves a new snapshot version; processes reload it the next
+time they are queried. The snapshot also keeps an entry per synced row (its
+key's hash, month, item, customer and amount), so a completed sync only
+reads back the rows it wrote, and the job's facts are re-aggregated from
+those entries.
+
+Non-administrators query a cube of only the transactions of budgets in their
+scope and the synced sales of customers in their scope, built from the full
+cube's facts on first use and kept per scope until the next version.
+"""
+import datetime
+import hashlib
+import io
+import logging
+import threading
+import time
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from budgets.models import Budget, BudgetTransaction
+from data_sources.models import DataSyncJob, SyncedRow
+from data_sources.signals import sync_completed
+from budgets.views import filter_budget_scope
+from forecasts.models import Customer, Item
+from users.models import UserType
+from .models import CubePartition, CubeSnapshot
+from .scope import scoped_customers
+
+logger = logging.getLogger(__name__)
+
+CUBE_NAME = 'sales'
+# Seconds between checks for a snapshot newer than the one in memory
+CHECK_SECONDS = 5
+# Scoped cubes kept in memory per process
+SCOPED_CUBES = 32
+NONE = '(none)'
+
+LEVELS = {
+    'Time': ['Year', 'Quarter', 'Month'],
+    'Product': ['Category', 'Brand', 'Item'],
+    'Customer': ['Segment', 'Customer'],
+    'Geography': ['Region'],
+}
+DIMENSIONS = list(LEVELS)
+# Transaction type summed into each amount measure
+MEASURE_TYPES = {'sales_amount': 'sale', 'expense_amount': 'expense', 'budget_amount': 'allocation'}
+MEASURES = [*MEASURE_TYPES, 'transaction_count']
+KEYS = ['source', 'month', 'item', 'customer', 'budget']  # source is 0 for transactions, else the sync job
+
+
+def month_index(date):
+    return date.year * 12 + date.month - 1
+
+
+def _empty_facts():
+    facts = {key: np.zeros(0, dtype=np.int64) for key in KEYS}
+    facts.update({measure: np.zeros(0) for measure in MEASURES})
+    return facts
+
+
+def _concat(parts):
+    return {name: np.concatenate([part[name] for part in parts]) for name in KEYS + MEASURES}
+
+
+def _ids(values):
+    return np.array([value or 0 for value in values], dtype=np.int64)
+
+
+def _month_ranges(months):
+    """``transaction_date`` filter for the given month indexes, one range per run of consecutive months"""
+    condition = Q(pk__in=[])
+    months = sorted(months)
+    start = 0
+    for end in range(1, len(months) + 1):
+        if end == len(months) or months[end] != months[end - 1] + 1:
+            first, last = months[start], months[end - 1] + 1
+            condition |= Q(
+                transaction_date__gte=datetime.date(first // 12, first % 12 + 1, 1),
+                transaction_date__lt=datetime.date(last // 12, last % 12 + 1, 1),
+            )
+            start = end
+    return condition
+
+
+def transaction_facts(months=None):
+    """Facts of budget transactions, in ``months`` only when given"""
+    queryset = BudgetTransaction.objects.all()
+    if months is not None:
+        queryset = queryset.filter(_month_ranges(months))
+    rows = list(
+        queryset.annotate(year=ExtractYear('transaction_date'), month=ExtractMonth('transaction_date'))
+        .values_list('year', 'month', 'item_id', 'customer_id', 'budget_id')
+        .annotate(
+            **{measure: Sum('amount', filter=Q(transaction_type=kind)) for measure, kind in MEASURE_TYPES.items()},
+            transaction_count=Count('id'),
+        ).order_by()
+    )
+    if not rows:
+        return _empty_facts()
+    years, month_numbers, items, customers, budgets, *measures = zip(*rows)
+    facts = {
+        'month': np.array(years, dtype=np.int64) * 12 + np.array(month_numbers, dtype=np.int64) - 1,
+        'item': _ids(items),
+        'customer': _ids(customers),
+        'budget': _ids(budgets),
+    }
+    facts['source'] = np.zeros(len(rows), dtype=np.int64)
+    for measure, values in zip(MEASURES, measures):
+        facts[measure] = np.nan_to_num(np.array(values, dtype=np.float64))
+    return facts
+
+
+ROW_FIELDS = ['job', 'key', 'month', 'item', 'customer', 'amount']
+
+
+def _empty_rows():
+    rows = {name: np.zeros(0, dtype=np.int64) for name in ROW_FIELDS}
+    rows['key'] = np.zeros(0, dtype=np.uint64)
+    rows['amount'] = np.zeros(0)
+    return rows
+
+
+def _concat_rows(parts):
+    return {name: np.concatenate([part[name] for part in parts]) for name in ROW_FIELDS}
+
+
+def _key_hashes(keys):
+    return pd.util.hash_pandas_object(pd.Series(list(keys), dtype=object), index=False).to_numpy()
+
+
+def synced_rows(job, since=None):
+    """
+    One entry per synced row of ``job`` (those synced at or after ``since``
+    only, when given) under its ``config['cube']`` column mapping: the key's
+    hash, month (-1 when the date is missing), item, customer and amount
+    """
+    mapping = (job.config or {}).get('cube')
+    if not mapping:
+        return _empty_rows()
+    queryset = SyncedRow.objects.filter(job=job)
+    if since is not None:
+        queryset = queryset.filter(synced_at__gte=since)
+    records = list(queryset.values_list('key', 'data'))
+    if not records:
+        return _empty_rows()
+    keys, data = zip(*records)
+    frame = pd.DataFrame.from_records(data)
+    rows = {
+        'job': np.full(len(frame), job.pk, dtype=np.int64),
+        'key': _key_hashes(keys),
+        'month': np.full(len(frame), -1, dtype=np.int64),
+        'amount': np.zeros(len(frame)),
+    }
+    missing = [mapping.get(name) for name in ('date', 'amount') if mapping.get(name) not in frame.columns]
+    if missing:
+        logger.warning('Sync job %s has no columns %s for the analytics cube', job.pk, missing)
+    else:
+        dates = pd.to_datetime(frame[mapping['date']], errors='coerce', utc=True, format='ISO8601')
+        rows['month'] = (dates.dt.year * 12 + dates.dt.month - 1).fillna(-1).to_numpy(dtype=np.int64)
+        rows['amount'] = pd.to_numeric(frame[mapping['amount']], errors='coerce').fillna(0.0).to_numpy(np.float64)
+    for key, model, field in (('customer', Customer, 'code'), ('item', Item, 'sku')):
+        column = mapping.get(key)
+        if column in frame.columns:
+            ids = dict(model.objects.values_list(field, 'id'))
+            rows[key] = frame[column].astype(str).map(ids).fillna(0).to_numpy(dtype=np.int64)
+        else:
+            rows[key] = np.zeros(len(frame), dtype=np.int64)
+    return rows
+
+
+def fold_rows(rows, job, since):
+    """
+    ``rows`` with the entries of ``job`` synced at or after ``since`` replaced
+    by their current values, and those of rows deleted since dropped
+    """
+    written = synced_rows(job, since)
+    own = rows['job'] == job.pk
+    kept = ~(own & np.isin(rows['key'], written['key']))
+    # Rows deleted from the job leave it with fewer rows than entries
+    if int((own & kept).sum()) + len(written['key']) != SyncedRow.objects.filter(job=job).count():
+        present = _key_hashes(SyncedRow.objects.filter(job=job).values_list('key', flat=True).iterator())
+        kept &= ~own | np.isin(rows['key'], present)
+    return _concat_rows([{name: values[kept] for name, values in rows.items()}, written])
+
+
+def synced_facts(rows):
+    """Facts of synced rows, as sales, one per job, month, item and customer"""
+    dated = rows['month'] >= 0
+    facts = (
+        pd.DataFrame({name: rows[name][dated] for name in ('job', 'month', 'item', 'customer', 'amount')})
+        .groupby(['job', 'month', 'item', 'customer'], as_index=False)
+        .agg(sales_amount=('amount', 'sum'), transaction_count=('amount', 'size'))
+    )
+    result = _empty_facts()
+    result.update({key: facts[key].to_numpy(dtype=np.int64) for key in ('month', 'item', 'customer')})
+    result['source'] = facts['job'].to_numpy(dtype=np.int64)
+    result['budget'] = np.zeros(len(facts), dtype=np.int64)
+    for measure in MEASURES:
+        result[measure] = facts[measure].to_numpy(dtype=np.float64) if measure in facts else np.zeros(len(facts))
+    return result
+
+
+def dimension_tables():
+    """Attributes of every item, customer and budget, by ascending id"""
+    tables = {}
+    for prefix, queryset, fields in (
+        ('item', Item.objects, ['category', 'brand', 'name']),
+        ('customer', Customer.objects, ['segment', 'region', 'name']),
+        ('budget', Budget.objects, ['location']),
+    ):
+        rows = list(queryset.order_by('id').values_list('id', *fields))
+        tables[f'{prefix}_id'] = np.array([row[0] for row in rows], dtype=np.int64)
+        for index, field in enumerate(fields, 1):
+            tables[f'{prefix}_{field}'] = np.array([row[index] or NONE for row in rows], dtype=str)
+    return tables
+
+
+def encode(facts, tables, rows):
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer, **{f'fact_{name}': values for name, values in facts.items()},
+        **{f'row_{name}': values for name, values in rows.items()}, **tables,
+    )
+    return buffer.getvalue()
+
+
+def decode(data):
+    archive = np.load(io.BytesIO(bytes(data)), allow_pickle=False)
+    facts = {name[5:]: archive[name] for name in archive.files if name.startswith('fact_')}
+    tables = {name: archive[name] for name in archive.files if not name.startswith(('fact_', 'row_'))}
+    return facts, tables
+
+
+def decode_rows(data):
+    """The synced row entries of a snapshot, ``None`` for snapshots saved without them"""
+    archive = np.load(io.BytesIO(bytes(data)), allow_pickle=False)
+    if 'row_job' not in archive.files:
+        return None
+    return {name: archive[f'row_{name}'] for name in ROW_FIELDS}
+
+
+def _level(values, label=str):
+    """(member -> level code, level labels) grouping members with equal ``values``, in value order"""
+    distinct, codes = np.unique(values, return_inverse=True)
+    return codes, np.array([label(value) for value in distinct], dtype=str)
+
+
+def _leaf(names):
+    """(member -> level code, level labels) keeping every member apart, in name order"""
+    order = np.argsort(names, kind='stable')
+    codes = np.empty(len(names), dtype=np.intp)
+    codes[order] = np.arange(len(names))
+    return codes, names[order]
+
+
+def _members(ids, fact_ids):
+    """Member of each fact given the table's ascending ``ids``; member 0 is none or unknown"""
+    ids = np.concatenate([[0], ids])
+    positions = np.minimum(np.searchsorted(ids, fact_ids), len(ids) - 1)
+    return np.where(ids[positions] == fact_ids, positions, 0), ids
+
+
+class Cube:
+    """
+    Measures of every dimension combination over the given facts.
+
+    ``dimensions[dimension][level]`` is ``(codes, labels)``: ``codes`` maps
+    each member of the dimension (its finest grain) to a level code and
+    ``labels`` names the level codes. ``cuboids[frozenset(dimensions)]`` is
+    ``(members, measures)``, column arrays with one entry per combination of
+    members that has facts.
+    """
+
+    def __init__(self, facts, tables, version=0, refreshed_at=None):
+        self.facts = facts
+        self.tables = tables
+        self.version = version
+        self.refreshed_at = refreshed_at
+        self.fact_count = len(facts['month'])
+        self.dimensions, members = {}, {}
+
+        months, members['Time'] = np.unique(facts['month'], return_inverse=True)
+        self.dimensions['Time'] = {
+            'Year': _level(months // 12),
+            'Quarter': _level(months // 3, lambda quarter: f'{quarter // 4}-Q{quarter % 4 + 1}'),
+            'Month': _level(months, lambda month: f'{month // 12}-{month % 12 + 1:02d}'),
+        }
+
+        members['Product'], _ = _members(tables['item_id'], facts['item'])
+        categories, brands, names = (
+            np.concatenate([[NONE], tables[f'item_{field}']]) for field in ('category', 'brand', 'name')
+        )
+        self.dimensions['Product'] = {'Category': _level(categories), 'Brand': _level(brands), 'Item': _leaf(names)}
+
+        members['Customer'], _ = _members(tables['customer_id'], facts['customer'])
+        segments, regions, names = (
+            np.concatenate([[NONE], tables[f'customer_{field}']]) for field in ('segment', 'region', 'name')
+        )
+        self.dimensions['Customer'] = {'Segment': _level(segments), 'Customer': _leaf(names)}
+
+        budgets, _ = _members(tables['budget_id'], facts['budget'])
+        locations = np.concatenate([[NONE], tables['budget_location']])
+        fact_regions = regions[members['Customer']]
+        fact_regions = np.where(fact_regions == NONE, locations[budgets], fact_regions)
+        geographies, members['Geography'] = np.unique(fact_regions, return_inverse=True)
+        self.dimensions['Geography'] = {'Region': (np.arange(len(geographies)), geographies.astype(str))}
+
+        sizes = {dimension: len(next(iter(levels.values()))[0]) for dimension, levels in self.dimensions.items()}
+        self.cuboids = {}
+        for count in range(len(DIMENSIONS) + 1):
+            for dimensions in combinations(DIMENSIONS, count):
+                self.cuboids[frozenset(dimensions)] = self._aggregate(dimensions, members, sizes, facts)
+
+    @staticmethod
+    def _aggregate(dimensions, members, sizes, facts):
+        count = len(facts['month'])
+        if dimensions:
+            shape = [sizes[dimension] for dimension in dimensions]
+            keys = np.ravel_multi_index([members[dimension] for dimension in dimensions], shape)
+            keys, groups = np.unique(keys, return_inverse=True)
+            columns = dict(zip(dimensions, np.unravel_index(keys, shape)))
+        else:
+            keys, groups, columns = np.zeros(min(count, 1)), np.zeros(count, dtype=np.intp), {}
+        measures = {
+            measure: np.bincount(groups, weights=facts[measure], minlength=len(keys)) for measure in MEASURES
+        }
+        return columns, measures
+
+    def restrict(self, budget_ids, customer_ids):
+        """A cube of the transactions of ``budget_ids`` and the synced sales of ``customer_ids``"""
+        facts = self.facts
+        kept = np.where(
+            facts['source'] == 0, np.isin(facts['budget'], budget_ids), np.isin(facts['customer'], customer_ids)
+        )
+        # Other customers are not listed as members either
+        listed = np.isin(self.tables['customer_id'], customer_ids)
+        tables = {
+            name: values[listed] if name.startswith('customer_') else values for name, values in self.tables.items()
+        }
+        return Cube(
+            {name: values[kept] for name, values in facts.items()}, tables,
+            version=self.version, refreshed_at=self.refreshed_at,
+        )
+
+    def level(self, name):
+        """``(dimension, level)`` of a ``'Dimension.Level'`` name"""
+        dimension, _, level = str(name).partition('.')
+        if level not in self.dimensions.get(dimension, {}):
+            raise ValueError(f'Unknown level: {name}')
+        return dimension, level
+
+    def members(self, name):
+        return self.dimensions[self.level(name)[0]][self.level(name)[1]][1].tolist()
+
+    def query(self, levels=(), measures=None, filters=None):
+        """
+        ``measures`` of the facts whose members match ``filters``
+        (``{'Dimension.Level': [labels]}``), grouped by ``levels``
+        (``['Dimension.Level', ...]``). Rolling up is asking for a coarser
+        level; drilling down, a finer one filtered to the parent member.
+        """
+        measures = list(measures or MEASURES)
+        unknown = [measure for measure in measures if measure not in MEASURES]
+        if unknown:
+            raise ValueError(f'Unknown measures: {", ".join(unknown)}')
+        levels = [self.level(name) for name in levels]
+        filters = [(self.level(name), [str(label) for label in labels]) for name, labels in (filters or {}).items()]
+        columns, values = self.cuboids[frozenset(dimension for dimension, _ in levels + [key for key, _ in filters])]
+
+        mask = np.ones(len(values[MEASURES[0]]), dtype=bool)
+        for (dimension, level), labels in filters:
+            codes, names = self.dimensions[dimension][level]
+            mask &= np.isin(codes[columns[dimension]], np.flatnonzero(np.isin(names, labels)))
+        if levels:
+            shape = [len(self.dimensions[dimension][level][1]) for dimension, level in levels]
+            keys = np.ravel_multi_index(
+                [self.dimensions[dimension][level][0][columns[dimension][mask]] for dimension, level in levels], shape
+            )
+            keys, groups = np.unique(keys, return_inverse=True)
+            labels = [
+                self.dimensions[dimension][level][1][codes].tolist()
+                for (dimension, level), codes in zip(levels, np.unravel_index(keys, shape))
+            ]
+        else:
+            keys, groups, labels = np.zeros(min(int(mask.sum()), 1)), np.zeros(int(mask.sum()), dtype=np.intp), []
+        totals = [np.bincount(groups, weights=values[measure][mask], minlength=len(keys)) for measure in measures]
+        totals = [
+            total.round().astype(np.int64).tolist() if measure == 'transaction_count' else total.round(2).tolist()
+            for measure, total in zip(measures, totals)
+        ]
+        names = [f'{dimension}.{level}' for dimension, level in levels]
+        return {
+            'levels': names,
+            'measures': measures,
+            'rows': [
+                dict(zip(names + measures, row)) for row in zip(*labels, *totals)
+            ],
+        }
+
+    def describe(self):
+        return {
+            'name': CUBE_NAME,
+            'version': self.version,
+            'refreshed_at': self.refreshed_at,
+            'fact_count': self.fact_count,
+            'dimensions': [
+                {
+                    'name': dimension,
+                    'levels': [
+                        {'name': f'{dimension}.{level}', 'members': len(labels)}
+                        for level, (_, labels) in self.dimensions[dimension].items()
+                    ],
+                }
+                for dimension in DIMENSIONS
+            ],
+            'measures': MEASURES,
+        }
+
+
+def _cube_jobs():
+    return DataSyncJob.objects.filter(config__has_key='cube')
+
+
+def refresh(full=False):
+    """
+    Recompute the marked partitions of the snapshot, or all of it when
+    ``full`` or there is none yet, and save it as a new version
+    """
+    with transaction.atomic():
+        snapshot, _ = CubeSnapshot.objects.select_for_update().get_or_create(name=CUBE_NAME)
+        marks = list(CubePartition.objects.values_list('partition', 'marked_at'))
+        rows = decode_rows(snapshot.data) if snapshot.version else None
+        full = full or rows is None
+        if not full and not marks:
+            return snapshot
+        now = timezone.now()
+        if full:
+            rows = _concat_rows([_empty_rows()] + [synced_rows(job) for job in _cube_jobs()])
+            facts = _concat([transaction_facts(), synced_facts(rows)])
+            snapshot.built_at = now
+        else:
+            facts, _ = decode(snapshot.data)
+            months = {int(name.split(':')[1]) for name, _ in marks if name.startswith('month:')}
+            # job:<id> reloads all of a job's rows, job:<id>:<time> those synced since then
+            reloads, since = set(), {}
+            for name, _ in marks:
+                if name.startswith('job:'):
+                    _, job_id, synced = (name.split(':', 2) + [''])[:3]
+                    if synced:
+                        synced = datetime.datetime.fromisoformat(synced)
+                        since[int(job_id)] = min(since.get(int(job_id), synced), synced)
+                    else:
+                        reloads.add(int(job_id))
+            job_ids = reloads | set(since)
+            rows = {name: values[~np.isin(rows['job'], list(reloads))] for name, values in rows.items()}
+            for job in DataSyncJob.objects.filter(pk__in=job_ids):
+                if job.pk in reloads:
+                    rows = _concat_rows([rows, synced_rows(job)])
+                else:
+                    rows = fold_rows(rows, job, since[job.pk])
+            stale = (facts['source'] == 0) & np.isin(facts['month'], list(months))
+            stale |= np.isin(facts['source'], list(job_ids))
+            kept = {name: values[~stale] for name, values in facts.items()}
+            changed = {name: values[np.isin(rows['job'], list(job_ids))] for name, values in rows.items()}
+            facts = _concat(
+                [kept, transaction_facts(months) if months else _empty_facts(), synced_facts(changed)]
+            )
+        snapshot.data = encode(facts, dimension_tables(), rows)
+        snapshot.version += 1
+        snapshot.fact_count = len(facts['month'])
+        snapshot.refreshed_at = now
+        snapshot.save()
+        if marks:
+            # Partitions marked again since they were read stay marked
+            done = Q(pk__in=[])
+            for name, marked_at in marks:
+                done |= Q(partition=name, marked_at__lte=marked_at)
+            CubePartition.objects.filter(done).delete()
+    return snapshot
+
+
+_lock = threading.Lock()
+_cube = None
+_checked_at = 0.0
+_scoped = {}
+
+
+def _ids_of(queryset):
+    return np.fromiter(queryset.order_by('id').values_list('id', flat=True), dtype=np.int64)
+
+
+def get_cube(user=None):
+    """
+    The latest snapshot's cube, held in memory and reloaded once a newer
+    version is saved; restricted to the scope of ``user`` unless an administrator
+    """
+    global _cube, _checked_at
+    with _lock:
+        if _cube is None or time.monotonic() - _checked_at >= CHECK_SECONDS:
+            _checked_at = time.monotonic()
+            version = (
+                CubeSnapshot.objects.filter(name=CUBE_NAME, version__gt=0).values_list('version', flat=True).first()
+            )
+            if _cube is None or version != _cube.version:
+                snapshot = CubeSnapshot.objects.filter(name=CUBE_NAME, version__gt=0).first() or refresh()
+                _cube = Cube(*decode(snapshot.data), version=snapshot.version, refreshed_at=snapshot.refreshed_at)
+                _scoped.clear()
+        cube = _cube
+    if user is None or user.user_type == UserType.ADMIN:
+        return cube
+
+    budget_ids = _ids_of(filter_budget_scope(Budget.objects.all(), user))
+    customer_ids = _ids_of(scoped_customers(user))
+    digest = hashlib.sha1(budget_ids.tobytes() + b'|' + customer_ids.tobytes()).hexdigest()
+    with _lock:
+        scoped = _scoped.get((cube.version, digest))
+    if scoped is None:
+        scoped = cube.restrict(budget_ids, customer_ids)
+        with _lock:
+            while len(_scoped) >= SCOPED_CUBES:
+                del _scoped[next(iter(_scoped))]  # the oldest
+            _scoped[(cube.version, digest)] = scoped
+    return scoped
+
+
+def mark(partitions):
+    """Mark ``partitions`` for the next refresh, in the writer's transaction"""
+    now = timezone.now()
+    CubePartition.objects.bulk_create(
+        [CubePartition(partition=partition, marked_at=now) for partition in partitions],
+        update_conflicts=True, update_fields=['marked_at'], unique_fields=['partition'],
+    )
+
+
+def _on_transaction_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    # A transaction moved to another month leaves its old month stale too
+    previous = BudgetTransaction.objects.filter(pk=instance.pk).values_list('transaction_date', flat=True).first()
+    if previous is not None and previous != instance.transaction_date:
+        mark([f'month:{month_index(previous)}'])
+
+
+def _on_transaction_change(sender, instance, **kwargs):
+    mark([f'month:{month_index(instance.transaction_date)}'])
+
+
+def _on_dimension_change(sender, **kwargs):
+    mark(['dimensions'])
+
+
+def _on_job_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'config' in update_fields:
+        mark([f'job:{instance.pk}'])
+
+
+def _on_sync_completed(sender, job, run, **kwargs):
+    if (job.config or {}).get('cube') and (run.rows_written or run.rows_deleted):
+        # Only the rows the run wrote are read again
+        mark([f'job:{job.pk}:{run.started_at.isoformat()}'])
+
+
+def connect_partition_tracking():
+    pre_save.connect(_on_transaction_saving, sender=BudgetTransaction, dispatch_uid='analytics_cube_transaction_move')
+    for name, signal in (('save', post_save), ('delete', post_delete)):
+        signal.connect(
+            _on_transaction_change, sender=BudgetTransaction, dispatch_uid=f'analytics_cube_transaction_{name}'
+        )
+        signal.connect(_on_job_change, sender=DataSyncJob, dispatch_uid=f'analytics_cube_job_{name}')
+        for model in (Item, Customer, Budget):
+            signal.connect(
+                _on_dimension_change, sender=model,
+                dispatch_uid=f'analytics_cube_{model._meta.model_name}_{name}'
+            )
+    sync_completed.connect(_on_sync_completed, dispatch_uid='analytics_cube_sync')
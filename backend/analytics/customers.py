@@ -0,0 +1,189 @@
+"""
+Per-customer analytics, as ``generateCustomerAnalytics`` on the frontend.
+
+Forecast values come from the customer's packed forecast rows and sales
+history from grouped SQL over ``sale`` transactions; the rest is NumPy. Only
+forecasts and transactions inside the requesting user's scope are counted;
+the suggested tier still ranks the customer's company-wide forecast total.
+Each result is cached per customer, scope and year. A per-customer version
+number in the cache key is bumped by any forecast, transaction or customer
+write for that customer, which drops all of its cached results at once.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.db.models.signals import post_save, post_delete
+
+from budgets.models import BudgetTransaction
+from budgets.views import filter_budget_scope
+from forecasts import engine
+from forecasts.models import MONTHS, Customer, Item, CustomerItemForecast
+from forecasts.signals import forecasts_bulk_updated
+from forecasts.views import filter_forecast_scope
+from .scope import scope_key
+
+CACHE_TIMEOUT = 60 * 60  # tier ranks depend on other customers, so entries also expire
+# Month-over-month change treated as flat in seasonal trends, as on the frontend
+TREND_THRESHOLD = 0.05
+# Share of customers (by forecast total, best first) placed in each tier
+TIER_PERCENTILES = [('platinum', 0.10), ('gold', 0.30), ('silver', 0.60), ('bronze', 1.0)]
+
+
+def _version_key(customer_id):
+    return f'analytics:customer:{customer_id}:version'
+
+
+def _cache_key(customer_id, year, scope='all'):
+    version = cache.get_or_set(_version_key(customer_id), 1, timeout=None)
+    return f'analytics:customer:{customer_id}:v{version}:{scope}:{year}'
+
+
+def invalidate_customers(customer_ids):
+    for customer_id in customer_ids:
+        try:
+            cache.incr(_version_key(customer_id))
+        except ValueError:
+            pass  # nothing cached yet
+
+
+def _invalidate_on_commit(customer_ids):
+    customer_ids = {customer_id for customer_id in customer_ids if customer_id is not None}
+    if customer_ids:
+        transaction.on_commit(lambda: invalidate_customers(customer_ids))
+
+
+def _on_customer_data_change(sender, instance, **kwargs):
+    customer_id = instance.pk if sender is Customer else instance.customer_id
+    _invalidate_on_commit([customer_id])
+
+
+def _on_forecasts_bulk_updated(sender, customer_ids, **kwargs):
+    _invalidate_on_commit(customer_ids)
+
+
+def connect_cache_invalidation():
+    for name, signal in (('save', post_save), ('delete', post_delete)):
+        for model in (Customer, CustomerItemForecast, BudgetTransaction):
+            signal.connect(
+                _on_customer_data_change, sender=model,
+                dispatch_uid=f'analytics_{model._meta.model_name}_{name}'
+            )
+    forecasts_bulk_updated.connect(_on_forecasts_bulk_updated, dispatch_uid='analytics_forecasts_bulk')
+
+
+def _forecasts(customer_id, user=None):
+    forecasts = CustomerItemForecast.objects.filter(customer_id=customer_id)
+    return forecasts if user is None else filter_forecast_scope(forecasts, user)
+
+
+def sales_history(customer_id, user=None):
+    """(years, years x 12 array) of the customer's booked sales, in the scope of ``user`` when given"""
+    sales = BudgetTransaction.objects.filter(customer_id=customer_id, transaction_type='sale')
+    if user is not None:
+        sales = filter_budget_scope(sales, user, prefix='budget__')
+    totals = list(
+        sales.annotate(year=ExtractYear('transaction_date'), month=ExtractMonth('transaction_date'))
+        .values_list('year', 'month').annotate(total=Sum('amount')).order_by()
+    )
+    if not totals:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 12))
+    years, months, amounts = (np.array(column) for column in zip(*totals))
+    history_years, rows = np.unique(years.astype(np.int64), return_inverse=True)
+    history = np.zeros((len(history_years), 12))
+    history[rows, months.astype(np.intp) - 1] = amounts.astype(np.float64)
+    return history_years, history
+
+
+def _trends(values):
+    previous = np.roll(values, 1)  # Jan compares with Dec
+    return np.where(
+        values > previous * (1 + TREND_THRESHOLD), 'up',
+        np.where(values < previous * (1 - TREND_THRESHOLD), 'down', 'stable')
+    )
+
+
+def _seasonality(monthly):
+    """High/medium/low from the coefficient of variation of monthly values"""
+    mean = monthly.mean()
+    if mean <= 0:
+        return None
+    variation = monthly.std() / mean
+    return 'high' if variation > 0.3 else 'medium' if variation > 0.1 else 'low'
+
+
+def _suggested_tier(customer_id, year):
+    totals = dict(
+        CustomerItemForecast.objects.filter(year=year).values_list('customer_id')
+        .annotate(total=Sum('yearly_total')).order_by()
+    )
+    if customer_id not in totals:
+        return None
+    values = np.array([float(value) for value in totals.values()])
+    # Fraction of customers with a strictly larger total
+    rank = (values > float(totals[customer_id])).mean()
+    return next(tier for tier, share in TIER_PERCENTILES if rank < share)
+
+
+def _growth_rate(total_forecast, history_years, history, customer_id, year, user=None):
+    """Forecast growth over last year's sales, or last year's forecast without sales"""
+    previous = history[history_years == year - 1].sum()
+    if not previous:
+        previous = float(
+            _forecasts(customer_id, user).filter(year=year - 1).aggregate(total=Sum('yearly_total'))['total'] or 0
+        )
+    return (total_forecast - previous) / previous * 100 if previous else 0.0
+
+
+def compute_customer_analytics(customer, year, user=None):
+    grid = engine.load_grid(_forecasts(customer.pk, user), year)
+    monthly = grid.monthly_totals()
+    total_forecast = float(monthly.sum())
+
+    item_categories = dict(Item.objects.filter(id__in=grid.item_ids.tolist()).values_list('id', 'category'))
+    categories = np.array([item_categories.get(int(item_id), '') for item_id in grid.item_ids], dtype=str)
+    category_names, category_idx = np.unique(categories, return_inverse=True)
+    category_totals = np.bincount(category_idx, weights=grid.item_totals(), minlength=len(category_names))
+
+    history_years, history = sales_history(customer.pk, user)
+    past = history[history_years < year]
+    # Seasonal averages come from past sales when there are any, else this year's forecast.
+    seasonal = past.mean(axis=0) if len(past) else monthly
+    growth_rate = _growth_rate(total_forecast, history_years, history, customer.pk, year, user)
+    confidence_score = float(grid.confidence.mean()) * 33.33 if len(grid) else 0.0
+    channels = customer.channels or []
+
+    return {
+        'customer_id': customer.pk,
+        'year': year,
+        'total_forecast': total_forecast,
+        'monthly_breakdown': dict(zip(MONTHS, monthly.tolist())),
+        'category_breakdown': dict(zip(category_names.tolist(), category_totals.tolist())),
+        # No per-channel sales are recorded, so the total is split evenly across the customer's channels.
+        'channel_breakdown': {channel: total_forecast / len(channels) for channel in channels},
+        'sales_history': {
+            int(history_year): dict(zip(MONTHS, row.tolist()))
+            for history_year, row in zip(history_years, history)
+        },
+        'growth_rate': float(growth_rate),
+        'seasonal_trends': [
+            {'month': month, 'average_value': float(value), 'trend': str(trend)}
+            for month, value, trend in zip(MONTHS, seasonal, _trends(seasonal))
+        ],
+        'seasonality': _seasonality(seasonal),
+        'tier': customer.tier,
+        'suggested_tier': _suggested_tier(customer.pk, year),
+        'risk_score': round(min(100.0, max(0.0, 100 - confidence_score - growth_rate * 2))),
+        'confidence_score': round(confidence_score),
+    }
+
+
+def customer_analytics(customer, year, user=None):
+    """Cached ``compute_customer_analytics``, over the scope of ``user`` when given"""
+    key = _cache_key(customer.pk, year, scope_key(user) if user is not None else 'all')
+    result = cache.get(key)
+    if result is None:
+        result = compute_customer_analytics(customer, year, user)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
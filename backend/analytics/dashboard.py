@@ -0,0 +1,292 @@
+"""
+Dashboard statistics per scope, as ``getRoleSpecificStats`` on the frontend.
+
+Each scope's statistics (users, budgets, sales against forecast, active
+customers and stock) are computed by a handful of aggregate queries and
+stored in a ``DashboardSnapshot``, so loading the dashboard is one keyed
+read. Users see the scope of their role: the company for administrators and
+supply chain, their org unit and the units below it for managers and branch
+managers placed in one, else their department for managers and their
+location for branch managers, and their own budgets for salesmen.
+
+Writes to transactions, budgets, forecasts, users and stock levels mark the
+snapshots of the scopes they touch stale and queue a refresh, at most one per
+``DEBOUNCE_SECONDS``, that recomputes only stale snapshots. Celery beat also
+refreshes every scope periodically, which rolls the monthly figures over.
+"""
+import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from budgets.models import Budget, BudgetTransaction
+from budgets.signals import budgets_bulk_updated
+from forecasts import engine
+from forecasts.models import CustomerItemForecast
+from forecasts.signals import forecasts_bulk_updated
+from inventory.models import ALERT_STATUSES, StockLevel
+from users.models import OrgUnitClosure, User, UserType, org_scope_filter
+from .models import DashboardSnapshot
+
+DEBOUNCE_SECONDS = 10
+QUEUED_KEY = 'analytics:dashboard:refresh-queued'
+# Customers with a sale in this many days count as active
+ACTIVE_CUSTOMER_DAYS = 90
+SCOPES = [scope for scope, _ in DashboardSnapshot.SCOPE_CHOICES]
+
+# Lookups of each model's department, location and salesman, then the prefix
+# of its ``org_unit``; None where the model has no rows in that kind of scope
+BUDGET_FIELDS = ('department', 'location', 'user_id', '')
+TRANSACTION_FIELDS = ('budget__department', 'budget__location', 'budget__user_id', 'budget__')
+FORECAST_FIELDS = ('created_by__department', 'created_by__location', 'created_by_id', 'created_by__')
+USER_FIELDS = ('department', 'location', None, '')
+STOCK_FIELDS = (None, 'location', None, None)
+
+
+def user_scope(user):
+    """``(scope, key)`` of the dashboard ``user`` sees"""
+    if user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+        return 'org_unit', str(user.org_unit_id)
+    if user.user_type == UserType.MANAGER:
+        return 'department', user.department
+    if user.user_type == UserType.BRANCH_MANAGER:
+        return 'location', user.location
+    if user.user_type == UserType.SALESMAN:
+        return 'salesman', str(user.pk)
+    return 'company', ''
+
+
+def _scope_filter(scope, key, fields):
+    if scope == 'company':
+        return Q()
+    field = dict(zip(SCOPES[1:], fields))[scope]
+    if field is None:
+        return None
+    if scope == 'org_unit':
+        return org_scope_filter(int(key), field)
+    return Q(**{field: key})
+
+
+def _amount(value):
+    return round(float(value or 0), 2)
+
+
+def _change(current, previous):
+    """Percentage change, or None without a previous value"""
+    return round((current - previous) / previous * 100, 1) if previous else None
+
+
+def compute_stats(scope, key, today=None):
+    today = today or timezone.localdate()
+    month_start = today.replace(day=1)
+    previous_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+    active_since = today - datetime.timedelta(days=ACTIVE_CUSTOMER_DAYS)
+    stats = {}
+
+    users = _scope_filter(scope, key, USER_FIELDS)
+    if users is not None:
+        users = User.objects.filter(users, is_active=True)
+        stats['users'] = users.aggregate(
+            active=Count('id'),
+            new_this_month=Count('id', filter=Q(date_joined__date__gte=month_start)),
+            salesmen=Count('id', filter=Q(user_type=UserType.SALESMAN)),
+        )
+        if scope == 'company':
+            stats['departments'] = users.exclude(department='').values('department').distinct().count()
+
+    budgets = Budget.objects.filter(_scope_filter(scope, key, BUDGET_FIELDS)).aggregate(
+        count=Count('id'), total=Sum('total_budget'), allocated=Sum('allocated_amount'),
+        spent=Sum('spent_amount'), remaining=Sum('remaining_amount'),
+    )
+    stats['budget'] = {name: value if name == 'count' else _amount(value) for name, value in budgets.items()}
+
+    sales = BudgetTransaction.objects.filter(
+        _scope_filter(scope, key, TRANSACTION_FIELDS), transaction_type='sale',
+        transaction_date__gt=min(previous_start, active_since - datetime.timedelta(days=ACTIVE_CUSTOMER_DAYS)),
+    ).aggregate(
+        month=Sum('amount', filter=Q(transaction_date__gte=month_start, transaction_date__lte=today)),
+        previous_month=Sum('amount', filter=Q(transaction_date__gte=previous_start, transaction_date__lt=month_start)),
+        customers=Count('customer', distinct=True, filter=Q(transaction_date__gt=active_since)),
+        previous_customers=Count('customer', distinct=True, filter=Q(
+            transaction_date__gt=active_since - datetime.timedelta(days=ACTIVE_CUSTOMER_DAYS),
+            transaction_date__lte=active_since,
+        )),
+    )
+    grid = engine.load_grid(
+        CustomerItemForecast.objects.filter(_scope_filter(scope, key, FORECAST_FIELDS)), today.year
+    )
+    target = float(grid.monthly_totals()[today.month - 1]) if len(grid) else 0.0
+    month, previous_month = _amount(sales['month']), _amount(sales['previous_month'])
+    stats['sales'] = {
+        'month': month,
+        'previous_month': previous_month,
+        'change_pct': _change(month, previous_month),
+        'target': round(target, 2),
+        'achievement_pct': round(month / target * 100, 1) if target else None,
+    }
+    stats['customers'] = {'active': sales['customers'], 'previous': sales['previous_customers']}
+
+    levels = _scope_filter(scope, key, STOCK_FIELDS)
+    if levels is not None:
+        stock = StockLevel.objects.filter(levels).aggregate(
+            items=Count('item', distinct=True), on_hand=Sum('quantity'), value=Sum('total_value'),
+            alerts=Count('id', filter=Q(stock_status__in=ALERT_STATUSES)),
+        )
+        stats['inventory'] = {
+            'items': stock['items'], 'on_hand': _amount(stock['on_hand']), 'value': _amount(stock['value']),
+            'alerts': stock['alerts'],
+        }
+    return stats
+
+
+def _save(scope, key):
+    return DashboardSnapshot.objects.update_or_create(
+        scope=scope, key=key, defaults={'stats': compute_stats(scope, key), 'computed_at': timezone.now()}
+    )[0]
+
+
+def dashboard_stats(scope, key):
+    """The stored statistics of a scope, computed now if it has none yet"""
+    snapshot = DashboardSnapshot.objects.filter(scope=scope, key=key).first() or _save(scope, key)
+    return {
+        'scope': snapshot.scope,
+        'key': snapshot.key,
+        'computed_at': snapshot.computed_at,
+        'stale': snapshot.stale,
+        **snapshot.stats,
+    }
+
+
+def _known_scopes():
+    scopes = {('company', '')}
+    active = User.objects.filter(is_active=True)
+    units = active.filter(
+        user_type__in=[UserType.MANAGER, UserType.BRANCH_MANAGER], org_unit__isnull=False
+    ).values_list('org_unit_id', flat=True).distinct()
+    scopes.update(('org_unit', str(unit_id)) for unit_id in units)
+    for users, scope, field in (
+        (active.filter(user_type=UserType.MANAGER, org_unit__isnull=True), 'department', 'department'),
+        (active.filter(user_type=UserType.BRANCH_MANAGER, org_unit__isnull=True), 'location', 'location'),
+        (active.filter(user_type=UserType.SALESMAN), 'salesman', 'pk'),
+    ):
+        scopes.update((scope, str(key)) for key in users.values_list(field, flat=True).distinct())
+    return scopes
+
+
+def refresh_snapshots(stale_only=True):
+    """
+    Recompute stale snapshots, or every scope in use when not ``stale_only``;
+    returns how many were computed
+    """
+    snapshots = DashboardSnapshot.objects.all()
+    if stale_only:
+        snapshots = snapshots.filter(stale=True)
+    rows = list(snapshots.values_list('pk', 'scope', 'key'))
+    scopes = {(scope, key) for _, scope, key in rows}
+    if not stale_only:
+        scopes |= _known_scopes()
+    # Cleared before computing, so a write landing meanwhile marks its scope again
+    DashboardSnapshot.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(stale=False)
+    for scope, key in scopes:
+        _save(scope, key)
+    return len(scopes)
+
+
+def _queue_refresh():
+    from .tasks import refresh_dashboard_stats
+
+    if cache.add(QUEUED_KEY, True, DEBOUNCE_SECONDS):
+        refresh_dashboard_stats.apply_async(countdown=DEBOUNCE_SECONDS)
+
+
+def mark_stale(scopes=None):
+    """Mark the snapshots of ``(scope, key)`` pairs, or all of them, stale and queue a refresh"""
+    snapshots = DashboardSnapshot.objects.filter(stale=False)
+    if scopes is not None:
+        condition = Q(pk__in=[])
+        for scope, key in scopes:
+            condition |= Q(scope=scope, key=key or '')
+        snapshots = snapshots.filter(condition)
+    if snapshots.update(stale=True):
+        transaction.on_commit(_queue_refresh)
+
+
+def _org_scopes(unit_ids):
+    """The ``org_unit`` scopes that include any of ``unit_ids``: the units and all above them"""
+    unit_ids = [unit_id for unit_id in unit_ids if unit_id is not None]
+    if not unit_ids:
+        return []
+    ancestors = OrgUnitClosure.objects.filter(descendant_id__in=unit_ids).values_list('ancestor_id', flat=True)
+    return [('org_unit', str(unit_id)) for unit_id in set(ancestors)]
+
+
+def _budget_scopes(department, location, user_id, org_unit_id=None):
+    return [
+        ('company', ''), ('department', department), ('location', location), ('salesman', str(user_id)),
+        *_org_scopes([org_unit_id]),
+    ]
+
+
+def _on_transaction_change(sender, instance, **kwargs):
+    budget = (
+        Budget.objects.filter(pk=instance.budget_id)
+        .values_list('department', 'location', 'user_id', 'org_unit_id').first()
+    )
+    if budget is not None:
+        mark_stale(_budget_scopes(*budget))
+
+
+def _on_budget_change(sender, instance, **kwargs):
+    mark_stale(_budget_scopes(instance.department, instance.location, instance.user_id, instance.org_unit_id))
+
+
+def _on_budgets_bulk_updated(sender, budgets, **kwargs):
+    rows = list(budgets.values_list('department', 'location', 'user_id', 'org_unit_id'))
+    scopes = {('company', '')}
+    for department, location, user_id, _ in rows:
+        scopes.update([('department', department), ('location', location), ('salesman', str(user_id))])
+    scopes.update(_org_scopes({org_unit_id for *_, org_unit_id in rows}))
+    mark_stale(scopes)
+
+
+def _on_forecast_change(sender, instance, **kwargs):
+    author = (
+        User.objects.filter(pk=instance.created_by_id)
+        .values_list('department', 'location', 'pk', 'org_unit_id').first()
+    )
+    if author is not None:
+        mark_stale(_budget_scopes(*author))
+
+
+def _on_forecasts_bulk_updated(sender, **kwargs):
+    mark_stale()
+
+
+def _on_user_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    mark_stale([
+        ('company', ''), ('department', instance.department), ('location', instance.location),
+        *_org_scopes([instance.org_unit_id]),
+    ])
+
+
+def _on_stock_change(sender, instance, **kwargs):
+    mark_stale([('company', ''), ('location', instance.location)])
+
+
+def connect_stale_tracking():
+    for name, signal in (('save', post_save), ('delete', post_delete)):
+        for model, handler in (
+            (BudgetTransaction, _on_transaction_change),
+            (Budget, _on_budget_change),
+            (CustomerItemForecast, _on_forecast_change),
+            (User, _on_user_change),
+            (StockLevel, _on_stock_change),
+        ):
+            signal.connect(handler, sender=model, dispatch_uid=f'analytics_dashboard_{model._meta.model_name}_{name}')
+    forecasts_bulk_updated.connect(_on_forecasts_bulk_updated, dispatch_uid='analytics_dashboard_forecasts_bulk')
+    budgets_bulk_updated.connect(_on_budgets_bulk_updated, dispatch_uid='analytics_dashboard_budgets_bulk')
@@ -0,0 +1,141 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class CubeSnapshot(models.Model):
+    """
+    The analytics cube's facts and dimension tables as compressed NumPy
+    arrays, loaded by every process instead of re-aggregating the source
+    tables. ``version`` goes up with each refresh; see ``analytics.cube``.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()  # np.savez_compressed archive
+    fact_count = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(null=True, blank=True)  # last full build
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class CubePartition(models.Model):
+    """
+    A part of the cube's facts whose source rows changed since the last
+    refresh: ``month:<index>`` for budget transactions in that month,
+    ``job:<id>`` for all rows of a sync job, ``job:<id>:<time>`` for those
+    synced since ``time``, or ``dimensions``.
+    """
+    partition = models.CharField(max_length=50, unique=True)
+    marked_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.partition
+
+
+class DashboardSnapshot(models.Model):
+    """
+    Precomputed dashboard statistics of one scope: the whole company, a
+    department, a location, a salesman (keyed by user id) or an org unit and
+    the units below it (keyed by unit id). Writes mark the scopes they touch
+    ``stale``; see ``analytics.dashboard``.
+    """
+    SCOPE_CHOICES = [
+        ('company', 'Company'),
+        ('department', 'Department'),
+        ('location', 'Location'),
+        ('salesman', 'Salesman'),
+        ('org_unit', 'Org unit'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=100, blank=True)
+    stats = models.JSONField(default=dict)
+    stale = models.BooleanField(default=False)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['scope', 'key']
+        indexes = [models.Index(fields=['stale'])]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}" if self.key else self.scope
+
+
+class BiReport(models.Model):
+    """
+    A report finance pulls repeatedly, rendered ahead of time into
+    ``ReportArtifact`` files on its schedule or when a budget period closes.
+
+    ``parameters`` narrow the data: ``year``, ``period`` (a budget period id),
+    ``department``, ``location`` and ``org_unit`` (an org unit id, with the
+    units below it). See ``analytics.reports``.
+    """
+    REPORT_TYPE_CHOICES = [
+        ('budget_vs_actual', 'Budget vs Actual'),
+        ('forecast', 'Forecast'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('json', 'JSON'),
+    ]
+    SCHEDULE_CHOICES = [
+        ('manual', 'Manual'),
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+    PARAMETERS = ['year', 'period', 'department', 'location', 'org_unit']
+
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    report_type = models.CharField(max_length=30, choices=REPORT_TYPE_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='xlsx')
+    parameters = models.JSONField(default=dict, blank=True)
+    schedule_type = models.CharField(max_length=20, choices=SCHEDULE_CHOICES, default='manual')
+    schedule_config = models.JSONField(default=dict, blank=True)  # hour, minute, dayOfWeek, dayOfMonth, cron
+    render_on_period_close = models.BooleanField(default=False)
+    next_run = models.DateTimeField(null=True, blank=True)
+    last_rendered = models.DateTimeField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='bi_reports'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return self.name
+
+
+class ReportArtifact(models.Model):
+    """
+    One rendering of a report, stored under its content hash. ``data_version``
+    fingerprints the data it was rendered from; a report is only rendered
+    again once that changes.
+    """
+    report = models.ForeignKey(BiReport, on_delete=models.CASCADE, related_name='artifacts')
+    period = models.ForeignKey(
+        'budgets.BudgetPeriod', on_delete=models.SET_NULL, null=True, blank=True, related_name='report_artifacts'
+    )
+    format = models.CharField(max_length=10, choices=BiReport.FORMAT_CHOICES)
+    data_version = models.CharField(max_length=64)
+    content_hash = models.CharField(max_length=64)  # sha256 of the file
+    path = models.CharField(max_length=255)  # in default storage
+    size = models.PositiveBigIntegerField()
+    row_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['report', 'data_version'])]
+
+    def __str__(self):
+        return f"{self.report} {self.created_at:%Y-%m-%d %H:%M}"
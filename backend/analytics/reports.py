@@ -0,0 +1,319 @@
+"""
+Pre-rendered ``BiReport`` artifacts.
+
+Reports are rendered to CSV, XLSX or JSON on their schedule (the same
+``schedule_type`` / ``schedule_config`` as data source sync jobs), when a
+budget period they follow closes, or on request. Before rendering, the
+report's data version is computed: a hash of its parameters and the row
+count and latest ``updated_at`` of every table it reads. A report whose
+latest artifact has the same version is not rendered again.
+
+Closing a budget period (saving an active period inactive) renders the
+reports marked ``render_on_period_close`` for that period; later edits of the
+closed period do not.
+
+Files are stored in the default storage under their sha256, so identical
+renderings share one file, and served from there with the hash as ETag and
+support for single byte ranges.
+"""
+import datetime
+import hashlib
+import io
+import json
+import re
+
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.signals import post_save, pre_save
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
+
+from budgets.models import Budget, BudgetCategory, BudgetPeriod, BudgetTransaction
+from data_sources.scheduler import next_run
+from forecasts import engine
+from forecasts.models import MONTHS, Customer, CustomerItemForecast, ForecastBudgetTarget, Item
+from users.models import org_scope_filter
+from .models import BiReport, ReportArtifact
+
+# Artifacts kept per report and period; older ones are deleted as new ones are rendered
+KEEP_ARTIFACTS = 12
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'json': 'application/json',
+}
+CHUNK_SIZE = 64 * 1024
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _year(parameters):
+    return int(parameters.get('year') or timezone.localdate().year)
+
+
+def _budgets(parameters):
+    budgets = Budget.objects.all()
+    if parameters.get('period'):
+        budgets = budgets.filter(period_id=parameters['period'])
+    elif parameters.get('year'):
+        year = _year(parameters)
+        budgets = budgets.filter(period__start_date__year__lte=year, period__end_date__year__gte=year)
+    for field in ('department', 'location'):
+        if parameters.get(field):
+            budgets = budgets.filter(**{field: parameters[field]})
+    if parameters.get('org_unit'):
+        budgets = budgets.filter(org_scope_filter(parameters['org_unit']))
+    return budgets
+
+
+def _forecasts(parameters):
+    forecasts = CustomerItemForecast.objects.filter(year=_year(parameters))
+    for field in ('department', 'location'):
+        if parameters.get(field):
+            forecasts = forecasts.filter(**{f'created_by__{field}': parameters[field]})
+    if parameters.get('org_unit'):
+        forecasts = forecasts.filter(org_scope_filter(parameters['org_unit'], 'created_by__'))
+    return forecasts
+
+
+def budget_vs_actual(parameters):
+    """One row per budget: its amounts against expenses and sales booked within its period"""
+    budgets = _budgets(parameters)
+    actuals = {
+        row['budget_id']: row for row in
+        BudgetTransaction.objects.filter(
+            budget__in=budgets,
+            transaction_date__gte=F('budget__period__start_date'),
+            transaction_date__lte=F('budget__period__end_date'),
+        ).values('budget_id').annotate(
+            expenses=Sum('amount', filter=Q(transaction_type='expense')),
+            sales=Sum('amount', filter=Q(transaction_type='sale')),
+        ).order_by()
+    }
+    columns = [
+        'Budget', 'Category', 'Department', 'Location', 'Period', 'Budgeted', 'Allocated', 'Actual', 'Sales',
+        'Variance', 'Variance %',
+    ]
+    rows = []
+    for budget in budgets.select_related('category', 'period').order_by('period__start_date', 'title'):
+        actual = float(actuals.get(budget.pk, {}).get('expenses') or 0)
+        sales = float(actuals.get(budget.pk, {}).get('sales') or 0)
+        budgeted = float(budget.total_budget)
+        variance = budgeted - actual
+        rows.append([
+            budget.title, budget.category.name, budget.department, budget.location, budget.period.name,
+            budgeted, float(budget.allocated_amount), actual, sales, variance,
+            round(variance / budgeted * 100, 2) if budgeted else None,
+        ])
+    return columns, rows
+
+
+def forecast(parameters):
+    """One row per customer and item with its monthly forecast value, then totals and the monthly targets"""
+    year = _year(parameters)
+    grid = engine.load_grid(_forecasts(parameters), year)
+    customers = dict(Customer.objects.filter(id__in=grid.customer_ids.tolist()).values_list('id', 'name'))
+    items = dict(Item.objects.filter(id__in=grid.item_ids.tolist()).values_list('id', 'name'))
+    values = grid.values
+    pairs = zip(grid.customer_ids[grid.customer_idx].tolist(), grid.item_ids[grid.item_idx].tolist(), values)
+    rows = [
+        [customers.get(customer_id, ''), items.get(item_id, ''), *monthly.round(2).tolist(),
+         round(float(monthly.sum()), 2)]
+        for customer_id, item_id, monthly in pairs
+    ]
+    rows.sort(key=lambda row: (row[0], row[1]))
+    totals = values.sum(axis=0)
+    targets = engine.monthly_targets(year)
+    rows.append(['Total', '', *totals.round(2).tolist(), round(float(totals.sum()), 2)])
+    rows.append(['Target', '', *targets.round(2).tolist(), round(float(targets.sum()), 2)])
+    return ['Customer', 'Item', *MONTHS, 'Total'], rows
+
+
+BUILDERS = {'budget_vs_actual': budget_vs_actual, 'forecast': forecast}
+
+
+def _sources(report_type, parameters):
+    """The querysets a report reads, whose changes make it stale"""
+    if report_type == 'budget_vs_actual':
+        budgets = _budgets(parameters)
+        return [
+            budgets, BudgetTransaction.objects.filter(budget__in=budgets),
+            BudgetCategory.objects.all(), BudgetPeriod.objects.all(),
+        ]
+    return [
+        _forecasts(parameters), ForecastBudgetTarget.objects.filter(year=_year(parameters)),
+        Customer.objects.all(), Item.objects.all(),
+    ]
+
+
+def data_version(report, parameters):
+    state = [
+        list(queryset.aggregate(rows=Count('id'), changed=Max('updated_at')).values())
+        for queryset in _sources(report.report_type, parameters)
+    ]
+    fingerprint = json.dumps(
+        [report.report_type, report.format, parameters, state], cls=DjangoJSONEncoder, sort_keys=True
+    )
+    return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def render(file_format, columns, rows, title, parameters):
+    """The bytes of a report file"""
+    frame = pd.DataFrame(rows, columns=columns)
+    if file_format == 'csv':
+        return frame.to_csv(index=False).encode()
+    if file_format == 'json':
+        return json.dumps({
+            'report': title,
+            'parameters': parameters,
+            'columns': columns,
+            'rows': json.loads(frame.to_json(orient='records', double_precision=15)),
+        }, cls=DjangoJSONEncoder).encode()
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        frame.to_excel(writer, sheet_name='Report', index=False)
+        pd.DataFrame(
+            {'Parameter': list(parameters), 'Value': [str(value) for value in parameters.values()]}
+        ).to_excel(writer, sheet_name='Parameters', index=False)
+    return buffer.getvalue()
+
+
+def _discard(artifact):
+    """Delete ``artifact`` and its file, unless another artifact shares the file"""
+    artifact.delete()
+    if not ReportArtifact.objects.filter(path=artifact.path).exists():
+        default_storage.delete(artifact.path)
+
+
+def render_report(report, period=None, force=False):
+    """
+    The artifact of ``report`` for the current data (for ``period`` when
+    given): the stored one if the data has not changed since, else a new
+    rendering. Returns ``(artifact, rendered)``.
+    """
+    parameters = dict(report.parameters or {})
+    if period is not None:
+        parameters['period'] = period.pk
+        parameters.setdefault('year', period.start_date.year)
+    version = data_version(report, parameters)
+    artifacts = report.artifacts.filter(period=period)
+    if not force:
+        existing = artifacts.filter(format=report.format, data_version=version).first()
+        if existing is not None:
+            return existing, False
+
+    columns, rows = BUILDERS[report.report_type](parameters)
+    content = render(report.format, columns, rows, report.name, parameters)
+    content_hash = hashlib.sha256(content).hexdigest()
+    path = f'reports/{content_hash[:2]}/{content_hash}.{report.format}'
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(content))
+    artifact = ReportArtifact.objects.create(
+        report=report, period=period, format=report.format, data_version=version, content_hash=content_hash,
+        path=path, size=len(content), row_count=len(rows),
+    )
+    report.last_rendered = artifact.created_at
+    report.save(update_fields=['last_rendered', 'updated_at'])
+    for old in artifacts.order_by('-created_at')[KEEP_ARTIFACTS:]:
+        _discard(old)
+    return artifact, True
+
+
+def dispatch_due(enqueue, now=None):
+    """Call ``enqueue(report_id)`` after commit for every report due by ``now``; returns their ids"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(
+            BiReport.objects.select_for_update(skip_locked=True)
+            .filter(is_active=True, next_run__lte=now).exclude(schedule_type='manual')
+        )
+        for report in due:
+            report.next_run = next_run(report, now + datetime.timedelta(seconds=1))
+            report.save(update_fields=['next_run', 'updated_at'])
+        report_ids = [report.pk for report in due]
+
+        def enqueue_all():
+            for report_id in report_ids:
+                enqueue(report_id)
+
+        transaction.on_commit(enqueue_all)
+    return report_ids
+
+
+def _on_period_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Only the save that turns an active period inactive closes it
+    instance._closing = (
+        not raw and not instance.is_active and not instance._state.adding
+        and (update_fields is None or 'is_active' in update_fields)
+        and BudgetPeriod.objects.filter(pk=instance.pk, is_active=True).exists()
+    )
+
+
+def _on_period_save(sender, instance, **kwargs):
+    from .tasks import render_period_reports
+
+    if getattr(instance, '_closing', False):
+        instance._closing = False
+        transaction.on_commit(lambda: render_period_reports.delay(instance.pk))
+
+
+def connect_period_close():
+    pre_save.connect(_on_period_saving, sender=BudgetPeriod, dispatch_uid='analytics_reports_period_saving')
+    post_save.connect(_on_period_save, sender=BudgetPeriod, dispatch_uid='analytics_reports_period_save')
+
+
+def _file_chunks(file, length):
+    with file:
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def download_response(request, artifact):
+    """
+    The artifact's file streamed from storage; a single ``Range`` is served
+    as 206, a matching ``If-None-Match`` as 304
+    """
+    etag = f'"{artifact.content_hash}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    size = artifact.size
+    match = BYTE_RANGE.match(request.headers.get('Range', '').strip())
+    if request.headers.get('If-Range', etag) != etag:
+        match = None  # the client's copy is of another rendering; send the whole file
+    if match and (match.group(1) or match.group(2)):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        file = default_storage.open(artifact.path, 'rb')
+        file.seek(start)
+        response = StreamingHttpResponse(
+            _file_chunks(file, end - start + 1), status=206, content_type=CONTENT_TYPES[artifact.format]
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(
+            default_storage.open(artifact.path, 'rb'), content_type=CONTENT_TYPES[artifact.format]
+        )
+        response['Content-Length'] = size
+    filename = f'{slugify(artifact.report.name) or "report"}-{artifact.created_at:%Y%m%d}.{artifact.format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,58 @@
+"""
+The rows of analytics a user may read, by the same role rules as the budget
+and forecast endpoints (``filter_budget_scope`` / ``filter_forecast_scope``).
+"""
+from django.db.models import Q
+
+from budgets.models import BudgetTransaction
+from budgets.views import filter_budget_scope
+from forecasts.models import Customer, CustomerItemForecast
+from forecasts.views import filter_forecast_scope
+from users.models import OrgUnitClosure, UserType
+
+
+def scope_key(user):
+    """A key shared by the users who see the same rows under the budget and forecast scope rules"""
+    if user.user_type == UserType.ADMIN:
+        return 'all'
+    if user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+        return f'unit:{user.org_unit_id}'
+    if user.user_type == UserType.MANAGER:
+        return f'department:{user.department}'
+    if user.user_type == UserType.BRANCH_MANAGER:
+        return f'location:{user.location}'
+    return f'user:{user.pk}'
+
+
+def scoped_customers(user):
+    """
+    Customers with a forecast or a sale inside the user's scope, or that the
+    user manages; every customer for administrators
+    """
+    customers = Customer.objects.all()
+    if user.user_type == UserType.ADMIN:
+        return customers
+    forecasts = filter_forecast_scope(CustomerItemForecast.objects.all(), user).values('customer_id')
+    sales = filter_budget_scope(
+        BudgetTransaction.objects.filter(customer__isnull=False), user, prefix='budget__'
+    ).values('customer_id')
+    return customers.filter(Q(pk__in=forecasts) | Q(pk__in=sales) | Q(manager=user))
+
+
+def scoped_reports(queryset, user):
+    """
+    Reports whose parameters keep their data inside the user's scope: an
+    ``org_unit`` under the user's unit, else their ``department`` for managers
+    or ``location`` for branch managers. Salesmen's scope is their own rows,
+    which no report is narrowed to, so they see none; administrators see all.
+    """
+    if user.user_type == UserType.ADMIN:
+        return queryset
+    if user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+        units = OrgUnitClosure.objects.filter(ancestor_id=user.org_unit_id).values_list('descendant_id', flat=True)
+        return queryset.filter(parameters__org_unit__in=list(units))
+    if user.user_type == UserType.MANAGER and user.department:
+        return queryset.filter(parameters__department=user.department)
+    if user.user_type == UserType.BRANCH_MANAGER and user.location:
+        return queryset.filter(parameters__location=user.location)
+    return queryset.none()
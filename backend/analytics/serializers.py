@@ -0,0 +1,78 @@
+from rest_framework import serializers
+
+from budgets.models import BudgetPeriod
+from data_sources.scheduler import job_schedule
+from users.models import OrgUnit
+from .models import BiReport, ReportArtifact
+from .series import DEFAULT_POINTS, MAX_POINTS
+
+
+class CubeQuerySerializer(serializers.Serializer):
+    levels = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    measures = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    filters = serializers.DictField(child=serializers.ListField(), required=False, default=dict)
+
+
+class SeriesQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False, default=None)
+    end = serializers.DateField(required=False, default=None)
+    points = serializers.IntegerField(min_value=3, max_value=MAX_POINTS, default=DEFAULT_POINTS)
+    customer = serializers.IntegerField(required=False, default=None)
+    item = serializers.IntegerField(required=False, default=None)
+    budget = serializers.IntegerField(required=False, default=None)
+
+    def validate(self, attrs):
+        if attrs['start'] and attrs['end'] and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': 'The range ends before it starts.'})
+        return attrs
+
+
+class BiReportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BiReport
+        fields = [
+            'id', 'name', 'description', 'report_type', 'format', 'parameters', 'schedule_type', 'schedule_config',
+            'render_on_period_close', 'next_run', 'last_rendered', 'is_active', 'created_by', 'created_at',
+            'updated_at'
+        ]
+        read_only_fields = ['id', 'next_run', 'last_rendered', 'created_by', 'created_at', 'updated_at']
+
+    def validate_parameters(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object.')
+        unknown = set(value) - set(BiReport.PARAMETERS)
+        if unknown:
+            raise serializers.ValidationError(f'Unknown parameters: {", ".join(sorted(unknown))}')
+        for name in ('year', 'period', 'org_unit'):
+            if value.get(name) is not None and not isinstance(value[name], int):
+                raise serializers.ValidationError(f'{name} must be an integer.')
+        if value.get('period') and not BudgetPeriod.objects.filter(pk=value['period']).exists():
+            raise serializers.ValidationError('period is not a budget period.')
+        if value.get('org_unit') and not OrgUnit.objects.filter(pk=value['org_unit']).exists():
+            raise serializers.ValidationError('org_unit is not an org unit.')
+        return value
+
+    def validate(self, attrs):
+        report = BiReport(
+            schedule_type=attrs.get('schedule_type', self.instance.schedule_type if self.instance else 'manual'),
+            schedule_config=attrs.get('schedule_config', self.instance.schedule_config if self.instance else {}),
+        )
+        try:
+            job_schedule(report)
+        except (ValueError, TypeError) as exc:
+            raise serializers.ValidationError({'schedule_config': str(exc)})
+        return attrs
+
+
+class ReportArtifactSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportArtifact
+        fields = [
+            'id', 'report', 'period', 'format', 'data_version', 'content_hash', 'size', 'row_count', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class ReportRenderSerializer(serializers.Serializer):
+    period = serializers.PrimaryKeyRelatedField(queryset=BudgetPeriod.objects.all(), required=False, default=None)
+    force = serializers.BooleanField(default=False)
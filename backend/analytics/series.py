@@ -0,0 +1,199 @@
+"""
+Time series for the dashboard charts, downsampled server-side.
+
+Transaction series are daily sums over the requested range, with zeros on
+days without transactions; ``forecast`` is monthly forecast value. A series
+longer than the requested point count is reduced with Largest-Triangle-
+Three-Buckets, which keeps the first and last points and, from each bucket
+in between, the point forming the largest triangle with the point kept
+before it and the average of the next bucket, so peaks and troughs survive.
+
+Only transactions of budgets and forecasts inside the user's scope are
+summed. Results are cached by scope, series, filters, range and point count.
+A version number per source in the key is bumped by any write to it, which
+drops all of its cached series at once.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.db.models.signals import post_save, post_delete
+
+from budgets.models import BudgetTransaction
+from budgets.views import filter_budget_scope
+from forecasts import engine
+from forecasts.models import CustomerItemForecast
+from forecasts.signals import forecasts_bulk_updated
+from forecasts.views import filter_forecast_scope
+from .scope import scope_key
+
+CACHE_TIMEOUT = 60 * 60
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+# Series name -> transaction type summed per day
+TRANSACTION_SERIES = {'sales': 'sale', 'expenses': 'expense', 'budget': 'allocation'}
+SERIES = [*TRANSACTION_SERIES, 'forecast']
+
+
+def lttb(x, y, threshold):
+    """Indexes of the ``threshold`` points of ``(x, y)`` that Largest-Triangle-Three-Buckets keeps"""
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets between the first and last points
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+    sums_x = np.concatenate([[0.0], np.cumsum(x)])
+    sums_y = np.concatenate([[0.0], np.cumsum(y)])
+    # Third vertex for each bucket: the next bucket's average, or the last point
+    next_x = np.append((sums_x[ends[1:]] - sums_x[starts[1:]]) / (ends[1:] - starts[1:]), x[-1])
+    next_y = np.append((sums_y[ends[1:]] - sums_y[starts[1:]]) / (ends[1:] - starts[1:]), y[-1])
+    # Buckets as rows of a padded matrix; the area for a kept point (ax, ay)
+    # is |ax * p + ay * q + r|, and padding has p = q = r = 0 after the real points
+    width = int((ends - starts).max())
+    rows = starts[:, None] + np.arange(width)
+    valid = rows < ends[:, None]
+    rows = np.where(valid, rows, starts[:, None])
+    bucket_x, bucket_y = x[rows], y[rows]
+    p = np.where(valid, bucket_y - next_y[:, None], 0.0)
+    q = np.where(valid, next_x[:, None] - bucket_x, 0.0)
+    r = np.where(valid, bucket_x * next_y[:, None] - next_x[:, None] * bucket_y, 0.0)
+
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        # Each pick depends on the one before it, so only this step runs per bucket
+        area = np.abs(x[previous] * p[bucket] + y[previous] * q[bucket] + r[bucket])
+        previous = rows[bucket, int(area.argmax())]
+        kept[bucket + 1] = previous
+    return kept
+
+
+def _version_key(source):
+    return f'analytics:series:{source}:version'
+
+
+def _source(name):
+    return 'transactions' if name in TRANSACTION_SERIES else 'forecasts'
+
+
+def invalidate_series(source):
+    try:
+        cache.incr(_version_key(source))
+    except ValueError:
+        pass  # nothing cached yet
+
+
+def _invalidate_on_commit(source):
+    transaction.on_commit(lambda: invalidate_series(source))
+
+
+def _on_transaction_change(sender, **kwargs):
+    _invalidate_on_commit('transactions')
+
+
+def _on_forecast_change(sender, **kwargs):
+    _invalidate_on_commit('forecasts')
+
+
+def connect_cache_invalidation():
+    for name, signal in (('save', post_save), ('delete', post_delete)):
+        signal.connect(
+            _on_transaction_change, sender=BudgetTransaction, dispatch_uid=f'analytics_series_transaction_{name}'
+        )
+        signal.connect(
+            _on_forecast_change, sender=CustomerItemForecast, dispatch_uid=f'analytics_series_forecast_{name}'
+        )
+    forecasts_bulk_updated.connect(_on_forecast_change, dispatch_uid='analytics_series_forecasts_bulk')
+
+
+def transaction_series(name, start=None, end=None, customer=None, item=None, budget=None, user=None):
+    """(dates, values) of daily totals, over the span of the data when no range is given"""
+    queryset = BudgetTransaction.objects.filter(transaction_type=TRANSACTION_SERIES[name])
+    if user is not None:
+        queryset = filter_budget_scope(queryset, user, prefix='budget__')
+    for field, value in (('customer_id', customer), ('item_id', item), ('budget_id', budget)):
+        if value is not None:
+            queryset = queryset.filter(**{field: value})
+    if start is None or end is None:
+        span = queryset.aggregate(first=Min('transaction_date'), last=Max('transaction_date'))
+        start, end = start or span['first'], end or span['last']
+        if start is None or end is None:
+            return np.zeros(0, dtype='datetime64[D]'), np.zeros(0)
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    values = np.zeros(len(days))
+    totals = list(
+        queryset.filter(transaction_date__range=(start, end))
+        .values_list('transaction_date').annotate(total=Sum('amount')).order_by()
+    )
+    if totals:
+        dates, amounts = zip(*totals)
+        positions = (np.array(dates, dtype='datetime64[D]') - days[0]).astype(np.intp)
+        values[positions] = np.array(amounts, dtype=np.float64)
+    return days, values
+
+
+def forecast_series(start=None, end=None, customer=None, item=None, user=None):
+    """(dates, values) of monthly forecast value, dated the first of each month"""
+    queryset = CustomerItemForecast.objects.all()
+    if user is not None:
+        queryset = filter_forecast_scope(queryset, user)
+    for field, value in (('customer_id', customer), ('item_id', item)):
+        if value is not None:
+            queryset = queryset.filter(**{field: value})
+    years = sorted(set(queryset.values_list('year', flat=True)))
+    if start is not None:
+        years = [year for year in years if year >= start.year]
+    if end is not None:
+        years = [year for year in years if year <= end.year]
+    if not years:
+        return np.zeros(0, dtype='datetime64[D]'), np.zeros(0)
+    dates = np.concatenate([
+        np.arange(np.datetime64(f'{year}-01'), np.datetime64(f'{year + 1}-01')).astype('datetime64[D]')
+        for year in years
+    ])
+    values = np.concatenate([engine.load_grid(queryset, year).monthly_totals() for year in years])
+    inside = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        inside &= dates >= np.datetime64(start, 'D')
+    if end is not None:
+        inside &= dates <= np.datetime64(end, 'D')
+    return dates[inside], values[inside]
+
+
+def compute_series(name, start=None, end=None, points=DEFAULT_POINTS, **filters):
+    if name in TRANSACTION_SERIES:
+        dates, values = transaction_series(name, start, end, **filters)
+    else:
+        filters.pop('budget', None)
+        dates, values = forecast_series(start, end, **filters)
+    kept = lttb(dates.astype(np.int64), values, points)
+    return {
+        'series': name,
+        'start': str(dates[0]) if len(dates) else None,
+        'end': str(dates[-1]) if len(dates) else None,
+        'source_points': len(dates),
+        'points': len(kept),
+        'data': [
+            {'date': str(date), 'value': round(value, 2)}
+            for date, value in zip(dates[kept].tolist(), values[kept].tolist())
+        ],
+    }
+
+
+def series(name, start=None, end=None, points=DEFAULT_POINTS, customer=None, item=None, budget=None, user=None):
+    """Cached ``compute_series``, over the scope of ``user`` when given"""
+    if name not in SERIES:
+        raise ValueError(f'Unknown series: {name}')
+    source = _source(name)
+    version = cache.get_or_set(_version_key(source), 1, timeout=None)
+    scope = scope_key(user) if user is not None else 'all'
+    key = f'analytics:series:{name}:v{version}:{scope}:{start}:{end}:{points}:{customer}:{item}:{budget}'
+    result = cache.get(key)
+    if result is None:
+        result = compute_series(name, start, end, points, customer=customer, item=item, budget=budget, user=user)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
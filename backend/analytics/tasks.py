@@ -0,0 +1,39 @@
+from celery import shared_task
+
+from budgets.models import BudgetPeriod
+from . import cube, dashboard, reports
+from .models import BiReport
+
+
+@shared_task(ignore_result=True)
+def refresh_cube(full=False):
+    """Fold changed partitions into the analytics cube; run every minute by Celery beat"""
+    cube.refresh(full=full)
+
+
+@shared_task(ignore_result=True)
+def refresh_dashboard_stats(stale_only=True):
+    """Recompute stale dashboard snapshots, or all of them from Celery beat"""
+    dashboard.refresh_snapshots(stale_only=stale_only)
+
+
+@shared_task(ignore_result=True)
+def render_bi_report(report_id, period_id=None, force=False):
+    """Render a report unless its latest artifact is of the current data"""
+    report = BiReport.objects.filter(pk=report_id).first()
+    if report is not None:
+        period = BudgetPeriod.objects.filter(pk=period_id).first() if period_id else None
+        reports.render_report(report, period, force=force)
+
+
+@shared_task(ignore_result=True)
+def render_due_reports():
+    """Queue every report due by now; run every minute by Celery beat"""
+    reports.dispatch_due(render_bi_report.delay)
+
+
+@shared_task(ignore_result=True)
+def render_period_reports(period_id):
+    """Render the reports that follow period closes for a closed period"""
+    for report_id in BiReport.objects.filter(is_active=True, render_on_period_close=True).values_list('pk', flat=True):
+        render_bi_report.delay(report_id, period_id)
@@ -0,0 +1,17 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    BiReportViewSet, CubeViewSet, CustomerAnalyticsViewSet, DashboardViewSet, ReportArtifactViewSet, SeriesViewSet,
+)
+
+router = DefaultRouter()
+router.register(r'customers', CustomerAnalyticsViewSet, basename='customer-analytics')
+router.register(r'dashboard', DashboardViewSet, basename='analytics-dashboard')
+router.register(r'cube', CubeViewSet, basename='analytics-cube')
+router.register(r'series', SeriesViewSet, basename='analytics-series')
+router.register(r'reports', BiReportViewSet, basename='bi-report')
+router.register(r'report-artifacts', ReportArtifactViewSet, basename='report-artifact')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,204 @@
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+
+from data_sources.scheduler import reschedule
+from users.models import UserType
+from users.negotiation import IgnoreClientContentNegotiation
+from users.permissions import CanViewAnalytics, IsAdminUser
+from users.sync import DeltaSyncMixin
+from .cube import get_cube
+from .customers import customer_analytics
+from .dashboard import SCOPES, dashboard_stats, user_scope
+from .models import BiReport, ReportArtifact
+from .reports import download_response
+from .scope import scoped_customers, scoped_reports
+from .serializers import (
+    CubeQuerySerializer, SeriesQuerySerializer, BiReportSerializer, ReportArtifactSerializer, ReportRenderSerializer,
+)
+from .series import SERIES, series
+from .tasks import refresh_cube, render_bi_report
+
+
+class CustomerAnalyticsViewSet(viewsets.ViewSet):
+    """
+    Growth, seasonality and tier metrics for one customer: ``/customers/{id}/?year=``,
+    from the forecasts and sales inside the user's scope. Customers outside
+    it are not found.
+    """
+    permission_classes = [CanViewAnalytics]
+
+    def retrieve(self, request, pk=None):
+        customer = get_object_or_404(scoped_customers(request.user), pk=pk)
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            year = timezone.now().year
+        return Response(customer_analytics(customer, year, request.user))
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    """
+    Dashboard statistics of the user's scope, from its stored snapshot.
+    Administrators may ask for another with ``?scope=&key=``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        scope, key = user_scope(request.user)
+        if request.user.user_type == UserType.ADMIN and 'scope' in request.query_params:
+            scope, key = request.query_params['scope'], request.query_params.get('key', '')
+            if scope not in SCOPES:
+                return Response({'error': f'Unknown scope: {scope}'}, status=status.HTTP_400_BAD_REQUEST)
+            if scope in ('org_unit', 'salesman') and not key.isdigit():
+                return Response({'error': f'The {scope} key must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(dashboard_stats(scope, key))
+
+
+class CubeViewSet(viewsets.ViewSet):
+    """
+    Slice, roll-up and drill-down over the pre-aggregated sales and budget
+    cube, restricted to the user's budgets and customers
+    """
+
+    def get_permissions(self):
+        if self.action == 'refresh':
+            permission_classes = [IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+    def list(self, request):
+        """Dimensions with their levels, measures and the snapshot version"""
+        return Response(get_cube(request.user).describe())
+
+    @action(detail=False, methods=['get'])
+    def members(self, request):
+        """Labels of one level: ``?level=Product.Category``"""
+        try:
+            return Response(get_cube(request.user).members(request.query_params.get('level', '')))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    def query(self, request):
+        serializer = CubeQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            return Response(get_cube(request.user).query(**serializer.validated_data))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    def refresh(self, request):
+        """Queue a refresh; ``{"full": true}`` rebuilds every partition"""
+        refresh_cube.delay(bool(request.data.get('full')))
+        return Response({'message': 'Cube refresh queued'}, status=status.HTTP_202_ACCEPTED)
+
+
+class SeriesViewSet(viewsets.ViewSet):
+    """
+    Chart series downsampled server-side: ``/series/{name}/?start=&end=&points=``,
+    over the transactions and forecasts inside the user's scope
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        return Response(SERIES)
+
+    def retrieve(self, request, pk=None):
+        if pk not in SERIES:
+            return Response({'error': f'Unknown series: {pk}'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = SeriesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(series(pk, user=request.user, **serializer.validated_data))
+
+
+def _download(request, artifact):
+    try:
+        return download_response(request, artifact)
+    except FileNotFoundError:
+        return Response({'error': 'The report file is missing; render the report again.'},
+                        status=status.HTTP_404_NOT_FOUND)
+
+
+class BiReportViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    """
+    Reports rendered ahead of time; downloads are served from the stored
+    artifacts. Non-administrators see only reports narrowed to their scope.
+    """
+    queryset = BiReport.objects.all()
+    serializer_class = BiReportSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['report_type', 'format', 'schedule_type', 'is_active']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'last_rendered', 'created_at']
+    ordering = ['name']
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            permission_classes = [CanViewAnalytics]
+        else:
+            permission_classes = [IsAdminUser]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        return scoped_reports(super().get_queryset(), self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+        reschedule(serializer.instance)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        reschedule(serializer.instance)
+
+    @action(detail=True, methods=['post'])
+    def render(self, request, pk=None):
+        """Queue a rendering, skipped if the data has not changed unless ``{"force": true}``"""
+        report = self.get_object()
+        serializer = ReportRenderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        period = serializer.validated_data['period']
+        render_bi_report.delay(report.pk, period.pk if period else None, serializer.validated_data['force'])
+        return Response({'message': 'Report rendering queued'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def artifacts(self, request, pk=None):
+        queryset = self.get_object().artifacts.all()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ReportArtifactSerializer(page, many=True).data)
+        return Response(ReportArtifactSerializer(queryset, many=True).data)
+
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnoreClientContentNegotiation)
+    def download(self, request, pk=None):
+        """The latest artifact in the report's format, ``?period=`` for a period's rendering"""
+        report = self.get_object()
+        period = request.query_params.get('period') or None
+        if period is not None and not period.isdigit():
+            return Response({'error': 'period must be a budget period id.'}, status=status.HTTP_400_BAD_REQUEST)
+        artifact = report.artifacts.filter(format=report.format, period_id=period).select_related('report').first()
+        if artifact is None:
+            return Response({'error': 'The report has not been rendered yet.'}, status=status.HTTP_404_NOT_FOUND)
+        return _download(request, artifact)
+
+
+class ReportArtifactViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ReportArtifact.objects.select_related('report')
+    serializer_class = ReportArtifactSerializer
+    permission_classes = [CanViewAnalytics]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['report', 'period', 'format']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(report__in=scoped_reports(BiReport.objects.all(), self.request.user))
+
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnoreClientContentNegotiation)
+    def download(self, request, pk=None):
+        return _download(request, self.get_object())
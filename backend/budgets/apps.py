@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+
+
+class BudgetsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'budgets'
+
+    def ready(self):
+        from users.sync import track_deletions
+        from .events import connect_change_events
+        from .models import (
+            BudgetPeriod, BudgetCategory, Budget, BudgetItem, BudgetTransaction,
+            BudgetTemplate, BudgetApproval
+        )
+
+        track_deletions(
+            BudgetPeriod, BudgetCategory, Budget, BudgetItem, BudgetTransaction,
+            BudgetTemplate, BudgetApproval
+        )
+        connect_change_events()
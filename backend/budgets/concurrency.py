@@ -0,0 +1,151 @@
+from django.db import models, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class VersionConflict(Exception):
+    """Raised when a row changed since the client last read it"""
+
+    def __init__(self, model, pk, expected_version):
+        self.model = model
+        self.pk = pk
+        self.expected_version = expected_version
+        super().__init__(
+            f"{model.__name__} {pk} is no longer at version {expected_version}"
+        )
+
+
+class VersionedModel(models.Model):
+    """
+    Abstract model adding an optimistic concurrency counter.
+
+    Every save of an existing row becomes
+    ``UPDATE ... SET version = version + 1 WHERE id = %s AND version = %s``;
+    when no row matches, another writer got there first and
+    ``VersionConflict`` is raised instead of silently overwriting them.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        expected_version = self.version
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+
+        self._expected_version = expected_version
+        self.version = expected_version + 1
+        try:
+            super().save(*args, **kwargs)
+        except VersionConflict:
+            self.version = expected_version
+            raise
+        finally:
+            del self._expected_version
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected_version = getattr(self, '_expected_version', None)
+        if expected_version is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        filtered = base_qs.filter(pk=pk_val, version=expected_version)
+        if filtered._update(values) == 0:
+            raise VersionConflict(type(self), pk_val, expected_version)
+        return True
+
+
+def parse_etag_version(header):
+    """Extract the version from an ``If-Match``/``If-None-Match`` header"""
+    if not header:
+        return None
+    tag = header.split(',')[0].strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    try:
+        return int(tag)
+    except ValueError:
+        return None
+
+
+class OptimisticConcurrencyMixin:
+    """
+    ViewSet mixin exposing ``VersionedModel.version`` as an ETag.
+
+    Reads return ``ETag`` (and honour ``If-None-Match``). Writes take the
+    expected version from ``If-Match`` or a ``version`` key in the body and
+    answer 409 with the current representation when it is stale. Updates
+    without either answer 428, so no client falls back to last-writer-wins;
+    deletes without one remove the current version.
+    """
+
+    @staticmethod
+    def get_etag(instance):
+        return f'"{instance.version}"'
+
+    def get_expected_version(self, instance):
+        """The version the client last read; ``None`` when it sent none"""
+        expected = parse_etag_version(self.request.headers.get('If-Match'))
+        if expected is None:
+            expected = self.request.data.get('version')
+        if expected is None:
+            return None
+        try:
+            return int(expected)
+        except (TypeError, ValueError):
+            return -1
+
+    def conflict_response(self, pk):
+        current = self.get_queryset().filter(pk=pk).first()
+        data = {'detail': 'This record was modified by another user.', 'current': None}
+        headers = {}
+        if current is not None:
+            data['current'] = self.get_serializer(current).data
+            headers['ETag'] = self.get_etag(current)
+        return Response(data, status=status.HTTP_409_CONFLICT, headers=headers)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_etag(instance)
+        if parse_etag_version(request.headers.get('If-None-Match')) == instance.version:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={'ETag': etag})
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        expected = self.get_expected_version(instance)
+        if expected is None:
+            return Response(
+                {'detail': 'Send the version you last read as If-Match or in the body.'},
+                status=status.HTTP_428_PRECONDITION_REQUIRED, headers={'ETag': self.get_etag(instance)}
+            )
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+
+        # The conditional UPDATE compares against the client's version, so a
+        # stale read is rejected even if nobody else writes during this request.
+        instance.version = expected
+        try:
+            with transaction.atomic():
+                self.perform_update(serializer)
+        except VersionConflict:
+            return self.conflict_response(instance.pk)
+
+        return Response(serializer.data, headers={'ETag': self.get_etag(instance)})
+
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        expected = self.get_expected_version(instance)
+        if expected is None:
+            expected = instance.version
+        deleted, _ = type(instance).objects.filter(pk=instance.pk, version=expected).delete()
+        if not deleted:
+            return self.conflict_response(instance.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
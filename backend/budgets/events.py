@@ -0,0 +1,245 @@
+"""
+Change notifications for budgets, transactions and approvals.
+
+Model writes are published after commit to an event channel (a capped Redis
+stream in production, an in-process buffer for tests and development) and
+fanned out to each user's server-sent event stream, filtered to their scope.
+"""
+import json
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from users.models import UserType, OrgUnitClosure
+
+# How long the stream waits for further events before flushing a burst.
+COALESCE_WINDOW = 0.25
+HEARTBEAT_SECONDS = 15
+# Streams end after this long; clients reconnect with Last-Event-ID.
+STREAM_MAX_SECONDS = 300
+RETRY_MILLISECONDS = 3000
+
+
+class InMemoryEventChannel:
+    """Process-local channel; only suitable for tests and a single dev server"""
+
+    def __init__(self, location=None, maxlen=10000):
+        self._events = deque(maxlen=maxlen)
+        self._next_id = 1
+        self._condition = threading.Condition()
+
+    def publish(self, event):
+        with self._condition:
+            event_id = str(self._next_id)
+            self._next_id += 1
+            self._events.append((event_id, event))
+            self._condition.notify_all()
+        return event_id
+
+    def latest_id(self):
+        with self._condition:
+            return str(self._next_id - 1)
+
+    def read(self, last_id, timeout):
+        try:
+            last = int(last_id)
+        except ValueError:
+            last = self._next_id - 1
+        with self._condition:
+            self._condition.wait_for(lambda: self._next_id - 1 > last, timeout=timeout)
+            return [(event_id, event) for event_id, event in self._events if int(event_id) > last]
+
+
+class RedisEventChannel:
+    """Channel backed by a capped Redis stream, shared by all workers"""
+
+    def __init__(self, location, maxlen=10000, stream='budget-events'):
+        import redis
+
+        self._client = redis.Redis.from_url(location)
+        self._maxlen = maxlen
+        self._stream = stream
+
+    def publish(self, event):
+        event_id = self._client.xadd(
+            self._stream, {'data': json.dumps(event)}, maxlen=self._maxlen, approximate=True
+        )
+        return event_id.decode()
+
+    def latest_id(self):
+        latest = self._client.xrevrange(self._stream, count=1)
+        return latest[0][0].decode() if latest else '0-0'
+
+    def read(self, last_id, timeout):
+        block = int(timeout * 1000) or None  # 0 would block forever
+        response = self._client.xread({self._stream: last_id}, count=500, block=block)
+        if not response:
+            return []
+        return [
+            (event_id.decode(), json.loads(fields[b'data']))
+            for event_id, fields in response[0][1]
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_event_channel():
+    config = settings.EVENT_CHANNEL
+    backend = import_string(config['BACKEND'])
+    return backend(config.get('LOCATION'), **config.get('OPTIONS', {}))
+
+
+def publish_on_commit(event):
+    transaction.on_commit(lambda: get_event_channel().publish(event))
+
+
+def budget_event(model, action, pk, budget, **extra):
+    """Build an event carrying the owning budget's scope for filtering"""
+    return {
+        'model': model,
+        'action': action,
+        'id': pk,
+        'budget': budget.pk,
+        'user': budget.user_id,
+        'department': budget.department,
+        'location': budget.location,
+        'org_unit': budget.org_unit_id,
+        'timestamp': timezone.now().isoformat(),
+        **extra,
+    }
+
+
+def publish_budget_updates(budgets):
+    """Publish ``updated`` events for budgets changed by a queryset update"""
+    for budget in budgets.only('id', 'user_id', 'department', 'location', 'org_unit_id', 'status'):
+        publish_on_commit(budget_event('budget', 'updated', budget.pk, budget, status=budget.status))
+
+
+def _on_budget_change(sender, instance, created=False, **kwargs):
+    action = 'deleted' if kwargs['signal'] is post_delete else 'created' if created else 'updated'
+    publish_on_commit(budget_event('budget', action, instance.pk, instance, status=instance.status))
+
+
+def _on_budget_child_change(sender, instance, created=False, **kwargs):
+    action = 'deleted' if kwargs['signal'] is post_delete else 'created' if created else 'updated'
+    extra = {'status': instance.status} if hasattr(instance, 'status') else {}
+    model = sender._meta.model_name.replace('budget', '', 1)
+    publish_on_commit(budget_event(model, action, instance.pk, instance.budget, **extra))
+
+
+def connect_change_events():
+    from .models import Budget, BudgetTransaction, BudgetApproval
+
+    for name, signal in (('save', post_save), ('delete', post_delete)):
+        signal.connect(_on_budget_change, sender=Budget, dispatch_uid=f'events_budget_{name}')
+        for model in (BudgetTransaction, BudgetApproval):
+            signal.connect(
+                _on_budget_child_change, sender=model,
+                dispatch_uid=f'events_{model._meta.model_name}_{name}'
+            )
+
+
+def user_scope_units(user):
+    """Ids of the org units under the user's unit, or None if scope is flat"""
+    if user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+        return set(
+            OrgUnitClosure.objects.filter(ancestor_id=user.org_unit_id)
+            .values_list('descendant_id', flat=True)
+        )
+    return None
+
+
+def event_in_scope(user, event, scope_units=None):
+    """Mirror of ``filter_budget_scope`` for a single published event"""
+    if user.user_type == UserType.ADMIN:
+        return True
+    elif scope_units is not None:
+        return event.get('org_unit') in scope_units
+    elif user.user_type == UserType.MANAGER:
+        return event['department'] == user.department
+    elif user.user_type == UserType.BRANCH_MANAGER:
+        return event['location'] == user.location
+    return event['user'] == user.pk
+
+
+def coalesce(events):
+    """Keep only the latest event per object, in the order they last changed"""
+    latest = {}
+    for event_id, event in events:
+        key = (event['model'], event['id'])
+        latest.pop(key, None)
+        latest[key] = (event_id, event)
+    return list(latest.values())
+
+
+def format_sse(event_id, event):
+    return f"id: {event_id}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+
+def event_stream(user, last_event_id=None, channel=None, max_seconds=STREAM_MAX_SECONDS):
+    """Yield SSE frames with the user's in-scope changes, resuming after ``last_event_id``"""
+    channel = channel or get_event_channel()
+    last_id = last_event_id or channel.latest_id()
+    deadline = time.monotonic() + max_seconds
+    last_sent = time.monotonic()
+    scope_units = user_scope_units(user)
+
+    yield f"retry: {RETRY_MILLISECONDS}\n\n"
+    while time.monotonic() < deadline:
+        batch = channel.read(last_id, timeout=max(0, min(HEARTBEAT_SECONDS, deadline - time.monotonic())))
+        if batch:
+            # Let a burst (e.g. a batch edit) settle so it goes out as one flush.
+            time.sleep(COALESCE_WINDOW)
+            batch += channel.read(batch[-1][0], timeout=0)
+            last_id = batch[-1][0]
+            visible = [
+                (event_id, event) for event_id, event in batch
+                if event_in_scope(user, event, scope_units)
+            ]
+            frames = [format_sse(event_id, event) for event_id, event in coalesce(visible)]
+            if frames:
+                last_sent = time.monotonic()
+                yield ''.join(frames)
+        if time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+
+
+_stream_slots = None
+_stream_slots_lock = threading.Lock()
+
+
+class StreamSlot:
+    """
+    One of this process's ``EVENT_STREAM_MAX_CONNECTIONS`` open streams,
+    released when the response wrapping ``frames`` is closed
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self._released = False
+
+    @classmethod
+    def acquire(cls, frames):
+        """A ``StreamSlot`` around ``frames``, or None when every slot is taken"""
+        global _stream_slots
+        with _stream_slots_lock:
+            if _stream_slots is None:
+                _stream_slots = threading.BoundedSemaphore(settings.EVENT_STREAM_MAX_CONNECTIONS)
+        return cls(frames) if _stream_slots.acquire(blocking=False) else None
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self.frames.close()
+            _stream_slots.release()
+
@@ -1,8 +1,15 @@
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import OrgUnit
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
+from .concurrency import VersionedModel
+from .signals import budgets_bulk_updated
+
 User = get_user_model()
 
 
@@ -17,6 +24,7 @@ class BudgetPeriod(models.Model):
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
 
     def __str__(self):
         return f"{self.name} ({self.start_date} - {self.end_date})"
@@ -33,13 +41,34 @@ class BudgetCategory(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
         verbose_name_plural = "Budget categories"
 
     def __str__(self):
         return self.name
 
 
-class Budget(models.Model):
+class BudgetQuerySet(models.QuerySet):
+    def recalculate_totals(self):
+        """
+        Bring the budgets' ``remaining_amount`` in step after their line items
+        change, with a single UPDATE; computed as ``Budget.save`` does. Budgets
+        already in step keep their version.
+        """
+        from .events import publish_budget_updates
+
+        updated = self.exclude(remaining_amount=F('total_budget') - F('spent_amount')).update(
+            remaining_amount=F('total_budget') - F('spent_amount'),
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        if updated:
+            publish_budget_updates(self)
+            budgets_bulk_updated.send(self.model, budgets=self)
+        return updated
+
+
+class Budget(VersionedModel):
     """Main budget model"""
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -57,6 +86,9 @@ class Budget(models.Model):
     category = models.ForeignKey(BudgetCategory, on_delete=models.CASCADE, related_name='budgets')
     department = models.CharField(max_length=100, blank=True)
     location = models.CharField(max_length=100, blank=True)
+    org_unit = models.ForeignKey(
+        OrgUnit, on_delete=models.SET_NULL, null=True, blank=True, related_name='budgets'
+    )
     
     # Budget amounts
     total_budget = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
@@ -78,8 +110,11 @@ class Budget(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BudgetQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -102,7 +137,7 @@ class Budget(models.Model):
         return self.spent_amount > self.total_budget
 
 
-class BudgetItem(models.Model):
+class BudgetItem(VersionedModel):
     """Individual budget line items"""
     ITEM_TYPE_CHOICES = [
         ('revenue', 'Revenue'),
@@ -135,6 +170,7 @@ class BudgetItem(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
 
     def __str__(self):
         return f"{self.name} - {self.budget.title}"
@@ -159,10 +195,20 @@ class BudgetTransaction(models.Model):
         ('expense', 'Expense'),
         ('adjustment', 'Adjustment'),
         ('transfer', 'Transfer'),
+        ('sale', 'Sale'),
     ]
 
     budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='transactions')
     budget_item = models.ForeignKey(BudgetItem, on_delete=models.CASCADE, related_name='transactions', null=True, blank=True)
+    # Set on sales so actuals can be matched to customer-item forecasts
+    customer = models.ForeignKey(
+        'forecasts.Customer', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='transactions'
+    )
+    item = models.ForeignKey(
+        'forecasts.Item', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='transactions'
+    )
     
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPE_CHOICES)
     amount = models.DecimalField(max_digits=15, decimal_places=2)
@@ -184,6 +230,10 @@ class BudgetTransaction(models.Model):
 
     class Meta:
         ordering = ['-transaction_date', '-created_at']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['customer', 'item', 'transaction_date']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.budget.title}"
@@ -207,6 +257,7 @@ class BudgetTemplate(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
 
     def __str__(self):
         return self.name
@@ -235,6 +286,7 @@ class BudgetApproval(models.Model):
 
     class Meta:
         ordering = ['-requested_at']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
         unique_together = ['budget', 'approver']
 
     def __str__(self):
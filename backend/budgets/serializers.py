@@ -0,0 +1,101 @@
+from rest_framework import serializers
+from .models import (
+    BudgetPeriod, BudgetCategory, Budget, BudgetItem, BudgetTransaction,
+    BudgetTemplate, BudgetApproval
+)
+
+
+class BudgetPeriodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BudgetPeriod
+        fields = ['id', 'name', 'start_date', 'end_date', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class BudgetCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BudgetCategory
+        fields = ['id', 'name', 'description', 'color', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class BudgetItemSerializer(serializers.ModelSerializer):
+    variance_percentage = serializers.DecimalField(max_digits=9, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = BudgetItem
+        fields = [
+            'id', 'budget', 'name', 'description', 'item_type', 'planned_amount',
+            'actual_amount', 'variance', 'variance_percentage', 'is_recurring', 'frequency',
+            'start_date', 'end_date', 'vendor', 'account_code', 'notes', 'version',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'variance', 'version', 'created_at', 'updated_at']
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    user_name = serializers.CharField(source='user.full_name', read_only=True)
+    utilization_percentage = serializers.DecimalField(max_digits=9, decimal_places=2, read_only=True)
+    is_over_budget = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Budget
+        fields = [
+            'id', 'title', 'description', 'user', 'user_name', 'period', 'category',
+            'department', 'location', 'org_unit', 'total_budget', 'allocated_amount', 'spent_amount',
+            'remaining_amount', 'utilization_percentage', 'is_over_budget', 'status',
+            'approval_date', 'approved_by', 'tags', 'notes', 'version', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'user', 'remaining_amount', 'approval_date', 'approved_by', 'version',
+            'created_at', 'updated_at'
+        ]
+
+
+class BudgetTransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BudgetTransaction
+        fields = [
+            'id', 'budget', 'budget_item', 'customer', 'item', 'transaction_type', 'amount',
+            'description', 'transaction_date', 'reference_number', 'approved_by', 'receipt_url', 'notes',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'approved_by', 'created_at', 'updated_at']
+
+
+class BudgetTemplateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BudgetTemplate
+        fields = [
+            'id', 'name', 'description', 'category', 'default_amount', 'items_structure',
+            'is_active', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+
+
+class BudgetApprovalSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BudgetApproval
+        fields = [
+            'id', 'budget', 'approver', 'status', 'comments', 'requested_at',
+            'responded_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'requested_at', 'created_at', 'updated_at']
+
+
+class BudgetItemCellEditSerializer(serializers.Serializer):
+    """A single spreadsheet cell edit: set ``field`` of item ``id`` to ``value``"""
+    EDITABLE_FIELDS = [
+        'name', 'description', 'item_type', 'planned_amount', 'actual_amount',
+        'is_recurring', 'frequency', 'start_date', 'end_date', 'vendor',
+        'account_code', 'notes'
+    ]
+
+    id = serializers.IntegerField()
+    field = serializers.ChoiceField(choices=EDITABLE_FIELDS)
+    value = serializers.JSONField(allow_null=True)
+    version = serializers.IntegerField(required=False)
+
+
+class BudgetItemBatchEditSerializer(serializers.Serializer):
+    edits = BudgetItemCellEditSerializer(many=True, allow_empty=False)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after bulk writes that bypass post_save, with a queryset of the budgets
+# that changed: budgets_bulk_updated.send(sender, budgets=...)
+budgets_bulk_updated = Signal()
@@ -0,0 +1,21 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    BudgetPeriodViewSet, BudgetCategoryViewSet, BudgetViewSet, BudgetItemViewSet,
+    BudgetTransactionViewSet, BudgetTemplateViewSet, BudgetApprovalViewSet,
+    BudgetEventStreamView
+)
+
+router = DefaultRouter()
+router.register(r'budgets', BudgetViewSet, basename='budget')
+router.register(r'items', BudgetItemViewSet, basename='budgetitem')
+router.register(r'transactions', BudgetTransactionViewSet, basename='budgettransaction')
+router.register(r'categories', BudgetCategoryViewSet, basename='budgetcategory')
+router.register(r'periods', BudgetPeriodViewSet, basename='budgetperiod')
+router.register(r'templates', BudgetTemplateViewSet, basename='budgettemplate')
+router.register(r'approvals', BudgetApprovalViewSet, basename='budgetapproval')
+
+urlpatterns = [
+    path('events/', BudgetEventStreamView.as_view(), name='budget-events'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,261 @@
+from collections import defaultdict
+
+from rest_framework import viewsets, status, permissions, serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import SearchFilter, OrderingFilter
+
+from users.authentication import QueryTokenJWTAuthentication
+from users.models import UserType, org_scope_filter
+from users.negotiation import IgnoreClientContentNegotiation
+from users.permissions import CanManageBudgets
+from users.sync import DeltaSyncMixin
+from .concurrency import OptimisticConcurrencyMixin
+from .events import StreamSlot, event_stream
+from .models import (
+    BudgetPeriod, BudgetCategory, Budget, BudgetItem, BudgetTransaction,
+    BudgetTemplate, BudgetApproval
+)
+from .serializers import (
+    BudgetPeriodSerializer, BudgetCategorySerializer, BudgetSerializer,
+    BudgetItemSerializer, BudgetTransactionSerializer, BudgetTemplateSerializer,
+    BudgetApprovalSerializer, BudgetItemBatchEditSerializer
+)
+
+
+def filter_budget_scope(queryset, user, prefix=''):
+    """Restrict a queryset of budgets (or rows under ``prefix`` budget) to the user's scope"""
+    if user.user_type == UserType.ADMIN:
+        return queryset
+    elif user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+        return queryset.filter(org_scope_filter(user.org_unit_id, prefix))
+    elif user.user_type == UserType.MANAGER:
+        return queryset.filter(**{f'{prefix}department': user.department})
+    elif user.user_type == UserType.BRANCH_MANAGER:
+        return queryset.filter(**{f'{prefix}location': user.location})
+    return queryset.filter(**{f'{prefix}user': user})
+
+
+class BudgetPeriodViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = BudgetPeriod.objects.all()
+    serializer_class = BudgetPeriodSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['is_active']
+    search_fields = ['name']
+    ordering_fields = ['start_date', 'end_date', 'name']
+    ordering = ['-start_date']
+
+
+class BudgetCategoryViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = BudgetCategory.objects.all()
+    serializer_class = BudgetCategorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['is_active']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'created_at']
+    ordering = ['name']
+
+
+class BudgetViewSet(DeltaSyncMixin, OptimisticConcurrencyMixin, viewsets.ModelViewSet):
+    queryset = Budget.objects.select_related('user', 'period', 'category')
+    serializer_class = BudgetSerializer
+    permission_classes = [CanManageBudgets]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['status', 'period', 'category', 'department', 'location', 'user']
+    search_fields = ['title', 'description', 'department', 'location']
+    ordering_fields = ['title', 'total_budget', 'spent_amount', 'created_at', 'updated_at']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        return filter_budget_scope(super().get_queryset(), self.request.user)
+
+    def check_org_unit(self, org_unit):
+        """Non-admins may only file budgets under their own unit or units below it"""
+        user = self.request.user
+        if org_unit is None or user.user_type == UserType.ADMIN:
+            return
+        if user.org_unit is None or not user.org_unit.is_ancestor_of(org_unit.pk):
+            raise serializers.ValidationError({'org_unit': 'This unit is outside your part of the organisation.'})
+
+    def perform_create(self, serializer):
+        org_unit = serializer.validated_data.get('org_unit') or self.request.user.org_unit
+        self.check_org_unit(org_unit)
+        serializer.save(user=self.request.user, org_unit=org_unit)
+
+    def perform_update(self, serializer):
+        if 'org_unit' in serializer.validated_data:
+            self.check_org_unit(serializer.validated_data['org_unit'])
+        super().perform_update(serializer)
+
+
+class BudgetItemViewSet(DeltaSyncMixin, OptimisticConcurrencyMixin, viewsets.ModelViewSet):
+    queryset = BudgetItem.objects.select_related('budget')
+    serializer_class = BudgetItemSerializer
+    permission_classes = [CanManageBudgets]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['budget', 'item_type', 'is_recurring']
+    search_fields = ['name', 'description', 'vendor', 'account_code']
+    ordering_fields = ['name', 'planned_amount', 'actual_amount', 'variance', 'updated_at']
+    ordering = ['name']
+
+    def get_queryset(self):
+        return filter_budget_scope(super().get_queryset(), self.request.user, prefix='budget__')
+
+    def perform_create(self, serializer):
+        item = serializer.save()
+        Budget.objects.filter(pk=item.budget_id).recalculate_totals()
+
+    def perform_update(self, serializer):
+        budget_id = serializer.instance.budget_id
+        item = serializer.save()
+        Budget.objects.filter(pk__in={budget_id, item.budget_id}).recalculate_totals()
+
+    def destroy(self, request, *args, **kwargs):
+        budget_id = self.get_object().budget_id
+        response = super().destroy(request, *args, **kwargs)
+        if response.status_code == status.HTTP_204_NO_CONTENT:
+            Budget.objects.filter(pk=budget_id).recalculate_totals()
+        return response
+
+    @action(detail=False, methods=['post'])
+    def batch_edit(self, request):
+        """
+        Apply many cell edits (e.g. a spreadsheet paste) in one transaction.
+
+        Edits are validated together; invalid or stale ones are reported and
+        skipped while the rest are written with a single ``bulk_update``.
+        Variance and the parent budget totals are recomputed set-wise.
+        """
+        serializer = BudgetItemBatchEditSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        edits = serializer.validated_data['edits']
+        item_fields = BudgetItemSerializer().fields
+        results = [None] * len(edits)
+
+        with transaction.atomic():
+            # Row locks are held only for this short transaction, never across
+            # client think time, so editors don't serialize on each other.
+            items = self.get_queryset().select_for_update(of=('self',)).in_bulk(
+                {edit['id'] for edit in edits}
+            )
+            stale_ids = {
+                edit['id'] for edit in edits
+                if 'version' in edit and edit['id'] in items
+                and edit['version'] != items[edit['id']].version
+            }
+
+            changes = defaultdict(dict)
+            for index, edit in enumerate(edits):
+                item = items.get(edit['id'])
+                if item is None:
+                    results[index] = {'index': index, 'id': edit['id'], 'status': 'not_found'}
+                    continue
+                if item.pk in stale_ids:
+                    results[index] = {'index': index, 'id': item.pk, 'status': 'conflict', 'version': item.version}
+                    continue
+                try:
+                    changes[item.pk][edit['field']] = item_fields[edit['field']].run_validation(edit['value'])
+                except serializers.ValidationError as exc:
+                    results[index] = {'index': index, 'id': item.pk, 'status': 'invalid', 'errors': exc.detail}
+
+            changed_fields = {'variance', 'version', 'updated_at'}
+            now = timezone.now()
+            for pk, values in changes.items():
+                item = items[pk]
+                for field, value in values.items():
+                    setattr(item, field, value)
+                item.variance = item.actual_amount - item.planned_amount
+                item.version += 1
+                item.updated_at = now
+                changed_fields.update(values)
+
+            updated = [items[pk] for pk in changes]
+            if updated:
+                BudgetItem.objects.bulk_update(updated, sorted(changed_fields), batch_size=500)
+                Budget.objects.filter(pk__in={item.budget_id for item in updated}).recalculate_totals()
+
+        for index, edit in enumerate(edits):
+            if results[index] is None:
+                item = items[edit['id']]
+                results[index] = {
+                    'index': index, 'id': item.pk, 'status': 'ok',
+                    'version': item.version, 'variance': str(item.variance)
+                }
+
+        return Response({'applied': len(updated), 'results': results})
+
+
+class BudgetTransactionViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = BudgetTransaction.objects.select_related('budget', 'budget_item')
+    serializer_class = BudgetTransactionSerializer
+    permission_classes = [CanManageBudgets]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['budget', 'budget_item', 'customer', 'item', 'transaction_type', 'transaction_date']
+    search_fields = ['description', 'reference_number']
+    ordering_fields = ['transaction_date', 'amount', 'created_at']
+    ordering = ['-transaction_date', '-created_at']
+
+    def get_queryset(self):
+        return filter_budget_scope(super().get_queryset(), self.request.user, prefix='budget__')
+
+
+class BudgetTemplateViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = BudgetTemplate.objects.select_related('category', 'created_by')
+    serializer_class = BudgetTemplateSerializer
+    permission_classes = [CanManageBudgets]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['category', 'is_active']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'created_at']
+    ordering = ['name']
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+
+class BudgetApprovalViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = BudgetApproval.objects.select_related('budget', 'approver')
+    serializer_class = BudgetApprovalSerializer
+    permission_classes = [CanManageBudgets]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['budget', 'approver', 'status']
+    ordering_fields = ['requested_at', 'responded_at']
+    ordering = ['-requested_at']
+
+    def get_queryset(self):
+        return filter_budget_scope(super().get_queryset(), self.request.user, prefix='budget__')
+
+
+class BudgetEventStreamView(APIView):
+    """
+    Server-sent event stream of budget, transaction and approval changes.
+
+    Only changes inside the user's scope are sent. Reconnecting clients
+    resume from the ``Last-Event-ID`` header (or ``?last_event_id=``).
+    ``EventSource`` cannot send headers, so the JWT may be passed as
+    ``?access_token=``. Each open stream holds a worker thread; a process
+    serves at most ``EVENT_STREAM_MAX_CONNECTIONS`` and answers 503 beyond.
+    """
+    authentication_classes = [QueryTokenJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request):
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        frames = StreamSlot.acquire(event_stream(request.user, last_event_id))
+        if frames is None:
+            return Response(
+                {'error': 'Too many open event streams; retry shortly.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'}
+            )
+        response = StreamingHttpResponse(frames, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,52 @@
+from django.contrib import admin
+from .models import (
+    DataConnection, DataQuery, DataSchema, DataSyncJob, DataSyncRun, DataQualityCheck, QualityRuleResult
+)
+
+
+@admin.register(DataConnection)
+class DataConnectionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'source_type', 'status', 'last_sync', 'is_active']
+    list_filter = ['source_type', 'status', 'is_active']
+    search_fields = ['name', 'description']
+    readonly_fields = ['last_sync', 'last_error']
+
+
+@admin.register(DataSchema)
+class DataSchemaAdmin(admin.ModelAdmin):
+    list_display = ['connection', 'refreshed_at']
+
+
+@admin.register(DataQuery)
+class DataQueryAdmin(admin.ModelAdmin):
+    list_display = ['name', 'connection', 'updated_at']
+    list_filter = ['connection']
+    search_fields = ['name', 'description']
+
+
+@admin.register(DataSyncJob)
+class DataSyncJobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'connection', 'source_table', 'sync_mode', 'schedule_type', 'status', 'last_run']
+    list_filter = ['sync_mode', 'schedule_type', 'status', 'is_active']
+    search_fields = ['name', 'source_table', 'target_table']
+    readonly_fields = ['watermark', 'last_run', 'next_run']
+
+
+@admin.register(DataSyncRun)
+class DataSyncRunAdmin(admin.ModelAdmin):
+    list_display = ['job', 'status', 'sync_mode', 'rows_read', 'rows_written', 'rows_deleted', 'started_at']
+    list_filter = ['status', 'sync_mode']
+
+
+@admin.register(DataQualityCheck)
+class DataQualityCheckAdmin(admin.ModelAdmin):
+    list_display = ['name', 'connection', 'table', 'column', 'check_type', 'status', 'score', 'last_run']
+    list_filter = ['check_type', 'status', 'is_active']
+    search_fields = ['name', 'table', 'column']
+    readonly_fields = ['status', 'score', 'last_run']
+
+
+@admin.register(QualityRuleResult)
+class QualityRuleResultAdmin(admin.ModelAdmin):
+    list_display = ['quality_check', 'rule_index', 'rule_type', 'rows_checked', 'rows_failed', 'checked_at']
+    list_filter = ['rule_type', 'severity', 'pushed_down']
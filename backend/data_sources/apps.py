@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class DataSourcesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'data_sources'
+    verbose_name = 'Data sources'
+
+    def ready(self):
+        from users.sync import track_deletions
+        from .models import DataConnection, DataQuery, DataSyncJob, DataQualityCheck
+        from .query_cache import connect_cache_invalidation
+
+        track_deletions(DataConnection, DataQuery, DataSyncJob, DataQualityCheck)
+        connect_cache_invalidation()
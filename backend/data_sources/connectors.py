@@ -0,0 +1,536 @@
+"""
+Connectors for SQL and file data sources.
+
+Each source has a bounded pool of DB-API connections per process. The pool
+size (``poolSize`` in the source's config) is also its concurrency limit
+across every web and worker process: a connection is only handed out with
+one of the source's ``poolSize`` shared slots (see ``slots``), so at most
+that many queries run against the source at once. Further callers wait up
+to ``timeout`` seconds before ``SourceBusy`` is raised. Idle connections
+are kept per process, up to ``poolSize`` each, and closed after
+``IDLE_TIMEOUT``. Results are streamed in fixed-size batches through server-side
+cursors, or the driver's unbuffered equivalent, so a sync never holds a
+whole result set in memory.
+
+CSV and Excel sources are read through ``files``; they have no pool and no
+SQL, but share ``read_frames``, which is what syncs consume.
+
+Drivers are imported when a source first connects; only the ones for the
+source types in use need to be installed.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from . import files
+from .models import DataSourceType
+from .slots import LeaseHeartbeat, get_sync_slots
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 30  # seconds, for connecting and for waiting on a busy pool
+BATCH_SIZE = 5000
+# Idle pooled connections older than this are closed instead of reused
+IDLE_TIMEOUT = 300
+# Table and column names accepted by quote_name, per dotted part
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
+# Lease of a shared connection slot, renewed while the connection is out
+SLOT_LEASE_SECONDS = 120
+# Seconds between asks for a shared slot while all are taken
+SLOT_POLL_SECONDS = 0.1
+# Stands in for placeholders in SQL built before the driver's are known, see SQLConnector.bind
+MARKER = '\x00'
+
+
+class ConnectorError(Exception):
+    pass
+
+
+class SourceBusy(ConnectorError):
+    """Every connection of the source's pool stayed in use for the whole timeout"""
+
+
+def stable_text(values):
+    """
+    A Series of ``values`` as strings that do not depend on the dtype pandas
+    inferred for the batch: integral floats lose their ``.0`` and every kind
+    of missing value is ``None``. A NULL turns a batch's integer column into
+    floats, so 5 and 5.0 must compare (and hash) equal.
+    """
+    missing = values.isna().to_numpy()
+    text = values.astype(str).to_numpy(dtype=object)
+    if pd.api.types.is_float_dtype(values.dtype):
+        numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            integral = ~missing & (np.mod(numbers, 1) == 0) & (np.abs(numbers) < 2 ** 63)
+        text[integral] = numbers[integral].astype(np.int64).astype(str)
+    text[missing] = None
+    return pd.Series(text, index=values.index, name=values.name, dtype=object)
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    At most ``size`` connections, checked out one caller at a time. With a
+    ``slot_name``, each checkout also holds one of ``size`` slots of that
+    name shared by all processes.
+    """
+
+    def __init__(self, connect, size, timeout, slot_name=None):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.slot_name = slot_name
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = deque()  # (connection, returned at)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise SourceBusy(f'All {self.size} connections are busy.')
+        try:
+            with self._shared_slot(deadline):
+                connection = self._checkout()
+                broken = False
+                try:
+                    yield connection
+                except Exception:
+                    broken = True
+                    raise
+                finally:
+                    self._checkin(connection, broken)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def _shared_slot(self, deadline):
+        if self.slot_name is None:
+            yield
+            return
+        slots = get_sync_slots()
+        token = slots.acquire(self.slot_name, self.size, SLOT_LEASE_SECONDS)
+        while token is None:
+            if time.monotonic() >= deadline:
+                raise SourceBusy(f'All {self.size} connections are busy across processes.')
+            time.sleep(SLOT_POLL_SECONDS)
+            token = slots.acquire(self.slot_name, self.size, SLOT_LEASE_SECONDS)
+        heartbeat = LeaseHeartbeat(slots, [(self.slot_name, token)], SLOT_LEASE_SECONDS)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            heartbeat.stop()
+            slots.release(self.slot_name, token)
+
+    def _checkout(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                connection, returned_at = self._idle.pop()
+                if now - returned_at < IDLE_TIMEOUT:
+                    return connection
+                _close(connection)
+        return self._connect()
+
+    def _checkin(self, connection, broken):
+        if not broken:
+            try:
+                # Ends the read transaction and any server-side cursor left open
+                connection.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            _close(connection)
+            return
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                _close(self._idle.pop()[0])
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(connector):
+    """The process-wide pool of a source; replaced when its type or config changes"""
+    source = connector.source
+    fingerprint = hashlib.sha1(
+        json.dumps([source.source_type, source.config], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    with _pools_lock:
+        pool, current = _pools.get(source.pk, (None, None))
+        if pool is None or current != fingerprint:
+            if pool is not None:
+                pool.close()
+            pool = ConnectionPool(
+                connector.connect, connector.pool_size, connector.timeout, slot_name=f'connections:{source.pk}'
+            )
+            _pools[source.pk] = (pool, fingerprint)
+        return pool
+
+
+def discard_pool(source_id):
+    with _pools_lock:
+        pool, _ = _pools.pop(source_id, (None, None))
+    if pool is not None:
+        pool.close()
+
+
+class SQLConnector:
+    """
+    Base for DB-API sources. Subclasses implement ``connect`` and may
+    override ``open_cursor`` to return a server-side cursor. Query
+    parameters use the driver's ``paramstyle``.
+    """
+    # ``read_frames`` honours ``order_by``
+    ordered = True
+    paramstyle = 'format'
+    quote_template = '"{}"'
+    ping_sql = 'SELECT 1'
+    # (schema, table, column, type, nullable) for every user table column
+    columns_sql = """
+        SELECT table_schema, table_name, column_name, data_type, is_nullable = 'YES'
+        FROM information_schema.columns
+        WHERE table_schema NOT IN ('information_schema', 'pg_catalog', 'mysql', 'performance_schema', 'sys')
+        ORDER BY table_schema, table_name, ordinal_position
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.config = source.config or {}
+
+    @property
+    def pool_size(self):
+        return max(1, int(self.config.get('poolSize') or DEFAULT_POOL_SIZE))
+
+    @property
+    def timeout(self):
+        return int(self.config.get('timeout') or DEFAULT_TIMEOUT)
+
+    def connect(self):
+        raise NotImplementedError
+
+    def quote_name(self, name):
+        """Quote a possibly schema-qualified identifier, rejecting anything else"""
+        parts = name.split('.')
+        if not all(IDENTIFIER.match(part) for part in parts):
+            raise ConnectorError(f'Invalid identifier: {name}')
+        return '.'.join(self.quote_template.format(part) for part in parts)
+
+    def placeholders(self, values):
+        """``(placeholders, params)`` binding ``values`` in the driver's paramstyle"""
+        if self.paramstyle == 'named':
+            return [f':p{index}' for index in range(len(values))], {f'p{index}': value for index, value in enumerate(values)}
+        marker = '?' if self.paramstyle == 'qmark' else '%s'
+        return [marker] * len(values), list(values)
+
+    def bind(self, sql, values):
+        """``(sql, params)`` with each ``MARKER`` in ``sql`` bound to the next of ``values``"""
+        markers, params = self.placeholders(values)
+        pieces = sql.split(MARKER)
+        if self.paramstyle == 'format':
+            pieces = [piece.replace('%', '%%') for piece in pieces]
+        return ''.join(piece + marker for piece, marker in zip(pieces, markers + [''])), params
+
+    def open_cursor(self, connection, batch_size):
+        cursor = connection.cursor()
+        cursor.arraysize = batch_size
+        return cursor
+
+    def pool(self):
+        return get_pool(self)
+
+    def stream(self, sql, params=None, batch_size=BATCH_SIZE):
+        """
+        Run ``sql`` and yield ``(columns, rows)`` batches of at most
+        ``batch_size`` rows; at least one batch, empty if there are no rows.
+        """
+        with self.pool().connection() as connection:
+            cursor = self.open_cursor(connection, batch_size)
+            try:
+                cursor.execute(sql, params or ())
+                columns = None
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    # Named cursors only describe the result after the first fetch
+                    if columns is None:
+                        columns = [column[0] for column in cursor.description or ()]
+                    elif not rows:
+                        break
+                    yield columns, rows
+                    if len(rows) < batch_size:
+                        break
+            finally:
+                cursor.close()
+
+    def read_frames(self, table, order_by=(), since=None, batch_size=BATCH_SIZE):
+        """
+        Yield ``table`` as DataFrames of at most ``batch_size`` rows, ordered
+        by ``order_by``; with ``since`` as ``(column, value)``, only the rows
+        where that column is at least ``value``.
+        """
+        sql, params = f'SELECT * FROM {self.quote_name(table)}', None
+        if since is not None:
+            markers, params = self.placeholders([since[1]])
+            sql += f' WHERE {self.quote_name(since[0])} >= {markers[0]}'
+        if order_by:
+            sql += ' ORDER BY ' + ', '.join(self.quote_name(column) for column in order_by)
+        for columns, rows in self.stream(sql, params, batch_size):
+            if rows:
+                yield pd.DataFrame.from_records(rows, columns=columns)
+
+    def query(self, sql, params=None, limit=None):
+        """``(columns, rows)`` of ``sql``, stopping after ``limit`` rows"""
+        columns, result = [], []
+        batch_size = min(limit, BATCH_SIZE) if limit else BATCH_SIZE
+        for columns, rows in self.stream(sql, params, batch_size):
+            result.extend(rows)
+            if limit and len(result) >= limit:
+                del result[limit:]
+                break
+        return columns, [list(row) for row in result]
+
+    def test(self):
+        with self.pool().connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(self.ping_sql)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def introspect(self):
+        """Tables of the source with their columns, shaped like the frontend ``DataTable``"""
+        tables = {}
+        for _, rows in self.stream(self.columns_sql):
+            for schema, table, column, data_type, nullable in rows:
+                entry = tables.setdefault((schema, table), {'name': table, 'schema': schema, 'columns': []})
+                entry['columns'].append({'name': column, 'type': str(data_type).lower(), 'nullable': bool(nullable)})
+        return list(tables.values())
+
+
+class PostgreSQLConnector(SQLConnector):
+    default_port = 5432
+
+    def connect(self):
+        import psycopg2
+
+        if self.config.get('connectionString'):
+            return psycopg2.connect(self.config['connectionString'], connect_timeout=self.timeout)
+        return psycopg2.connect(
+            host=self.config.get('host'), port=self.config.get('port') or self.default_port,
+            dbname=self.config.get('database'), user=self.config.get('username'),
+            password=self.config.get('password'), connect_timeout=self.timeout,
+            sslmode='require' if self.config.get('ssl') else 'prefer',
+        )
+
+    def open_cursor(self, connection, batch_size):
+        # A named cursor is a server-side cursor: rows are fetched itersize at a time
+        cursor = connection.cursor(name=f'ds_{uuid.uuid4().hex}')
+        cursor.itersize = batch_size
+        return cursor
+
+
+class RedshiftConnector(PostgreSQLConnector):
+    default_port = 5439
+
+
+class MySQLConnector(SQLConnector):
+    quote_template = '`{}`'
+
+    def connect(self):
+        import pymysql
+        import pymysql.cursors
+
+        return pymysql.connect(
+            host=self.config.get('host'), port=int(self.config.get('port') or 3306),
+            database=self.config.get('database'), user=self.config.get('username'),
+            password=self.config.get('password') or '', connect_timeout=self.timeout,
+            ssl={} if self.config.get('ssl') else None,
+            # Unbuffered: rows are read from the socket as they are fetched
+            cursorclass=pymysql.cursors.SSCursor,
+        )
+
+
+class SQLServerConnector(SQLConnector):
+    paramstyle = 'qmark'
+    quote_template = '[{}]'
+    columns_sql = """
+        SELECT table_schema, table_name, column_name, data_type,
+               CASE WHEN is_nullable = 'YES' THEN 1 ELSE 0 END
+        FROM information_schema.columns
+        ORDER BY table_schema, table_name, ordinal_position
+    """
+
+    def connect(self):
+        import pyodbc
+
+        connection_string = self.config.get('connectionString') or ';'.join([
+            'DRIVER={ODBC Driver 18 for SQL Server}',
+            f"SERVER={self.config.get('host')},{self.config.get('port') or 1433}",
+            f"DATABASE={self.config.get('database')}",
+            f"UID={self.config.get('username')}",
+            f"PWD={self.config.get('password')}",
+            f"Encrypt={'yes' if self.config.get('ssl') else 'no'}",
+        ])
+        return pyodbc.connect(connection_string, timeout=self.timeout)
+
+
+class OracleConnector(SQLConnector):
+    paramstyle = 'named'
+    ping_sql = 'SELECT 1 FROM dual'
+    columns_sql = """
+        SELECT owner, table_name, column_name, data_type, CASE WHEN nullable = 'Y' THEN 1 ELSE 0 END
+        FROM all_tab_columns
+        WHERE owner = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA')
+        ORDER BY owner, table_name, column_id
+    """
+
+    def connect(self):
+        import oracledb
+
+        dsn = self.config.get('tnsName') or self.config.get('connectionString') or oracledb.makedsn(
+            self.config.get('host'), self.config.get('port') or 1521,
+            service_name=self.config.get('serviceName'), sid=self.config.get('sid'),
+        )
+        return oracledb.connect(user=self.config.get('username'), password=self.config.get('password'), dsn=dsn)
+
+    def open_cursor(self, connection, batch_size):
+        cursor = connection.cursor()
+        cursor.arraysize = cursor.prefetchrows = batch_size
+        return cursor
+
+
+class SQLiteConnector(SQLConnector):
+    """A local database file; useful as a stand-in for a server in development"""
+    paramstyle = 'qmark'
+    columns_sql = None
+
+    def connect(self):
+        import sqlite3
+
+        return sqlite3.connect(self.config.get('database') or ':memory:', timeout=self.timeout, check_same_thread=False)
+
+    def introspect(self):
+        _, table_names = self.query("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        tables = []
+        for (name,) in table_names:
+            _, columns = self.query(f'PRAGMA table_info("{name}")')
+            tables.append({
+                'name': name, 'schema': 'main',
+                'columns': [
+                    {'name': column, 'type': data_type.lower(), 'nullable': not not_null}
+                    for _, column, data_type, not_null, _, _ in columns
+                ],
+            })
+        return tables
+
+
+class FileConnector:
+    """
+    Base for file sources. Files are read in file order, so ``order_by`` is
+    ignored and ``since`` is applied to each frame as it is read. ``progress``
+    is the fraction of the file read so far.
+    """
+    ordered = False
+
+    def __init__(self, source):
+        self.source = source
+        self.config = source.config or {}
+        self.progress = None
+
+    def reader(self, table=None):
+        raise NotImplementedError
+
+    def read_frames(self, table=None, order_by=(), since=None, batch_size=BATCH_SIZE):
+        try:
+            reader = self.reader(table)
+            for frame in reader.frames(batch_size):
+                self.progress = reader.progress
+                if since is not None:
+                    lookup = {str(column).lower(): column for column in frame.columns}
+                    if since[0].lower() not in lookup:
+                        raise ConnectorError(f'Column {since[0]} is not in the source file.')
+                    frame = frame[frame[lookup[since[0].lower()]] >= since[1]]
+                if len(frame):
+                    yield frame
+        except (OSError, ValueError, TypeError) as exc:
+            raise ConnectorError(str(exc))
+
+    def query(self, sql, params=None, limit=None):
+        raise ConnectorError('File sources cannot be queried with SQL; preview them with a sync job.')
+
+    def test(self):
+        try:
+            self.reader().sample(1)
+        except (OSError, ValueError) as exc:
+            raise ConnectorError(str(exc))
+
+    def introspect(self):
+        try:
+            reader = self.reader()
+            schema = reader.schema()
+        except (OSError, ValueError) as exc:
+            raise ConnectorError(str(exc))
+        return [{
+            'name': reader.name,
+            'columns': [{'name': column, 'type': data_type, 'nullable': True} for column, data_type, _ in schema],
+        }]
+
+
+class CSVConnector(FileConnector):
+    def reader(self, table=None):
+        return files.CSVReader(
+            files.resolve_path(self.config.get('filePath')),
+            delimiter=self.config.get('delimiter') or ',',
+            has_headers=self.config.get('hasHeaders', True),
+            encoding=self.config.get('encoding') or 'utf-8',
+        )
+
+
+class ExcelConnector(FileConnector):
+    def reader(self, table=None):
+        """``table`` names the sheet; defaults to ``sheetName``, else the active sheet"""
+        return files.ExcelReader(
+            files.resolve_path(self.config.get('filePath')),
+            sheet_name=table or self.config.get('sheetName') or None,
+            has_headers=self.config.get('hasHeaders', True),
+        )
+
+
+CONNECTORS = {
+    DataSourceType.POSTGRESQL: PostgreSQLConnector,
+    DataSourceType.REDSHIFT: RedshiftConnector,
+    DataSourceType.MYSQL: MySQLConnector,
+    DataSourceType.SQL_SERVER: SQLServerConnector,
+    DataSourceType.ORACLE: OracleConnector,
+    DataSourceType.SQLITE: SQLiteConnector,
+    DataSourceType.CSV_FILE: CSVConnector,
+    DataSourceType.EXCEL_FILE: ExcelConnector,
+}
+
+
+def get_connector(source):
+    try:
+        return CONNECTORS[source.source_type](source)
+    except KeyError:
+        raise ConnectorError(f'{source.get_source_type_display()} sources are not supported yet.')
@@ -0,0 +1,182 @@
+"""
+Reading CSV and Excel file sources.
+
+CSVs are memory-mapped and parsed by pandas in fixed-size chunks; Excel
+workbooks are read row by row with openpyxl in read-only mode. Column types
+are inferred once from a bounded sample at the top of the file and imposed on
+every chunk, so a column cannot change type from one chunk to the next (an
+integer column with blanks further down stays a nullable integer instead of
+turning into floats). A column blank throughout the sample is read as
+strings. Files live under ``settings.DATA_SOURCE_FILE_ROOT``.
+"""
+import itertools
+import mmap
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from pandas.api import types
+
+SAMPLE_ROWS = 10000
+
+
+def resolve_path(file_path):
+    root = Path(settings.DATA_SOURCE_FILE_ROOT).resolve()
+    path = (root / (file_path or '')).resolve()
+    if root not in path.parents:
+        raise ValueError('Data source files must be inside DATA_SOURCE_FILE_ROOT.')
+    if not path.is_file():
+        raise ValueError(f'File not found: {file_path}')
+    return path
+
+
+def _column_type(series):
+    """``(DataType value, pandas dtype)`` of a sampled column"""
+    values = series.dropna()
+    if not len(values):
+        # A column blank throughout the sample is sampled as floats; its type is unknown
+        return 'string', 'object'
+    if types.is_bool_dtype(series):
+        return 'boolean', 'boolean'
+    if types.is_integer_dtype(series):
+        return 'integer', 'Int64'
+    if types.is_float_dtype(series):
+        # Integers with blanks are sampled as floats
+        if (values == values.round()).all():
+            return 'integer', 'Int64'
+        return 'decimal', 'Float64'
+    if types.is_datetime64_any_dtype(series):
+        return 'datetime', 'datetime'
+    if values.map(lambda value: isinstance(value, str)).all():
+        try:
+            pd.to_datetime(values, format='ISO8601')
+            return 'datetime', 'datetime'
+        except (ValueError, TypeError):
+            pass
+    return 'string', 'object'
+
+
+def infer_schema(sample):
+    """``[(column, DataType value, pandas dtype)]`` of a sample frame"""
+    return [(str(column), *_column_type(sample[column])) for column in sample.columns]
+
+
+def apply_schema(frame, schema):
+    """Cast ``frame`` to the sampled ``schema``; values that do not fit raise ``ValueError``"""
+    try:
+        for column, _, dtype in schema:
+            if dtype == 'datetime':
+                frame[column] = pd.to_datetime(frame[column], format='ISO8601')
+            elif dtype != 'object':
+                frame[column] = frame[column].astype(dtype)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(
+            f'Column {column} does not match the type inferred from the first {SAMPLE_ROWS} rows: {exc}'
+        )
+    return frame
+
+
+class CSVReader:
+    def __init__(self, path, delimiter=',', has_headers=True, encoding='utf-8'):
+        self.path = path
+        self.name = path.stem
+        self.delimiter = delimiter or ','
+        self.has_headers = has_headers
+        self.encoding = encoding
+        self.progress = None  # fraction of the file parsed
+
+    def _options(self):
+        return {'sep': self.delimiter, 'header': 0 if self.has_headers else None, 'encoding': self.encoding}
+
+    def sample(self, rows=SAMPLE_ROWS):
+        sample = pd.read_csv(self.path, nrows=rows, **self._options())
+        if not self.has_headers:
+            sample.columns = [f'column_{index + 1}' for index in range(len(sample.columns))]
+        return sample
+
+    def schema(self):
+        return infer_schema(self.sample())
+
+    def frames(self, batch_size):
+        schema = self.schema()
+        options = {
+            **self._options(),
+            'names': [column for column, _, _ in schema],
+            'dtype': {column: 'object' if dtype == 'datetime' else dtype for column, _, dtype in schema},
+        }
+        with open(self.path, 'rb') as handle:
+            if not handle.seek(0, 2):
+                return  # mmap cannot map an empty file
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                try:
+                    for frame in pd.read_csv(mapped, chunksize=batch_size, **options):
+                        self.progress = mapped.tell() / len(mapped)
+                        yield apply_schema(frame, schema)
+                except (ValueError, TypeError) as exc:
+                    raise ValueError(
+                        f'{self.path.name} does not match the types inferred from its first {SAMPLE_ROWS} rows: {exc}'
+                    )
+        self.progress = 1.0
+
+
+class ExcelReader:
+    def __init__(self, path, sheet_name=None, has_headers=True):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.name = sheet_name or path.stem
+        self.has_headers = has_headers
+        self.progress = None  # fraction of the sheet's rows read
+
+    def _rows(self):
+        """Yields ``(columns, sheet rows or None)``, then every non-blank row"""
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[self.sheet_name] if self.sheet_name else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            first = next(rows, None) or ()
+            if self.has_headers:
+                columns = [str(value) if value is not None else f'column_{index + 1}' for index, value in enumerate(first)]
+            else:
+                columns = [f'column_{index + 1}' for index in range(len(first))]
+                rows = itertools.chain([first], rows)
+            yield columns, sheet.max_row
+            for row in rows:
+                if any(value is not None for value in row):
+                    yield row
+        finally:
+            workbook.close()
+
+    def _frame(self, columns, rows):
+        return pd.DataFrame.from_records([row[:len(columns)] for row in rows], columns=columns)
+
+    def sample(self, rows=SAMPLE_ROWS):
+        reader = self._rows()
+        columns, _ = next(reader)
+        sample = []
+        for row in reader:
+            sample.append(row)
+            if len(sample) >= rows:
+                break
+        reader.close()
+        return self._frame(columns, sample)
+
+    def schema(self):
+        return infer_schema(self.sample())
+
+    def frames(self, batch_size):
+        schema = self.schema()
+        reader = self._rows()
+        columns, total = next(reader)
+        read, batch = 0, []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                read += len(batch)
+                self.progress = min(read / total, 1.0) if total else None
+                yield apply_schema(self._frame(columns, batch), schema)
+                batch = []
+        if batch:
+            yield apply_schema(self._frame(columns, batch), schema)
+        self.progress = 1.0
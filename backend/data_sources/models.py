@@ -0,0 +1,286 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class DataSourceType(models.TextChoices):
+    OLAP = 'olap', 'OLAP Cube'
+    ORACLE = 'oracle', 'Oracle'
+    SQL_SERVER = 'sql_server', 'SQL Server'
+    MYSQL = 'mysql', 'MySQL'
+    POSTGRESQL = 'postgresql', 'PostgreSQL'
+    SQLITE = 'sqlite', 'SQLite'
+    MONGODB = 'mongodb', 'MongoDB'
+    REST_API = 'rest_api', 'REST API'
+    CSV_FILE = 'csv_file', 'CSV File'
+    EXCEL_FILE = 'excel_file', 'Excel File'
+    SNOWFLAKE = 'snowflake', 'Snowflake'
+    REDSHIFT = 'redshift', 'Redshift'
+    BIGQUERY = 'bigquery', 'BigQuery'
+    POWER_BI = 'power_bi', 'Power BI'
+    TABLEAU = 'tableau', 'Tableau'
+    LOOKER = 'looker', 'Looker'
+
+
+class DataConnection(models.Model):
+    """
+    An external data source, as ``DataConnection`` on the frontend.
+
+    ``config`` holds the frontend's ``DataSourceConfig`` (``host``, ``port``,
+    ``database``, ``username``, ``password``, ``poolSize``, ``timeout``...).
+    """
+    STATUS_CHOICES = [
+        ('connected', 'Connected'),
+        ('disconnected', 'Disconnected'),
+        ('error', 'Error'),
+        ('connecting', 'Connecting'),
+    ]
+
+    name = models.CharField(max_length=200)
+    source_type = models.CharField(max_length=20, choices=DataSourceType.choices)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='disconnected')
+    config = models.JSONField(default=dict, blank=True)
+    description = models.TextField(blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    last_sync = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='data_connections'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_source_type_display()})"
+
+
+class DataSchema(models.Model):
+    """Introspected tables and columns of a connection, as ``DataSchema`` on the frontend"""
+    connection = models.OneToOneField(DataConnection, on_delete=models.CASCADE, related_name='schema')
+    tables = models.JSONField(default=list, blank=True)
+    relationships = models.JSONField(default=list, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Schema of {self.connection.name}"
+
+
+class DataQuery(models.Model):
+    """
+    A saved query against a connection, as ``DataQuery`` on the frontend.
+
+    ``sql`` may reference ``parameters`` by name as ``:name``; ``filters``
+    (``column``, ``operator``, ``value``, ``logicalOperator``) are applied
+    on top of its result. Results are cached, see ``data_sources.query_cache``.
+    """
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    connection = models.ForeignKey(DataConnection, on_delete=models.CASCADE, related_name='queries')
+    sql = models.TextField(blank=True)
+    mdx = models.TextField(blank=True)  # OLAP sources
+    filters = models.JSONField(default=list, blank=True)
+    parameters = models.JSONField(default=list, blank=True)  # name, type, defaultValue, required
+    result_columns = models.JSONField(default=list, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='data_queries'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'Data queries'
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.connection.name})"
+
+
+class DataSyncJob(models.Model):
+    """
+    Copies one table of a connection into ``SyncedRow`` rows, as
+    ``DataSyncJob`` on the frontend.
+
+    Incremental jobs with an ``incremental_column`` (a timestamp or
+    monotonically increasing key) pull only rows at or after the stored
+    ``watermark``. Incremental jobs without one detect changes by hashing
+    chunks of rows; full jobs rewrite every row. See ``data_sources.sync``.
+    """
+    SCHEDULE_CHOICES = [
+        ('manual', 'Manual'),
+        ('hourly', 'Hourly'),
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+    STATUS_CHOICES = [
+        ('scheduled', 'Scheduled'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    SYNC_MODE_CHOICES = [
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+    ]
+
+    name = models.CharField(max_length=200)
+    connection = models.ForeignKey(DataConnection, on_delete=models.CASCADE, related_name='sync_jobs')
+    source_table = models.CharField(max_length=200)
+    target_table = models.CharField(max_length=200, blank=True)
+    key_columns = models.JSONField(default=list)  # identify a row for upserts
+    sync_mode = models.CharField(max_length=20, choices=SYNC_MODE_CHOICES, default='incremental')
+    incremental_column = models.CharField(max_length=200, blank=True)
+    schedule_type = models.CharField(max_length=20, choices=SCHEDULE_CHOICES, default='manual')
+    schedule_config = models.JSONField(default=dict, blank=True)  # hour, minute, dayOfWeek, dayOfMonth
+    config = models.JSONField(default=dict, blank=True)  # batchSize, timeout, retryAttempts
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
+    # High-water mark of incremental_column: {'type': ..., 'value': ...}
+    watermark = models.JSONField(null=True, blank=True)
+    last_run = models.DateTimeField(null=True, blank=True)
+    next_run = models.DateTimeField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='data_sync_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.connection.name}.{self.source_table})"
+
+
+class DataSyncRun(models.Model):
+    """One execution of a sync job and what it moved"""
+    job = models.ForeignKey(DataSyncJob, on_delete=models.CASCADE, related_name='runs')
+    status = models.CharField(max_length=20, choices=DataSyncJob.STATUS_CHOICES, default='running')
+    sync_mode = models.CharField(max_length=20)
+    rows_read = models.PositiveBigIntegerField(default=0)
+    rows_written = models.PositiveBigIntegerField(default=0)
+    rows_deleted = models.PositiveBigIntegerField(default=0)
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_changed = models.PositiveIntegerField(default=0)
+    watermark_from = models.JSONField(null=True, blank=True)
+    watermark_to = models.JSONField(null=True, blank=True)
+    progress = models.FloatField(null=True, blank=True)  # percent of the source read, where known
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.job.name} at {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class SyncChunk(models.Model):
+    """Hash of one chunk of source rows, for change detection without a watermark"""
+    job = models.ForeignKey(DataSyncJob, on_delete=models.CASCADE, related_name='chunks')
+    first_key = models.TextField()
+    row_count = models.PositiveIntegerField()
+    digest = models.CharField(max_length=32)
+    synced_at = models.DateTimeField()  # last run that saw the chunk
+
+    class Meta:
+        unique_together = ['job', 'first_key']
+
+
+class SyncedRow(models.Model):
+    """A source row copied by a sync job, upserted by key"""
+    job = models.ForeignKey(DataSyncJob, on_delete=models.CASCADE, related_name='rows')
+    key = models.TextField()
+    data = models.JSONField()
+    row_hash = models.BigIntegerField()
+    chunk = models.TextField(blank=True)  # first_key of its SyncChunk, for hash-based jobs
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['job', 'key']
+        indexes = [models.Index(fields=['job', 'chunk']), models.Index(fields=['job', 'synced_at'])]
+
+
+class DataQualityCheck(models.Model):
+    """
+    Rules checked against one table of a connection, as ``DataQualityCheck``
+    on the frontend.
+
+    ``rules`` are ``{'type', 'config', 'severity'}``; a rule checks
+    ``config['column']``, else the check's ``column``. See
+    ``data_sources.quality`` for the rule types and how they run.
+    """
+    CHECK_TYPE_CHOICES = [
+        ('completeness', 'Completeness'),
+        ('uniqueness', 'Uniqueness'),
+        ('validity', 'Validity'),
+        ('consistency', 'Consistency'),
+        ('accuracy', 'Accuracy'),
+    ]
+    STATUS_CHOICES = [
+        ('passed', 'Passed'),
+        ('failed', 'Failed'),
+        ('warning', 'Warning'),
+        ('not_run', 'Not run'),
+    ]
+
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    connection = models.ForeignKey(DataConnection, on_delete=models.CASCADE, related_name='quality_checks')
+    table = models.CharField(max_length=200)
+    column = models.CharField(max_length=200, blank=True)
+    check_type = models.CharField(max_length=20, choices=CHECK_TYPE_CHOICES, default='validity')
+    rules = models.JSONField(default=list)
+    schedule = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='not_run')
+    last_run = models.DateTimeField(null=True, blank=True)
+    score = models.FloatField(null=True, blank=True)  # percent of checked values that passed
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='data_quality_checks'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.connection.name}.{self.table})"
+
+
+class QualityRuleResult(models.Model):
+    """Outcome of one rule of a check in one evaluation"""
+    quality_check = models.ForeignKey(DataQualityCheck, on_delete=models.CASCADE, related_name='results')
+    # The sync run whose rows were checked; empty when the check ran on its own
+    sync_run = models.ForeignKey(
+        DataSyncRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='quality_results'
+    )
+    rule_index = models.PositiveSmallIntegerField()
+    rule_type = models.CharField(max_length=20)
+    severity = models.CharField(max_length=10)
+    column = models.CharField(max_length=200)
+    rows_checked = models.PositiveBigIntegerField(default=0)
+    rows_failed = models.PositiveBigIntegerField(default=0)
+    samples = models.JSONField(default=list, blank=True)  # a few offending rows
+    pushed_down = models.BooleanField(default=False)  # evaluated by the source in SQL
+    error = models.TextField(blank=True)
+    checked_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-checked_at', 'rule_index']
+        indexes = [models.Index(fields=['quality_check', '-checked_at'])]
+
+    def __str__(self):
+        return f"{self.quality_check.name} rule {self.rule_index}: {self.rows_failed}/{self.rows_checked} failed"
@@ -0,0 +1,310 @@
+"""
+Data quality checks.
+
+Rules are evaluated over DataFrames with vectorized pandas and NumPy
+operations, a batch at a time, keeping only counts, a few sample rows and
+(for ``unique``) the hashes of the values seen so far:
+
+- During a sync, every active check on the job's table is shown each batch
+  the sync reads, so checking adds no second pass over the data. Incremental
+  runs check the rows they read.
+- Run on their own, checks on SQL sources push ``not_null``, ``unique``,
+  ``range`` and ``referential`` rules down to the source as a single
+  aggregate query, plus a query for samples of each rule that failed. Other
+  rules, and every rule on file sources, share one streamed read of the table.
+
+Rule types and their ``config``:
+
+- ``not_null``
+- ``unique``: every occurrence of a non-null value after its first fails
+- ``range``: inclusive ``min`` and/or ``max``, numbers or ISO dates; values
+  that are not comparable fail
+- ``pattern``: a ``regex`` the whole value must match
+- ``referential``: ``reference_table`` and ``reference_column`` of the same
+  source, in which every non-null value must appear
+
+A rule that cannot be evaluated (a missing column, a bad regex) records its
+error instead of failing the sync.
+"""
+import json
+import logging
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from .connectors import MARKER, BATCH_SIZE, ConnectorError, SourceBusy, SQLConnector, get_connector, stable_text
+from .models import DataQualityCheck, QualityRuleResult
+
+logger = logging.getLogger(__name__)
+
+RULE_TYPES = ['not_null', 'unique', 'range', 'pattern', 'referential']
+PUSHDOWN_TYPES = {'not_null', 'unique', 'range', 'referential'}
+SEVERITIES = ['error', 'warning', 'info']
+SAMPLE_SIZE = 5
+
+
+class HashSet:
+    """
+    Set of int64 hashes kept as sorted arrays whose sizes at least double
+    from newest to oldest, so membership is a few binary searches and
+    inserts are amortized merges.
+    """
+
+    def __init__(self):
+        self._levels = []
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for level in self._levels:
+            positions = np.minimum(np.searchsorted(level, hashes), len(level) - 1)
+            found |= level[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        if not len(hashes):
+            return
+        self._levels.append(np.unique(hashes))
+        while len(self._levels) > 1 and len(self._levels[-2]) < 2 * len(self._levels[-1]):
+            newest = self._levels.pop()
+            self._levels[-1] = np.union1d(self._levels[-1], newest)
+
+
+def _records(frame):
+    return json.loads(frame.to_json(orient='records', date_format='iso', double_precision=15, default_handler=str))
+
+
+def _column(frame, name):
+    lookup = {str(column).lower(): column for column in frame.columns}
+    try:
+        return frame[lookup[name.lower()]]
+    except KeyError:
+        raise ConnectorError(f'Column {name} is not in the source table.')
+
+
+def _comparable(values, bound):
+    """``values`` and ``bound`` as numbers, or as UTC timestamps when ``bound`` is not a number"""
+    if isinstance(bound, (int, float)):
+        return pd.to_numeric(values, errors='coerce'), bound
+    return pd.to_datetime(values, errors='coerce', utc=True, format='ISO8601'), pd.to_datetime(bound, utc=True)
+
+
+def reference_values(connector, table, column):
+    """Distinct non-null values of ``table.column``, read once per evaluation"""
+    if isinstance(connector, SQLConnector):
+        column_sql = connector.quote_name(column)
+        values = [
+            row[0] for _, rows in connector.stream(
+                f'SELECT DISTINCT {column_sql} FROM {connector.quote_name(table)} WHERE {column_sql} IS NOT NULL'
+            ) for row in rows
+        ]
+        return pd.Index(values)
+    frames = [_column(frame, column).dropna() for frame in connector.read_frames(table)]
+    return pd.Index(pd.concat(frames).unique() if frames else [])
+
+
+class RuleCheck:
+    """Running counts of one rule of a check over the batches it is shown"""
+
+    def __init__(self, check, index, rule, connector):
+        self.check = check
+        self.index = index
+        self.type = rule.get('type')
+        self.config = rule.get('config') or {}
+        self.severity = rule.get('severity') or 'error'
+        self.column = self.config.get('column') or check.column
+        self.connector = connector
+        self.rows_checked = self.rows_failed = 0
+        self.samples = []
+        self.pushed_down = False
+        self.error = '' if self.column else 'The rule has no column.'
+        self._seen = HashSet()
+        self._references = None
+
+    def add(self, frame):
+        if self.error:
+            return
+        try:
+            failed = self._failures(_column(frame, self.column))
+        except (ConnectorError, KeyError, ValueError, TypeError, re.error) as exc:
+            self.error = str(exc)
+            return
+        self.rows_checked += len(frame)
+        count = int(failed.sum())
+        self.rows_failed += count
+        if count and len(self.samples) < SAMPLE_SIZE:
+            self.samples += _records(frame[failed].head(SAMPLE_SIZE - len(self.samples)))
+
+    def _failures(self, values):
+        """Boolean array of the rows of ``values`` that break the rule"""
+        if self.type == 'not_null':
+            return values.isna().to_numpy()
+        present = values.notna().to_numpy()
+        failed = np.zeros(len(values), dtype=bool)
+        if self.type == 'unique':
+            # Hashed as text, so 5 in one batch and 5.0 in another are duplicates
+            hashes = pd.util.hash_pandas_object(stable_text(values[present]), index=False).to_numpy().view(np.int64)
+            failed[present] = pd.Series(hashes).duplicated().to_numpy() | self._seen.contains(hashes)
+            self._seen.add(hashes)
+        elif self.type == 'range':
+            for bound, outside in ((self.config.get('min'), operator.lt), (self.config.get('max'), operator.gt)):
+                if bound is None:
+                    continue
+                comparable, bound = _comparable(values, bound)
+                # Comparisons with missing values are False
+                beyond = outside(comparable, bound).fillna(False).to_numpy(dtype=bool)
+                failed |= present & (comparable.isna().to_numpy() | beyond)
+        elif self.type == 'pattern':
+            pattern = re.compile(self.config.get('regex') or '')
+            matched = values[present].astype(str).str.fullmatch(pattern)
+            failed[present] = ~matched.to_numpy(dtype=bool)
+        elif self.type == 'referential':
+            if self._references is None:
+                self._references = reference_values(
+                    self.connector, self.config['reference_table'], self.config['reference_column']
+                )
+            failed[present] = ~values[present].isin(self._references).to_numpy()
+        else:
+            raise ValueError(f'Unknown rule type: {self.type}')
+        return failed
+
+
+def _rule_conditions(connector, rule):
+    """``(condition, values)`` selecting the rows ``rule`` fails in SQL, aliasing the table ``t``"""
+    column = f't.{connector.quote_name(rule.column)}'
+    if rule.type == 'not_null':
+        return f'{column} IS NULL', []
+    if rule.type == 'unique':
+        return (
+            f'{column} IN (SELECT {connector.quote_name(rule.column)} FROM {connector.quote_name(rule.check.table)} '
+            f'GROUP BY {connector.quote_name(rule.column)} HAVING COUNT(*) > 1)'
+        ), []
+    if rule.type == 'range':
+        conditions, values = [], []
+        for bound, comparison in ((rule.config.get('min'), '<'), (rule.config.get('max'), '>')):
+            if bound is not None:
+                conditions.append(f'{column} {comparison} {MARKER}')
+                values.append(bound)
+        return '(' + (' OR '.join(conditions) or '1 = 0') + ')', values
+    reference_table = connector.quote_name(rule.config['reference_table'])
+    reference_column = connector.quote_name(rule.config['reference_column'])
+    return (
+        f'{column} IS NOT NULL AND NOT EXISTS '
+        f'(SELECT 1 FROM {reference_table} r WHERE r.{reference_column} = {column})'
+    ), []
+
+
+def push_down(connector, rules):
+    """
+    Evaluate SQL-expressible ``rules`` in the source: one aggregate query,
+    then samples of failures. Rules the query cannot evaluate are left for
+    the streamed pass.
+    """
+    table = connector.quote_name(rules[0].check.table)
+    columns, _ = connector.query(f'SELECT * FROM {table}', limit=1)
+    columns = {str(column).lower() for column in columns}
+    selects, values, evaluated = ['COUNT(*)'], [], []
+    for rule in rules:
+        if rule.column.lower() not in columns:
+            rule.error = f'Column {rule.column} is not in the source table.'
+            continue
+        try:
+            if rule.type == 'unique':
+                # Occurrences after each value's first, as in RuleCheck
+                column = f't.{connector.quote_name(rule.column)}'
+                selects.append(f'COUNT({column}) - COUNT(DISTINCT {column})')
+            else:
+                condition, condition_values = _rule_conditions(connector, rule)
+                selects.append(f'SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)')
+                values += condition_values
+        except (ConnectorError, KeyError) as exc:
+            rule.error = f'Invalid rule: {exc}'
+            continue
+        evaluated.append(rule)
+    if not evaluated:
+        return
+    try:
+        _, [counts] = connector.query(*connector.bind(f'SELECT {", ".join(selects)} FROM {table} t', values))
+    except SourceBusy:
+        raise
+    except Exception as exc:
+        logger.warning('Quality check %s could not be pushed down: %s', rules[0].check.pk, exc)
+        return
+    for rule, failed in zip(evaluated, counts[1:]):
+        rule.pushed_down = True
+        rule.rows_checked, rule.rows_failed = counts[0], int(failed or 0)
+        if rule.rows_failed:
+            condition, condition_values = _rule_conditions(connector, rule)
+            columns, rows = connector.query(
+                *connector.bind(f'SELECT t.* FROM {table} t WHERE {condition}', condition_values), limit=SAMPLE_SIZE,
+            )
+            rule.samples = _records(pd.DataFrame.from_records(rows, columns=columns))
+
+
+def rule_checks(checks, connector):
+    return [
+        RuleCheck(check, index, rule, connector)
+        for check in checks for index, rule in enumerate(check.rules)
+    ]
+
+
+def save_results(rules, sync_run=None):
+    """Store the results of ``rules`` and update the status and score of their checks"""
+    now = timezone.now()
+    QualityRuleResult.objects.bulk_create([
+        QualityRuleResult(
+            quality_check=rule.check, sync_run=sync_run, rule_index=rule.index, rule_type=rule.type or '',
+            severity=rule.severity, column=rule.column or '', rows_checked=rule.rows_checked,
+            rows_failed=rule.rows_failed, samples=rule.samples, pushed_down=rule.pushed_down,
+            error=rule.error, checked_at=now,
+        )
+        for rule in rules
+    ])
+    checks = {}
+    for rule in rules:
+        checks.setdefault(rule.check.pk, (rule.check, []))[1].append(rule)
+    for check, check_rules in checks.values():
+        broken = {rule.severity for rule in check_rules if rule.rows_failed or rule.error}
+        check.status = 'failed' if 'error' in broken else 'warning' if 'warning' in broken else 'passed'
+        checked = sum(rule.rows_checked for rule in check_rules)
+        failed = sum(rule.rows_failed for rule in check_rules)
+        check.score = round(100 * (1 - failed / checked), 2) if checked else None
+        check.last_run = now
+        check.save(update_fields=['status', 'score', 'last_run', 'updated_at'])
+
+
+def run_check(check, batch_size=BATCH_SIZE):
+    """Evaluate ``check`` against its table now"""
+    connector = get_connector(check.connection)
+    rules = rule_checks([check], connector)
+    if isinstance(connector, SQLConnector):
+        pushable = [rule for rule in rules if rule.type in PUSHDOWN_TYPES and not rule.error]
+        if pushable:
+            push_down(connector, pushable)
+    remaining = [rule for rule in rules if not rule.pushed_down and not rule.error]
+    if remaining:
+        for frame in connector.read_frames(check.table, batch_size=batch_size):
+            for rule in remaining:
+                rule.add(frame)
+    save_results(rules)
+    return rules
+
+
+class QualityMonitor:
+    """The active checks on a sync job's table, shown each batch the sync reads"""
+
+    def __init__(self, job, connector):
+        checks = DataQualityCheck.objects.filter(
+            connection_id=job.connection_id, table__iexact=job.source_table, is_active=True
+        )
+        self.rules = rule_checks(checks, connector)
+
+    def add(self, frame):
+        for rule in self.rules:
+            rule.add(frame)
+
+    def finish(self, sync_run):
+        if self.rules:
+            save_results(self.rules, sync_run)
@@ -0,0 +1,94 @@
+"""
+Running saved ``DataQuery`` rows.
+
+Parameters are written ``:name`` in the query's SQL and bound through the
+driver, in its paramstyle; values missing from a request fall back to the
+parameter's ``defaultValue``. Filters wrap the query as a subquery, so they
+apply to its result columns.
+"""
+import re
+
+from .connectors import MARKER, ConnectorError, get_connector
+from .query_cache import get_query_cache
+
+# :name, but not the second colon of a PostgreSQL ::cast
+PARAMETER = re.compile(r'(?<!:):([A-Za-z_][A-Za-z0-9_]*)')
+
+COMPARISONS = {'equals': '=', 'not_equals': '<>', 'greater_than': '>', 'less_than': '<'}
+PATTERNS = {'contains': '%{}%', 'starts_with': '{}%', 'ends_with': '%{}'}
+
+
+def _parameter_values(query, values):
+    resolved = {}
+    for parameter in query.parameters:
+        name = parameter['name']
+        if name in values:
+            resolved[name] = values[name]
+        elif parameter.get('defaultValue') is not None:
+            resolved[name] = parameter['defaultValue']
+        elif parameter.get('required'):
+            raise ConnectorError(f'Parameter {name} is required.')
+        else:
+            resolved[name] = None
+    return resolved
+
+
+def _filter_condition(connector, data_filter):
+    """``(sql, values)`` of one frontend ``DataFilter``"""
+    column = connector.quote_name(data_filter['column'])
+    operator, value = data_filter.get('operator'), data_filter.get('value')
+    if operator in COMPARISONS:
+        return f'{column} {COMPARISONS[operator]} {MARKER}', [value]
+    if operator in PATTERNS:
+        return f'{column} LIKE {MARKER}', [PATTERNS[operator].format(value)]
+    if operator in ('in', 'not_in'):
+        if not isinstance(value, list) or not value:
+            raise ConnectorError(f'Filter on {data_filter["column"]} needs a list of values.')
+        negation = 'NOT ' if operator == 'not_in' else ''
+        return f'{column} {negation}IN ({", ".join([MARKER] * len(value))})', list(value)
+    if operator == 'between':
+        if not isinstance(value, list) or len(value) != 2:
+            raise ConnectorError(f'Filter on {data_filter["column"]} needs two values.')
+        return f'{column} BETWEEN {MARKER} AND {MARKER}', list(value)
+    raise ConnectorError(f'Unknown filter operator: {operator}')
+
+
+def build_sql(connector, query, values):
+    """``(sql, params)`` of ``query`` with ``values`` bound, in the connector's paramstyle"""
+    if not query.sql.strip():
+        raise ConnectorError('The query has no SQL.')
+    resolved = _parameter_values(query, values)
+    bound = []
+
+    def substitute(match):
+        if match.group(1) not in resolved:
+            raise ConnectorError(f'Unknown parameter: {match.group(1)}')
+        bound.append(resolved[match.group(1)])
+        return MARKER
+
+    sql = PARAMETER.sub(substitute, query.sql.strip().rstrip(';'))
+    if query.filters:
+        conditions = []
+        for index, data_filter in enumerate(query.filters):
+            condition, filter_values = _filter_condition(connector, data_filter)
+            if index:
+                conditions.append('OR' if data_filter.get('logicalOperator') == 'OR' else 'AND')
+            conditions.append(condition)
+            bound.extend(filter_values)
+        sql = f'SELECT * FROM ({sql}) filtered WHERE {" ".join(conditions)}'
+    return connector.bind(sql, bound)
+
+
+def run_query(query, values=None, limit=None, refresh=False):
+    """
+    ``(result, cached)`` of ``query``, where ``result`` has ``columns`` and
+    ``rows``; ``refresh`` skips the cached result and replaces it.
+    """
+    connector = get_connector(query.connection)
+    sql, params = build_sql(connector, query, values or {})
+
+    def execute():
+        columns, rows = connector.query(sql, params, limit=limit)
+        return {'columns': columns, 'rows': rows}
+
+    return get_query_cache().fetch(query.connection_id, sql, params, limit, execute, refresh=refresh)
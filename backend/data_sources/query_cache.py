@@ -0,0 +1,253 @@
+"""
+Result cache for ``DataQuery`` executions.
+
+Results are keyed by source, normalized SQL text (comments dropped and
+whitespace collapsed outside quoted strings), parameters and row limit, and
+stored as zlib-compressed JSON. The store is Redis in production, shared by
+all workers; while Redis cannot be reached, results are cached in a
+process-local store instead and Redis is retried every
+``REDIS_RETRY_SECONDS``. Both stores evict the least recently used results
+once their compressed size passes ``max_bytes``.
+
+Every key includes the source's generation number. Bumping it when one of the
+source's sync jobs completes, or its config changes, drops all of its results
+at once; they are evicted as they age out of the LRU. Hits and misses are
+counted per source.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .signals import sync_completed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+REDIS_RETRY_SECONDS = 30
+
+# Quoted strings are kept as they are; runs of comments and whitespace become one space
+SQL_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|(?:--[^\n]*|/\*.*?\*/|\s)+""", re.DOTALL)
+
+
+def normalize_sql(sql):
+    return SQL_TOKENS.sub(lambda match: match.group(1) or ' ', sql).strip().rstrip(';').strip()
+
+
+def result_key(source_id, generation, sql, params, limit):
+    fingerprint = json.dumps([normalize_sql(sql), params, limit], sort_keys=True, cls=DjangoJSONEncoder)
+    return f'{source_id}:{generation}:{hashlib.sha1(fingerprint.encode()).hexdigest()}'
+
+
+def encode(result):
+    return zlib.compress(json.dumps(result, cls=DjangoJSONEncoder).encode())
+
+
+def decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class LocalResultStore:
+    """Process-local store; the fallback while Redis is down, and enough for tests and a dev server"""
+    errors = ()
+
+    def __init__(self, location=None, max_bytes=DEFAULT_MAX_BYTES, timeout=DEFAULT_TIMEOUT):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._entries = OrderedDict()  # key -> (expires, blob)
+        self._size = 0
+        self._generations = {}
+        self._stats = {}  # source id -> [hits, misses]
+        self._lock = threading.Lock()
+
+    def generation(self, source_id):
+        with self._lock:
+            return self._generations.get(source_id, 0)
+
+    def bump(self, source_id):
+        with self._lock:
+            self._generations[source_id] = self._generations.get(source_id, 0) + 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.timeout, blob)
+            self._size += len(blob)
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def count(self, source_id, hit):
+        with self._lock:
+            self._stats.setdefault(source_id, [0, 0])[0 if hit else 1] += 1
+
+    def stats(self, source_id):
+        with self._lock:
+            return tuple(self._stats.get(source_id, (0, 0)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+# Stores a result and evicts the least recently used ones until the total
+# size is within budget. KEYS: LRU zset, sizes hash, total size counter;
+# ARGV: key, blob, ttl, now, max bytes. Entries that expired on their own
+# keep counting until they reach the head of the LRU, as nothing touches them.
+SET_SCRIPT = """
+local old = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+redis.call('SET', ARGV[1], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], string.len(ARGV[2]))
+local total = redis.call('INCRBY', KEYS[3], string.len(ARGV[2]) - old)
+while total > tonumber(ARGV[5]) do
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+    if not oldest then
+        break
+    end
+    total = redis.call('DECRBY', KEYS[3], tonumber(redis.call('HGET', KEYS[2], oldest) or '0'))
+    redis.call('DEL', oldest)
+    redis.call('ZREM', KEYS[1], oldest)
+    redis.call('HDEL', KEYS[2], oldest)
+end
+return total
+"""
+
+
+class RedisResultStore:
+    """Store shared by all workers, with its LRU bookkeeping in Redis"""
+
+    def __init__(self, location, max_bytes=DEFAULT_MAX_BYTES, timeout=DEFAULT_TIMEOUT, prefix='data-query'):
+        import redis
+
+        self.errors = (redis.RedisError,)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._client = redis.Redis.from_url(location, socket_timeout=1, socket_connect_timeout=1)
+        self._prefix = prefix
+        self._lru, self._sizes, self._total = f'{prefix}:lru', f'{prefix}:sizes', f'{prefix}:bytes'
+        self._set = self._client.register_script(SET_SCRIPT)
+
+    def _key(self, key):
+        return f'{self._prefix}:result:{key}'
+
+    def generation(self, source_id):
+        return int(self._client.get(f'{self._prefix}:generation:{source_id}') or 0)
+
+    def bump(self, source_id):
+        self._client.incr(f'{self._prefix}:generation:{source_id}')
+
+    def get(self, key):
+        key = self._key(key)
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.get(key)
+        pipeline.zadd(self._lru, {key: time.time()}, xx=True)
+        return pipeline.execute()[0]
+
+    def set(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        self._set(
+            keys=[self._lru, self._sizes, self._total],
+            args=[self._key(key), blob, self.timeout, time.time(), self.max_bytes],
+        )
+
+    def count(self, source_id, hit):
+        self._client.hincrby(f'{self._prefix}:stats:{source_id}', 'hits' if hit else 'misses', 1)
+
+    def stats(self, source_id):
+        stats = self._client.hmget(f'{self._prefix}:stats:{source_id}', 'hits', 'misses')
+        return tuple(int(value or 0) for value in stats)
+
+
+class QueryResultCache:
+    """The configured store, and a local one standing in for it while it fails"""
+
+    def __init__(self, store, fallback):
+        self.store = store
+        self.fallback = fallback
+        self._retry_at = 0
+
+    def _call(self, method, *args):
+        if self.store is self.fallback or time.monotonic() < self._retry_at:
+            return getattr(self.fallback, method)(*args)
+        try:
+            return getattr(self.store, method)(*args)
+        except self.store.errors as exc:
+            logger.warning('Query result cache unavailable, using the local store: %s', exc)
+            self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            return getattr(self.fallback, method)(*args)
+
+    def fetch(self, source_id, sql, params, limit, compute, refresh=False):
+        """
+        The cached result of ``sql`` on the source, else ``compute()``'s,
+        which is cached; returns ``(result, hit)``. Results come back decoded
+        from JSON either way, so hits and misses look the same to callers.
+        """
+        key = result_key(source_id, self._call('generation', source_id), sql, params, limit)
+        blob = None if refresh else self._call('get', key)
+        self._call('count', source_id, blob is not None)
+        if blob is not None:
+            return decode(blob), True
+        blob = encode(compute())
+        self._call('set', key, blob)
+        return decode(blob), False
+
+    def invalidate(self, source_id):
+        self._call('bump', source_id)
+        if self.store is not self.fallback:
+            self.fallback.bump(source_id)  # it may hold results from an outage
+
+    def stats(self, source_id):
+        hits, misses = self._call('stats', source_id)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_query_cache():
+    config = settings.DATA_QUERY_CACHE
+    options = {'timeout': config.get('TIMEOUT', DEFAULT_TIMEOUT), **config.get('OPTIONS', {})}
+    store = import_string(config['BACKEND'])(config.get('LOCATION'), **options)
+    if isinstance(store, LocalResultStore):
+        return QueryResultCache(store, store)
+    return QueryResultCache(store, LocalResultStore(timeout=options['timeout']))
+
+
+def invalidate_source(source_id):
+    transaction.on_commit(lambda: get_query_cache().invalidate(source_id))
+
+
+def _on_sync_completed(sender, job, **kwargs):
+    invalidate_source(job.connection_id)
+
+
+def connect_cache_invalidation():
+    sync_completed.connect(_on_sync_completed, dispatch_uid='data_query_cache_sync')
@@ -0,0 +1,147 @@
+"""
+Scheduling and admission of data source syncs.
+
+A job's ``schedule_type`` and ``schedule_config`` (``hour``, ``minute``,
+``dayOfWeek``, ``dayOfMonth``, or a five-field ``cron`` expression) are a
+Celery ``crontab``. ``dispatch_due`` runs every minute from Celery beat,
+queues the jobs whose ``next_run`` has passed and moves ``next_run`` on.
+
+Every sync, scheduled or requested, is admitted by taking three slots first:
+
+- the job's own, so a job that is already running is not run again;
+- one of its source's ``syncConcurrency`` slots (default 1), so no source is
+  synced by more jobs at once than it allows;
+- one of ``DATA_SYNC_MAX_CONCURRENT`` slots shared by all sources.
+
+A sync that cannot get its source or global slot is retried with exponential
+backoff, as is a failed sync up to the job's ``retryAttempts``. Slots are
+leases, renewed while the sync runs, so a dead worker's expire on their own.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+
+from celery.schedules import crontab
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DataSyncJob
+from .slots import LeaseHeartbeat, get_sync_slots
+
+LEASE_SECONDS = 300
+DEFAULT_RETRY_ATTEMPTS = 3
+# Seconds before the first retry of a failed sync, doubled for each further one
+RETRY_BACKOFF = 60
+# Seconds before asking again for busy slots, doubled up to BUSY_BACKOFF_MAX
+BUSY_BACKOFF = 15
+BUSY_BACKOFF_MAX = 600
+# A sync still waiting for slots after this many tries is dropped until its next run
+MAX_WAITS = 30
+
+
+class JobRunning(Exception):
+    """The job is already running"""
+
+
+class SlotsBusy(Exception):
+    """The job's source, or every source together, is at its concurrency cap"""
+
+
+def job_schedule(job):
+    """The ``crontab`` of ``job``, or None for manual jobs; raises ``ValueError`` for bad configs"""
+    config = job.schedule_config or {}
+    if config.get('cron'):
+        fields = str(config['cron']).split()
+        if len(fields) != 5:
+            raise ValueError('Cron expressions have five fields: minute hour day-of-month month day-of-week.')
+        minute, hour, day_of_month, month_of_year, day_of_week = fields
+        return crontab(
+            minute=minute, hour=hour, day_of_month=day_of_month, month_of_year=month_of_year,
+            day_of_week=day_of_week,
+        )
+    minute, hour = config.get('minute', 0), config.get('hour', 0)
+    if job.schedule_type == 'hourly':
+        return crontab(minute=minute)
+    if job.schedule_type == 'daily':
+        return crontab(minute=minute, hour=hour)
+    if job.schedule_type == 'weekly':
+        # dayOfWeek counts from Sunday = 0, as crontab does
+        return crontab(minute=minute, hour=hour, day_of_week=config.get('dayOfWeek', 1))
+    if job.schedule_type == 'monthly':
+        return crontab(minute=minute, hour=hour, day_of_month=config.get('dayOfMonth', 1))
+    return None
+
+
+def next_run(job, after=None):
+    """The first scheduled time of ``job`` after ``after`` (default now), or None"""
+    schedule = job_schedule(job)
+    if schedule is None:
+        return None
+    after = after or timezone.now()
+    schedule.nowfun = lambda: after
+    # remaining_estimate counts from the last run; asking from a second ago
+    # keeps a run due at ``after`` itself
+    return after + schedule.remaining_estimate(after - datetime.timedelta(seconds=1))
+
+
+def reschedule(job):
+    job.next_run = next_run(job) if job.is_active else None
+    job.save(update_fields=['next_run', 'updated_at'])
+
+
+def dispatch_due(enqueue, now=None):
+    """Call ``enqueue(job_id)`` after commit for every job due by ``now``; returns their ids"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(
+            DataSyncJob.objects.select_for_update(skip_locked=True)
+            .filter(is_active=True, next_run__lte=now).exclude(schedule_type='manual')
+        )
+        for job in due:
+            job.next_run = next_run(job, now + datetime.timedelta(seconds=1))
+            job.save(update_fields=['next_run', 'updated_at'])
+        job_ids = [job.pk for job in due]
+
+        def enqueue_all():
+            for job_id in job_ids:
+                enqueue(job_id)
+
+        transaction.on_commit(enqueue_all)
+    return job_ids
+
+
+def backoff(tries, base, maximum=None):
+    """Seconds to wait before try ``tries + 1``: doubling from ``base``, with jitter"""
+    delay = base * 2 ** tries
+    if maximum is not None:
+        delay = min(delay, maximum)
+    return round(delay * random.uniform(1, 1.25))
+
+
+@contextmanager
+def sync_slots(job):
+    """Hold the job's, its source's and a global slot while the block runs"""
+    slots = get_sync_slots()
+    source_limit = max(1, int((job.connection.config or {}).get('syncConcurrency') or 1))
+    wanted = [
+        (f'job:{job.pk}', 1, JobRunning),
+        (f'source:{job.connection_id}', source_limit, SlotsBusy),
+        ('global', settings.DATA_SYNC_MAX_CONCURRENT, SlotsBusy),
+    ]
+    held = []
+    try:
+        for name, limit, busy in wanted:
+            token = slots.acquire(name, limit, LEASE_SECONDS)
+            if token is None:
+                raise busy(name)
+            held.append((name, token))
+        heartbeat = LeaseHeartbeat(slots, held, LEASE_SECONDS)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            heartbeat.stop()
+    finally:
+        for name, token in held:
+            slots.release(name, token)
@@ -0,0 +1,161 @@
+from rest_framework import serializers
+from .models import (
+    DataConnection, DataQuery, DataSchema, DataSyncJob, DataSyncRun, DataQualityCheck, QualityRuleResult
+)
+from .quality import RULE_TYPES, SEVERITIES
+from .scheduler import job_schedule
+
+# Config keys never sent back to clients
+SECRET_CONFIG_KEYS = ['password', 'apiKey', 'connectionString']
+MASK = '********'
+
+
+class DataConnectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataConnection
+        fields = [
+            'id', 'name', 'source_type', 'status', 'config', 'description', 'tags', 'last_sync',
+            'last_error', 'is_active', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'status', 'last_sync', 'last_error', 'created_by', 'created_at', 'updated_at']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['config'] = {
+            key: MASK if key in SECRET_CONFIG_KEYS and value else value
+            for key, value in (data['config'] or {}).items()
+        }
+        return data
+
+    def validate_config(self, config):
+        if not isinstance(config, dict):
+            raise serializers.ValidationError('Expected an object.')
+        # Masked secrets sent back unchanged keep their stored value
+        current = self.instance.config if self.instance else {}
+        return {
+            key: current.get(key) if key in SECRET_CONFIG_KEYS and value == MASK else value
+            for key, value in config.items()
+        }
+
+
+class DataSchemaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataSchema
+        fields = ['connection', 'tables', 'relationships', 'refreshed_at']
+        read_only_fields = fields
+
+
+class QueryPreviewSerializer(serializers.Serializer):
+    sql = serializers.CharField()
+    params = serializers.ListField(required=False, default=list)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+
+class DataQuerySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataQuery
+        fields = [
+            'id', 'name', 'description', 'connection', 'sql', 'mdx', 'filters', 'parameters',
+            'result_columns', 'tags', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+
+    def validate_parameters(self, value):
+        if not isinstance(value, list) or not all(isinstance(item, dict) and item.get('name') for item in value):
+            raise serializers.ValidationError('Expected a list of parameters with names.')
+        return value
+
+    def validate_filters(self, value):
+        if not isinstance(value, list) or not all(
+            isinstance(item, dict) and item.get('column') and item.get('operator') for item in value
+        ):
+            raise serializers.ValidationError('Expected a list of filters with a column and an operator.')
+        return value
+
+
+class QueryExecuteSerializer(serializers.Serializer):
+    parameters = serializers.DictField(required=False, default=dict)
+    limit = serializers.IntegerField(min_value=1, max_value=100000, default=10000)
+    refresh = serializers.BooleanField(default=False)
+
+
+class DataSyncJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataSyncJob
+        fields = [
+            'id', 'name', 'connection', 'source_table', 'target_table', 'key_columns', 'sync_mode',
+            'incremental_column', 'schedule_type', 'schedule_config', 'config', 'status', 'watermark',
+            'last_run', 'next_run', 'is_active', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'watermark', 'last_run', 'next_run', 'created_by', 'created_at', 'updated_at'
+        ]
+
+    def validate_key_columns(self, value):
+        if not isinstance(value, list) or not value or not all(isinstance(column, str) for column in value):
+            raise serializers.ValidationError('Provide one or more column names.')
+        return value
+
+    def validate(self, attrs):
+        job = DataSyncJob(
+            schedule_type=attrs.get('schedule_type', self.instance.schedule_type if self.instance else 'manual'),
+            schedule_config=attrs.get('schedule_config', self.instance.schedule_config if self.instance else {}),
+        )
+        try:
+            job_schedule(job)
+        except (ValueError, TypeError) as exc:
+            raise serializers.ValidationError({'schedule_config': str(exc)})
+        return attrs
+
+
+class DataSyncRunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataSyncRun
+        fields = [
+            'id', 'job', 'status', 'sync_mode', 'rows_read', 'rows_written', 'rows_deleted',
+            'chunks_total', 'chunks_changed', 'watermark_from', 'watermark_to', 'progress', 'error',
+            'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class DataQualityCheckSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataQualityCheck
+        fields = [
+            'id', 'name', 'description', 'connection', 'table', 'column', 'check_type', 'rules', 'schedule',
+            'status', 'last_run', 'score', 'is_active', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'status', 'last_run', 'score', 'created_by', 'created_at', 'updated_at']
+
+    def validate_rules(self, value):
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError('Expected a list of rules.')
+        for rule in value:
+            if not isinstance(rule, dict) or rule.get('type') not in RULE_TYPES:
+                raise serializers.ValidationError(f'Rule types must be one of: {", ".join(RULE_TYPES)}.')
+            if rule.get('severity', 'error') not in SEVERITIES:
+                raise serializers.ValidationError(f'Severities must be one of: {", ".join(SEVERITIES)}.')
+            config = rule.get('config') or {}
+            if rule['type'] == 'referential' and not (config.get('reference_table') and config.get('reference_column')):
+                raise serializers.ValidationError('Referential rules need a reference_table and reference_column.')
+            if rule['type'] == 'pattern' and not config.get('regex'):
+                raise serializers.ValidationError('Pattern rules need a regex.')
+        return value
+
+    def validate(self, attrs):
+        column = attrs.get('column', self.instance.column if self.instance else '')
+        rules = attrs.get('rules', self.instance.rules if self.instance else [])
+        if not column and not all((rule.get('config') or {}).get('column') for rule in rules):
+            raise serializers.ValidationError({'column': 'Needed unless every rule names its column.'})
+        return attrs
+
+
+class QualityRuleResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QualityRuleResult
+        fields = [
+            'id', 'quality_check', 'sync_run', 'rule_index', 'rule_type', 'severity', 'column', 'rows_checked',
+            'rows_failed', 'samples', 'pushed_down', 'error', 'checked_at'
+        ]
+        read_only_fields = fields
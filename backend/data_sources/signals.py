@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent when a sync job run completes: sync_completed.send(sender, job=..., run=...)
+sync_completed = Signal()
@@ -0,0 +1,117 @@
+"""
+Counting semaphores for admitting data source syncs and capping each
+source's open queries across processes.
+
+A slot is a lease: it expires ``ttl`` seconds after it was taken or last
+renewed, so a worker that dies mid-sync frees its slots on its own. Redis
+holds the slots of all workers; the in-process store is for tests and a
+single worker.
+"""
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class LocalSyncSlots:
+    """Process-local slots; only suitable for tests and a single worker"""
+
+    def __init__(self, location=None):
+        self._slots = {}  # name -> {token: expires}
+        self._lock = threading.Lock()
+
+    def acquire(self, name, limit, ttl):
+        """A token for one of ``limit`` slots of ``name``, or None if all are taken"""
+        now = time.monotonic()
+        with self._lock:
+            holders = {token: expires for token, expires in self._slots.get(name, {}).items() if expires > now}
+            self._slots[name] = holders
+            if len(holders) >= limit:
+                return None
+            token = uuid.uuid4().hex
+            holders[token] = now + ttl
+            return token
+
+    def renew(self, name, token, ttl):
+        with self._lock:
+            holders = self._slots.get(name, {})
+            if token in holders:
+                holders[token] = time.monotonic() + ttl
+
+    def release(self, name, token):
+        with self._lock:
+            self._slots.get(name, {}).pop(token, None)
+
+
+# KEYS: the slot set; ARGV: now, limit, expiry, token, ttl in milliseconds.
+# Holders are a sorted set of tokens scored by expiry.
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+class RedisSyncSlots:
+    """Slots shared by all workers, as Redis sorted sets of leases"""
+
+    def __init__(self, location, prefix='data-sync-slots'):
+        import redis
+
+        self._client = redis.Redis.from_url(location)
+        self._prefix = prefix
+        self._acquire = self._client.register_script(ACQUIRE_SCRIPT)
+
+    def _key(self, name):
+        return f'{self._prefix}:{name}'
+
+    def acquire(self, name, limit, ttl):
+        token = uuid.uuid4().hex
+        now = time.time()
+        taken = self._acquire(keys=[self._key(name)], args=[now, limit, now + ttl, token, int(ttl * 1000)])
+        return token if taken else None
+
+    def renew(self, name, token, ttl):
+        pipeline = self._client.pipeline()
+        pipeline.zadd(self._key(name), {token: time.time() + ttl}, xx=True)
+        pipeline.pexpire(self._key(name), int(ttl * 1000))
+        pipeline.execute()
+
+    def release(self, name, token):
+        self._client.zrem(self._key(name), token)
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renews held ``(name, token)`` slots every third of ``ttl`` until stopped"""
+
+    def __init__(self, slots, held, ttl):
+        super().__init__(daemon=True)
+        self._slots = slots
+        self._held = held
+        self._ttl = ttl
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self._ttl / 3):
+            for name, token in self._held:
+                try:
+                    self._slots.renew(name, token, self._ttl)
+                except Exception:
+                    pass  # retried on the next beat; the lease outlives a few misses
+
+    def stop(self):
+        self._stopped.set()
+
+
+@lru_cache(maxsize=None)
+def get_sync_slots():
+    config = settings.DATA_SYNC_SLOTS
+    backend = import_string(config['BACKEND'])
+    return backend(config.get('LOCATION'), **config.get('OPTIONS', {}))
@@ -0,0 +1,59 @@
+import logging
+
+from celery import shared_task
+
+from . import scheduler
+from .models import DataQualityCheck, DataSyncJob
+from .quality import run_check
+from .sync import run_sync
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def run_sync_job(job_id, attempt=0, waits=0):
+    """
+    Run a sync once its slots are free; see ``data_sources.scheduler``.
+    ``attempt`` counts failed runs, ``waits`` tries that found the slots busy.
+    """
+    job = DataSyncJob.objects.select_related('connection').filter(pk=job_id, is_active=True).first()
+    if job is None:
+        return None
+    try:
+        with scheduler.sync_slots(job):
+            return run_sync(job).pk
+    except scheduler.JobRunning:
+        logger.info('Sync job %s is already running; not running it again', job_id)
+    except scheduler.SlotsBusy as exc:
+        if waits >= scheduler.MAX_WAITS:
+            logger.warning('Sync job %s gave up waiting for %s slots', job_id, exc)
+            return None
+        run_sync_job.apply_async(
+            (job_id,), {'attempt': attempt, 'waits': waits + 1},
+            countdown=scheduler.backoff(waits, scheduler.BUSY_BACKOFF, scheduler.BUSY_BACKOFF_MAX),
+        )
+    except Exception:
+        retries = int(job.config.get('retryAttempts', scheduler.DEFAULT_RETRY_ATTEMPTS))
+        if attempt >= retries:
+            logger.exception('Sync job %s failed after %s retries', job_id, attempt)
+            return None
+        logger.warning('Sync job %s failed; retry %s of %s', job_id, attempt + 1, retries, exc_info=True)
+        run_sync_job.apply_async(
+            (job_id,), {'attempt': attempt + 1, 'waits': waits},
+            countdown=scheduler.backoff(attempt, scheduler.RETRY_BACKOFF),
+        )
+    return None
+
+
+@shared_task(ignore_result=True)
+def dispatch_due_syncs():
+    """Queue the scheduled syncs that are due; run every minute by Celery beat"""
+    return scheduler.dispatch_due(run_sync_job.delay)
+
+
+@shared_task(ignore_result=True)
+def run_quality_check(check_id):
+    check = DataQualityCheck.objects.select_related('connection').filter(pk=check_id).first()
+    if check is None:
+        return None
+    run_check(check)
@@ -0,0 +1,234 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from . import scheduler
+from .connectors import SourceBusy, discard_pool, get_connector
+from .models import DataConnection, DataQualityCheck, DataQuery, DataSyncJob, QualityRuleResult, SyncedRow
+from .quality import run_check
+from .queries import run_query
+from .query_cache import get_query_cache
+from .slots import get_sync_slots
+from .sync import run_sync
+
+
+@override_settings(
+    DATA_SYNC_SLOTS={'BACKEND': 'data_sources.slots.LocalSyncSlots'},
+    DATA_QUERY_CACHE={'BACKEND': 'data_sources.query_cache.LocalResultStore'},
+)
+class SourceTestCase(TestCase):
+    """A fresh SQLite source database and process-local slots and result cache per test"""
+
+    def setUp(self):
+        for cached in (get_sync_slots, get_query_cache):
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.database = sqlite3.connect(os.path.join(directory, 'source.sqlite3'))
+        self.addCleanup(self.database.close)
+        self.source = DataConnection.objects.create(
+            name='Source', source_type='sqlite',
+            config={'database': os.path.join(directory, 'source.sqlite3'), 'poolSize': 1, 'timeout': 1},
+        )
+        self.addCleanup(discard_pool, self.source.pk)
+
+    def execute(self, sql, rows=()):
+        if rows:
+            self.database.executemany(sql, rows)
+        else:
+            self.database.execute(sql)
+        self.database.commit()
+
+    def synced(self, job):
+        return {row.key: row.data for row in SyncedRow.objects.filter(job=job)}
+
+
+class ConnectionLimitTests(SourceTestCase):
+    def test_idle_connections_are_reused(self):
+        pool = get_connector(self.source).pool()
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(first, second)
+
+    def test_pool_size_caps_connections_in_process(self):
+        pool = get_connector(self.source).pool()
+        with pool.connection():
+            with self.assertRaises(SourceBusy):
+                with pool.connection():
+                    pass
+        with pool.connection():
+            pass
+
+    def test_shared_slots_cap_connections_across_processes(self):
+        slots = get_sync_slots()
+        # Another process holding the source's only slot
+        token = slots.acquire(f'connections:{self.source.pk}', 1, 60)
+        connector = get_connector(self.source)
+        with self.assertRaises(SourceBusy):
+            connector.test()
+        slots.release(f'connections:{self.source.pk}', token)
+        connector.test()
+
+    def test_sync_slots_admit_one_run_per_job_and_source(self):
+        job = DataSyncJob.objects.create(name='A', connection=self.source, source_table='t', key_columns=['id'])
+        other = DataSyncJob.objects.create(name='B', connection=self.source, source_table='t', key_columns=['id'])
+        with scheduler.sync_slots(job):
+            with self.assertRaises(scheduler.JobRunning):
+                with scheduler.sync_slots(job):
+                    pass
+            with self.assertRaises(scheduler.SlotsBusy):
+                with scheduler.sync_slots(other):
+                    pass
+        with scheduler.sync_slots(other):
+            pass
+
+
+class SyncTests(SourceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.execute('CREATE TABLE sales (id INTEGER PRIMARY KEY, amount REAL, quantity INTEGER, updated_at TEXT)')
+        self.execute(
+            'INSERT INTO sales VALUES (?, ?, ?, ?)',
+            [(i, i * 1.5, i % 7, f'2026-01-{1 + i % 28:02d} 00:00:00') for i in range(1, 10001)],
+        )
+
+    def test_watermark_sync_reads_only_new_rows(self):
+        job = DataSyncJob.objects.create(
+            name='Sales', connection=self.source, source_table='sales', key_columns=['id'],
+            incremental_column='updated_at', config={'batchSize': 3000},
+        )
+        run = run_sync(job)
+        self.assertEqual((run.sync_mode, run.rows_written), ('watermark', 10000))
+        self.assertEqual(job.watermark, {'type': 'str', 'value': '2026-01-28 00:00:00'})
+
+        self.execute("UPDATE sales SET amount = -1, updated_at = '2026-02-01 00:00:00' WHERE id = 10")
+        self.execute("INSERT INTO sales VALUES (20000, 1, 1, '2026-02-02 00:00:00')")
+        run = run_sync(job)
+        # Rows at the old mark are read again but skipped by their hashes
+        self.assertEqual(run.rows_written, 2)
+        self.assertLess(run.rows_read, 10000)
+        self.assertEqual(job.watermark['value'], '2026-02-02 00:00:00')
+        rows = self.synced(job)
+        self.assertEqual((len(rows), rows['10']['amount']), (10001, -1))
+
+    def test_chunk_hash_sync_rewrites_only_changed_chunks(self):
+        job = DataSyncJob.objects.create(
+            name='Sales', connection=self.source, source_table='sales', key_columns=['id'],
+            config={'batchSize': 3000},
+        )
+        run = run_sync(job)
+        self.assertEqual((run.sync_mode, run.rows_written), ('chunk_hash', 10000))
+        self.assertGreater(run.chunks_total, 3)
+
+        run = run_sync(job)
+        self.assertEqual((run.rows_written, run.rows_deleted, run.chunks_changed), (0, 0, 0))
+
+        self.execute('UPDATE sales SET amount = -1 WHERE id = 10')
+        self.execute('DELETE FROM sales WHERE id = 5000')
+        self.execute("INSERT INTO sales VALUES (20000, 1, 1, '2026-02-02 00:00:00')")
+        run = run_sync(job)
+        self.assertEqual((run.rows_written, run.rows_deleted), (2, 1))
+        self.assertLessEqual(run.chunks_changed, 3)
+        self.assertLess(run.chunks_changed, run.chunks_total)
+        rows = self.synced(job)
+        self.assertEqual(len(rows), 10000)
+        self.assertNotIn('5000', rows)
+        self.assertEqual(rows['10']['amount'], -1)
+
+    def test_full_sync_compares_every_chunk_but_writes_no_unchanged_row(self):
+        job = DataSyncJob.objects.create(
+            name='Sales', connection=self.source, source_table='sales', key_columns=['id'], sync_mode='full',
+        )
+        run_sync(job)
+        run = run_sync(job)
+        self.assertEqual(run.chunks_changed, run.chunks_total)
+        self.assertEqual(run.rows_written, 0)
+
+    def test_row_hashes_do_not_depend_on_batch_dtypes(self):
+        job = DataSyncJob.objects.create(
+            name='Sales', connection=self.source, source_table='sales', key_columns=['id'],
+            sync_mode='full', config={'batchSize': 1000},
+        )
+        self.execute('UPDATE sales SET quantity = NULL WHERE id = 500')
+        run_sync(job)
+        # The first batch's quantities turn from floats back into integers
+        self.execute('UPDATE sales SET quantity = 3 WHERE id = 500')
+        self.assertEqual(run_sync(job).rows_written, 1)
+
+
+class QueryCacheTests(SourceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.execute('CREATE TABLE sales (id INTEGER PRIMARY KEY, amount REAL)')
+        self.execute('INSERT INTO sales VALUES (?, ?)', [(1, 10.0), (2, 20.0)])
+        self.query = DataQuery.objects.create(
+            name='Total', connection=self.source, sql='SELECT SUM(amount) AS total FROM sales',
+        )
+
+    def total(self):
+        result, cached = run_query(self.query)
+        return result['rows'][0][0], cached
+
+    def test_results_are_cached_until_a_sync_completes(self):
+        self.assertEqual(self.total(), (30.0, False))
+        self.execute('INSERT INTO sales VALUES (3, 5.0)')
+        self.assertEqual(self.total(), (30.0, True))
+
+        job = DataSyncJob.objects.create(name='Sales', connection=self.source, source_table='sales', key_columns=['id'])
+        with self.captureOnCommitCallbacks(execute=True):
+            run_sync(job)
+        self.assertEqual(self.total(), (35.0, False))
+        self.assertEqual(get_query_cache().stats(self.source.pk)['hits'], 1)
+
+
+class QualityTests(SourceTestCase):
+    RULES = [
+        {'type': 'not_null', 'config': {'column': 'region'}},
+        {'type': 'unique', 'config': {'column': 'quantity'}},
+        {'type': 'range', 'config': {'column': 'quantity', 'min': 1, 'max': 30}},
+        {'type': 'pattern', 'config': {'column': 'email', 'regex': r'[^@]+@[^@]+'}, 'severity': 'warning'},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.execute('CREATE TABLE customers (id INTEGER PRIMARY KEY, region TEXT, quantity INTEGER, email TEXT)')
+        self.rows = [
+            (i, None if i % 10 == 0 else 'N', None if i % 25 == 0 else i % 40, 'bad' if i % 30 == 0 else f'u{i}@x.com')
+            for i in range(1, 101)
+        ]
+        self.execute('INSERT INTO customers VALUES (?, ?, ?, ?)', self.rows)
+        self.check = DataQualityCheck.objects.create(
+            name='Customers', connection=self.source, table='customers', rules=self.RULES,
+        )
+        quantities = [quantity for _, _, quantity, _ in self.rows if quantity is not None]
+        self.expected = [
+            (100, 10),
+            (100, len(quantities) - len(set(quantities))),
+            (100, sum(1 for quantity in quantities if not 1 <= quantity <= 30)),
+            (100, 3),
+        ]
+
+    def counts(self, results):
+        return [(result.rows_checked, result.rows_failed) for result in results.order_by('rule_index')]
+
+    def test_rules_count_failures_over_sync_batches(self):
+        # Small batches put duplicates in different batches, some read as floats
+        job = DataSyncJob.objects.create(
+            name='Customers', connection=self.source, source_table='customers', key_columns=['id'],
+            config={'batchSize': 7},
+        )
+        run = run_sync(job)
+        self.assertEqual(self.counts(QualityRuleResult.objects.filter(sync_run=run)), self.expected)
+        self.check.refresh_from_db()
+        self.assertEqual(self.check.status, 'failed')
+        self.assertEqual(self.check.score, round(100 * (1 - sum(failed for _, failed in self.expected) / 400), 2))
+
+    def test_pushed_down_rules_count_the_same(self):
+        rules = run_check(self.check)
+        self.assertEqual([rule.pushed_down for rule in rules], [True, True, True, False])
+        self.assertEqual(self.counts(QualityRuleResult.objects.filter(quality_check=self.check)), self.expected)
@@ -0,0 +1,13 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import DataConnectionViewSet, DataQueryViewSet, DataSyncJobViewSet, DataQualityCheckViewSet
+
+router = DefaultRouter()
+router.register(r'connections', DataConnectionViewSet, basename='dataconnection')
+router.register(r'queries', DataQueryViewSet, basename='dataquery')
+router.register(r'sync-jobs', DataSyncJobViewSet, basename='datasyncjob')
+router.register(r'quality-checks', DataQualityCheckViewSet, basename='dataqualitycheck')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,244 @@
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.response import Response
+
+from users.permissions import IsAdminUser
+from users.sync import DeltaSyncMixin
+from .connectors import ConnectorError, SourceBusy, discard_pool, get_connector
+from .models import DataConnection, DataQuery, DataSchema, DataSyncJob, DataQualityCheck
+from .queries import run_query
+from .scheduler import reschedule
+from .query_cache import get_query_cache, invalidate_source
+from .serializers import (
+    DataConnectionSerializer, DataSchemaSerializer, QueryPreviewSerializer, DataQuerySerializer,
+    QueryExecuteSerializer, DataSyncJobSerializer, DataSyncRunSerializer, DataQualityCheckSerializer,
+    QualityRuleResultSerializer
+)
+from .tasks import run_quality_check, run_sync_job
+
+
+class DataSourcePermissionsMixin:
+    """Anyone signed in can read data sources; only admins can change or query them"""
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            permission_classes = [permissions.IsAuthenticated]
+        else:
+            permission_classes = [IsAdminUser]
+        return [permission() for permission in permission_classes]
+
+
+class DataConnectionViewSet(DataSourcePermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = DataConnection.objects.all()
+    serializer_class = DataConnectionSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['source_type', 'status', 'is_active']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'last_sync', 'created_at']
+    ordering = ['name']
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        discard_pool(serializer.instance.pk)
+        invalidate_source(serializer.instance.pk)
+
+    def perform_destroy(self, instance):
+        discard_pool(instance.pk)
+        invalidate_source(instance.pk)
+        instance.delete()
+
+    def _set_status(self, source, status_value, error=''):
+        source.status, source.last_error = status_value, error
+        source.save(update_fields=['status', 'last_error', 'updated_at'])
+
+    @action(detail=True, methods=['post'])
+    def test(self, request, pk=None):
+        """Open (or reuse) a pooled connection and run a trivial query"""
+        source = self.get_object()
+        try:
+            get_connector(source).test()
+        except Exception as exc:
+            self._set_status(source, 'error', str(exc))
+            return Response({'connected': False, 'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        self._set_status(source, 'connected')
+        return Response({'connected': True})
+
+    @action(detail=True, methods=['post'])
+    def sync(self, request, pk=None):
+        """Queue every active sync job of the source"""
+        job_ids = list(self.get_object().sync_jobs.filter(is_active=True).values_list('id', flat=True))
+        for job_id in job_ids:
+            run_sync_job.delay(job_id)
+        return Response({'queued': job_ids}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get', 'post'])
+    def schema(self, request, pk=None):
+        """The stored schema; ``POST`` introspects the source again"""
+        source = self.get_object()
+        if request.method == 'GET':
+            schema = DataSchema.objects.filter(connection=source).first()
+            if schema is None:
+                return Response({'error': 'Schema has not been loaded yet'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(DataSchemaSerializer(schema).data)
+        try:
+            tables = get_connector(source).introspect()
+        except Exception as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        schema, _ = DataSchema.objects.update_or_create(connection=source, defaults={'tables': tables})
+        return Response(DataSchemaSerializer(schema).data)
+
+    @action(detail=True, methods=['post'])
+    def preview(self, request, pk=None):
+        """First ``limit`` rows of an ad-hoc query against the source"""
+        source = self.get_object()
+        serializer = QueryPreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        started = timezone.now()
+        try:
+            columns, rows = get_connector(source).query(
+                serializer.validated_data['sql'], serializer.validated_data['params'],
+                limit=serializer.validated_data['limit'],
+            )
+        except SourceBusy as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ConnectorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as exc:
+            return Response({'error': f'Query failed: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'columns': columns,
+            'data': rows,
+            'total_rows': len(rows),
+            'execution_time': (timezone.now() - started).total_seconds(),
+        })
+
+    @action(detail=True, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request, pk=None):
+        """Hits and misses of the source's query result cache"""
+        return Response(get_query_cache().stats(self.get_object().pk))
+
+
+class DataQueryViewSet(DataSourcePermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = DataQuery.objects.select_related('connection')
+    serializer_class = DataQuerySerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['connection']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'updated_at']
+    ordering = ['name']
+
+    def get_permissions(self):
+        # Saved queries are run by anyone who can read them
+        if self.action == 'execute':
+            return [permissions.IsAuthenticated()]
+        return super().get_permissions()
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def execute(self, request, pk=None):
+        """Run the query, or return its cached result, as a frontend ``QueryResult``"""
+        query = self.get_object()
+        serializer = QueryExecuteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        started = timezone.now()
+        try:
+            result, cached = run_query(
+                query, serializer.validated_data['parameters'], limit=serializer.validated_data['limit'],
+                refresh=serializer.validated_data['refresh'],
+            )
+        except SourceBusy as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ConnectorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as exc:
+            return Response({'error': f'Query failed: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'query_id': query.pk,
+            'columns': result['columns'],
+            'data': result['rows'],
+            'total_rows': len(result['rows']),
+            'execution_time': (timezone.now() - started).total_seconds(),
+            'executed_at': started,
+            'cached': cached,
+        })
+
+
+class DataSyncJobViewSet(DataSourcePermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = DataSyncJob.objects.select_related('connection')
+    serializer_class = DataSyncJobSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['connection', 'status', 'sync_mode', 'schedule_type', 'is_active']
+    search_fields = ['name', 'source_table', 'target_table']
+    ordering_fields = ['name', 'last_run', 'next_run']
+    ordering = ['name']
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+        reschedule(serializer.instance)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        reschedule(serializer.instance)
+
+    @action(detail=True, methods=['post'])
+    def run(self, request, pk=None):
+        """Queue the job now; it waits for its source's slot and is dropped if already running"""
+        job = self.get_object()
+        run_sync_job.delay(job.pk)
+        return Response({'message': 'Sync queued'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def reset(self, request, pk=None):
+        """Forget the watermark and chunk hashes, so the next run re-reads the whole table"""
+        job = self.get_object()
+        job.watermark = None
+        job.save(update_fields=['watermark', 'updated_at'])
+        job.chunks.all().delete()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def runs(self, request, pk=None):
+        queryset = self.get_object().runs.all()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(DataSyncRunSerializer(page, many=True).data)
+        return Response(DataSyncRunSerializer(queryset, many=True).data)
+
+
+class DataQualityCheckViewSet(DataSourcePermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = DataQualityCheck.objects.select_related('connection')
+    serializer_class = DataQualityCheckSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['connection', 'check_type', 'status', 'is_active']
+    search_fields = ['name', 'description', 'table', 'column']
+    ordering_fields = ['name', 'last_run', 'score']
+    ordering = ['name']
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def run(self, request, pk=None):
+        """Queue the check against the whole table; checks also run with every sync of it"""
+        check = self.get_object()
+        run_quality_check.delay(check.pk)
+        return Response({'message': 'Quality check queued'}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def results(self, request, pk=None):
+        """Rule results, newest first; ``?sync_run=`` narrows them to one sync"""
+        queryset = self.get_object().results.all()
+        if request.query_params.get('sync_run'):
+            queryset = queryset.filter(sync_run=request.query_params['sync_run'])
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(QualityRuleResultSerializer(page, many=True).data)
+        return Response(QualityRuleResultSerializer(queryset, many=True).data)
@@ -0,0 +1 @@
+# Forecasts app
\ No newline at end of file
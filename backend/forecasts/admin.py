@@ -0,0 +1,65 @@
+from django.contrib import admin
+from .models import (
+    Customer, Item, CustomerItemForecast, ForecastBudgetTarget, ForecastRecompute,
+    ForecastScenario, ForecastScenarioOverride, ForecastAccuracy
+)
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'region', 'segment', 'tier', 'active']
+    list_filter = ['region', 'segment', 'tier', 'active']
+    search_fields = ['name', 'code', 'email']
+    raw_id_fields = ['manager']
+
+
+@admin.register(Item)
+class ItemAdmin(admin.ModelAdmin):
+    list_display = ['name', 'sku', 'category', 'brand', 'unit_price', 'active']
+    list_filter = ['category', 'brand', 'active', 'seasonal']
+    search_fields = ['name', 'sku']
+
+
+@admin.register(CustomerItemForecast)
+class CustomerItemForecastAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'item', 'year', 'yearly_total', 'status', 'confidence']
+    list_filter = ['year', 'status', 'confidence']
+    search_fields = ['customer__name', 'item__name', 'item__sku']
+    raw_id_fields = ['customer', 'item', 'created_by']
+
+
+@admin.register(ForecastBudgetTarget)
+class ForecastBudgetTargetAdmin(admin.ModelAdmin):
+    list_display = ['year', 'month_index', 'amount']
+    list_filter = ['year']
+
+
+@admin.register(ForecastRecompute)
+class ForecastRecomputeAdmin(admin.ModelAdmin):
+    list_display = ['year', 'as_of_month', 'status', 'shards_done', 'shards_total', 'forecasts_updated', 'created_at']
+    list_filter = ['year', 'status']
+    raw_id_fields = ['requested_by']
+    readonly_fields = ['shards', 'started_at', 'finished_at']
+
+
+class ForecastScenarioOverrideInline(admin.TabularInline):
+    model = ForecastScenarioOverride
+    extra = 0
+    raw_id_fields = ['forecast']
+    exclude = ['quantities', 'unit_prices']
+
+
+@admin.register(ForecastScenario)
+class ForecastScenarioAdmin(admin.ModelAdmin):
+    list_display = ['name', 'year', 'scenario_type', 'probability', 'volume_change', 'price_change', 'status']
+    list_filter = ['year', 'scenario_type', 'status']
+    search_fields = ['name', 'description']
+    raw_id_fields = ['created_by']
+    inlines = [ForecastScenarioOverrideInline]
+
+
+@admin.register(ForecastAccuracy)
+class ForecastAccuracyAdmin(admin.ModelAdmin):
+    list_display = ['year', 'dimension', 'label', 'observations', 'mape', 'bias', 'mae', 'computed_at']
+    list_filter = ['year', 'dimension']
+    search_fields = ['label']
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class ForecastsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'forecasts'
+
+    def ready(self):
+        from users.sync import track_deletions
+        from .models import Customer, Item, CustomerItemForecast, ForecastScenario
+
+        track_deletions(Customer, Item, CustomerItemForecast, ForecastScenario)
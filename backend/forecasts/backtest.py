@@ -0,0 +1,193 @@
+"""
+Forecast accuracy backtesting.
+
+Each forecast-month is paired with the last snapshot of that forecast taken
+before the month began (the ex-ante forecast) and with the actual sales
+booked as ``sale`` transactions for the customer and item. Error metrics are
+then aggregated for every salesman, customer, item and calendar month with
+``np.bincount`` over all series at once and written to ``ForecastAccuracy``.
+"""
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from budgets.models import BudgetTransaction
+from .engine import _to_decimal
+from .models import (
+    MONTHS, MONTH_DTYPE, Customer, Item, CustomerItemForecast, ForecastSnapshot,
+    ForecastAccuracy, pack_months
+)
+
+User = get_user_model()
+
+
+def take_snapshots(forecasts=None, taken_at=None):
+    """Snapshot the current monthly values of ``forecasts`` (default: all)"""
+    forecasts = CustomerItemForecast.objects.all() if forecasts is None else forecasts
+    rows = list(forecasts.order_by('id').values_list('id', 'quantities', 'unit_prices'))
+    if not rows:
+        return 0
+    forecast_ids, quantities, unit_prices = zip(*rows)
+    values = (
+        np.frombuffer(b''.join(quantities), dtype=MONTH_DTYPE).reshape(-1, 12)
+        * np.frombuffer(b''.join(unit_prices), dtype=MONTH_DTYPE).reshape(-1, 12)
+    )
+    taken_at = taken_at or timezone.now()
+    ForecastSnapshot.objects.bulk_create([
+        ForecastSnapshot(forecast_id=forecast_id, taken_at=taken_at, values=pack_months(row))
+        for forecast_id, row in zip(forecast_ids, values)
+    ], batch_size=1000)
+    return len(forecast_ids)
+
+
+def _predicted(forecast_ids, year):
+    """(forecasts x 12) ex-ante forecast values; NaN where no earlier snapshot exists"""
+    predicted = np.full((len(forecast_ids), 12), np.nan)
+    snapshots = list(
+        ForecastSnapshot.objects.filter(forecast__year=year).order_by('forecast_id', 'taken_at')
+        .annotate(taken_year=ExtractYear('taken_at'), taken_month=ExtractMonth('taken_at'))
+        .values_list('forecast_id', 'taken_year', 'taken_month', 'values')
+    )
+    if not snapshots:
+        return predicted
+    snapshot_forecasts, taken_years, taken_months, values = zip(*snapshots)
+    snapshot_forecasts = np.array(snapshot_forecasts, dtype=np.int64)
+    values = np.frombuffer(b''.join(values), dtype=MONTH_DTYPE).reshape(-1, 12)
+
+    # Months as ordinals: a snapshot is used for every target month after the
+    # one it was taken in, up to and including the month of the next snapshot.
+    taken = np.array(taken_years, dtype=np.int64) * 12 + np.array(taken_months, dtype=np.int64) - 1
+    same_forecast = np.append(snapshot_forecasts[1:] == snapshot_forecasts[:-1], False)
+    valid_until = np.where(same_forecast, np.append(taken[1:], 0), np.iinfo(np.int64).max)
+    targets = year * 12 + np.arange(12)
+    used = (targets > taken[:, np.newaxis]) & (targets <= valid_until[:, np.newaxis])
+
+    snapshot_rows, months = np.nonzero(used)
+    rows = np.searchsorted(forecast_ids, snapshot_forecasts[snapshot_rows])
+    predicted[rows, months] = values[snapshot_rows, months]
+    return predicted
+
+
+def _actuals(forecast_ids, customer_ids, item_ids, year, elapsed_months):
+    """(forecasts x 12) booked sales; 0 for elapsed months without sales, NaN after"""
+    actual = np.full((len(forecast_ids), 12), np.nan)
+    actual[:, :elapsed_months] = 0.0
+    rows = {pair: row for row, pair in enumerate(zip(customer_ids.tolist(), item_ids.tolist()))}
+    totals = (
+        BudgetTransaction.objects.filter(
+            transaction_type='sale', transaction_date__year=year,
+            customer__isnull=False, item__isnull=False,
+        )
+        .annotate(month=ExtractMonth('transaction_date'))
+        .values_list('customer_id', 'item_id', 'month')
+        .annotate(total=Sum('amount')).order_by()
+    )
+    for customer_id, item_id, month, total in totals:
+        row = rows.get((customer_id, item_id))
+        if row is not None and month <= elapsed_months:
+            actual[row, month - 1] = float(total)
+    return actual
+
+
+def error_metrics(group_idx, groups, predicted, actual):
+    """Per-group observations, MAPE %, bias %, MAE and totals of paired observations"""
+    error = predicted - actual
+    scored = actual != 0
+    percentage_error = np.divide(np.abs(error), np.abs(actual), out=np.zeros_like(actual), where=scored)
+
+    def total(weights=None):
+        return np.bincount(group_idx, weights=weights, minlength=groups)
+
+    observations = total()
+    scored_count = total(scored.astype(np.float64))
+    forecast_total, actual_total = total(predicted), total(actual)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'observations': observations,
+            'mape': np.where(scored_count > 0, total(percentage_error) / scored_count * 100, np.nan),
+            'bias': np.where(actual_total != 0, total(error) / actual_total * 100, np.nan),
+            'mae': np.where(observations > 0, total(np.abs(error)) / observations, np.nan),
+            'forecast_total': forecast_total,
+            'actual_total': actual_total,
+        }
+
+
+def _accuracy_rows(year, dimension, keys, labels, predicted, actual, computed_at):
+    group_keys, group_idx = np.unique(keys, return_inverse=True)
+    metrics = error_metrics(group_idx, len(group_keys), predicted, actual)
+
+    def decimal_or_none(value):
+        return None if np.isnan(value) else _to_decimal(value)
+
+    return [
+        ForecastAccuracy(
+            year=year, dimension=dimension,
+            key=None if dimension == 'overall' else int(key),
+            label=labels.get(int(key), '') if labels else '',
+            observations=int(metrics['observations'][index]),
+            mape=decimal_or_none(metrics['mape'][index]),
+            bias=decimal_or_none(metrics['bias'][index]),
+            mae=decimal_or_none(metrics['mae'][index]),
+            forecast_total=_to_decimal(metrics['forecast_total'][index]),
+            actual_total=_to_decimal(metrics['actual_total'][index]),
+            computed_at=computed_at,
+        )
+        for index, key in enumerate(group_keys)
+    ]
+
+
+def backtest_year(year, today=None, computed_at=None):
+    """Build the ``ForecastAccuracy`` rows for ``year`` (unsaved)"""
+    today = today or timezone.localdate()
+    elapsed_months = 12 if year < today.year else max(0, today.month - 1) if year == today.year else 0
+    headers = list(
+        CustomerItemForecast.objects.filter(year=year).order_by('id')
+        .values_list('id', 'customer_id', 'item_id', 'created_by_id')
+    )
+    if not headers or not elapsed_months:
+        return []
+    forecast_ids, customer_ids, item_ids, salesman_ids = (np.array(column, dtype=np.int64) for column in zip(*headers))
+
+    predicted = _predicted(forecast_ids, year)
+    actual = _actuals(forecast_ids, customer_ids, item_ids, year, elapsed_months)
+    rows, months = np.nonzero(~np.isnan(predicted) & ~np.isnan(actual))
+    if not len(rows):
+        return []
+    predicted, actual = predicted[rows, months], actual[rows, months]
+
+    computed_at = computed_at or timezone.now()
+    salesmen = User.objects.filter(id__in=np.unique(salesman_ids[rows]).tolist())
+    dimensions = [
+        ('overall', np.zeros(len(rows), dtype=np.int64), None),
+        ('salesman', salesman_ids[rows], {user.pk: user.get_full_name() or user.username for user in salesmen}),
+        ('customer', customer_ids[rows], dict(
+            Customer.objects.filter(id__in=np.unique(customer_ids[rows]).tolist()).values_list('id', 'name')
+        )),
+        ('item', item_ids[rows], dict(
+            Item.objects.filter(id__in=np.unique(item_ids[rows]).tolist()).values_list('id', 'name')
+        )),
+        ('month', months, dict(enumerate(MONTHS))),
+    ]
+    return [
+        accuracy
+        for dimension, keys, labels in dimensions
+        for accuracy in _accuracy_rows(year, dimension, keys, labels, predicted, actual, computed_at)
+    ]
+
+
+def run_backtest(years=None):
+    """Recompute and replace the stored accuracy metrics for ``years`` (default: all past and current)"""
+    if years is None:
+        years = list(
+            CustomerItemForecast.objects.filter(year__lte=timezone.localdate().year)
+            .values_list('year', flat=True).distinct().order_by('year')
+        )
+    computed_at = timezone.now()
+    accuracy = [row for year in years for row in backtest_year(year, computed_at=computed_at)]
+    with transaction.atomic():
+        ForecastAccuracy.objects.filter(year__in=years).delete()
+        ForecastAccuracy.objects.bulk_create(accuracy, batch_size=1000)
+    return len(accuracy)
@@ -0,0 +1,263 @@
+"""
+Vectorized rolling forecast engine.
+
+Forecasts are loaded into a ``ForecastGrid``: one row per customer-item pair
+and one column per month, held as dense NumPy arrays. Every calculation the
+frontend did per forecast object (``generateYearlyForecastSummary``,
+``getBudgetImpactAnalysis``, remaining-month re-forecasts) runs here as a few
+array operations over all pairs at once.
+
+Only pairs that actually have a forecast get a row, so memory grows with the
+number of forecasts rather than customers x items.
+"""
+import copy
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MONTHS, MONTH_DTYPE, CustomerItemForecast, ForecastBudgetTarget, pack_months
+from .signals import forecasts_bulk_updated
+
+CONFIDENCE_SCORES = {'low': 1, 'medium': 2, 'high': 3}
+
+# Bounds on the actual/forecast run-rate applied to remaining months, so one
+# unusual month cannot scale the rest of the year to zero or to a multiple.
+RUN_RATE_BOUNDS = (0.5, 1.5)
+
+
+class ForecastGrid:
+    """Dense (pairs x 12) forecast arrays plus the pair -> customer/item mapping"""
+
+    def __init__(self, forecast_ids, customer_ids, item_ids, quantity, unit_price,
+                 actual_quantity=None, confidence=None, planned_quantity=None):
+        self.forecast_ids = np.asarray(forecast_ids, dtype=np.int64)
+        self.customer_ids, self.customer_idx = np.unique(
+            np.asarray(customer_ids, dtype=np.int64), return_inverse=True
+        )
+        self.item_ids, self.item_idx = np.unique(
+            np.asarray(item_ids, dtype=np.int64), return_inverse=True
+        )
+        self.quantity = np.asarray(quantity, dtype=np.float64)
+        self.unit_price = np.asarray(unit_price, dtype=np.float64)
+        pairs = len(self.forecast_ids)
+        self.actual_quantity = (
+            np.full((pairs, 12), np.nan) if actual_quantity is None
+            else np.asarray(actual_quantity, dtype=np.float64)
+        )
+        self.confidence = (
+            np.full(pairs, CONFIDENCE_SCORES['medium'], dtype=np.int8) if confidence is None
+            else np.asarray(confidence, dtype=np.int8)
+        )
+        # The plan before re-forecasts, which re-forecasts scale from
+        self.planned_quantity = (
+            self.quantity if planned_quantity is None else np.asarray(planned_quantity, dtype=np.float64)
+        )
+
+    def __len__(self):
+        return len(self.forecast_ids)
+
+    def with_values(self, quantity, unit_price):
+        """Copy sharing this grid's pair mapping, with other monthly quantities and prices"""
+        grid = copy.copy(self)
+        grid.quantity, grid.unit_price = quantity, unit_price
+        return grid
+
+    @property
+    def values(self):
+        return self.quantity * self.unit_price
+
+    def yearly_totals(self):
+        return self.values.sum(axis=1)
+
+    def monthly_totals(self):
+        return self.values.sum(axis=0)
+
+    def customer_totals(self):
+        return np.bincount(self.customer_idx, weights=self.yearly_totals(), minlength=len(self.customer_ids))
+
+    def item_totals(self):
+        return np.bincount(self.item_idx, weights=self.yearly_totals(), minlength=len(self.item_ids))
+
+
+def load_grid(forecasts, year):
+    """Build a ``ForecastGrid`` for ``year`` from a queryset of ``CustomerItemForecast``"""
+    rows = list(
+        forecasts.filter(year=year).order_by('id').values_list(
+            'id', 'customer_id', 'item_id', 'confidence', 'quantities', 'unit_prices', 'actual_quantities',
+            'planned_quantities',
+        )
+    )
+    if not rows:
+        return ForecastGrid([], [], [], np.zeros((0, 12)), np.zeros((0, 12)))
+    forecast_ids, customer_ids, item_ids, confidence, quantities, unit_prices, actuals, planned = zip(*rows)
+
+    def stack(columns):
+        # One contiguous buffer per column, read as (pairs x 12) without per-row parsing.
+        return np.frombuffer(b''.join(columns), dtype=MONTH_DTYPE).reshape(-1, 12)
+
+    return ForecastGrid(
+        forecast_ids, customer_ids, item_ids, stack(quantities), stack(unit_prices), stack(actuals),
+        [CONFIDENCE_SCORES[value] for value in confidence],
+        stack([current if plan is None else plan for current, plan in zip(quantities, planned)]),
+    )
+
+
+def monthly_targets(year):
+    targets = np.zeros(12)
+    for month_index, amount in ForecastBudgetTarget.objects.filter(year=year).values_list('month_index', 'amount'):
+        targets[month_index] = float(amount)
+    return targets
+
+
+def _variance(forecast, budget):
+    variance = forecast - budget
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(budget != 0, variance / budget * 100, 0.0)
+    return variance, percentage
+
+
+def budget_impact(grid, targets, year):
+    """Monthly and yearly forecast-vs-budget impact, as ``getBudgetImpactAnalysis``"""
+    forecast = grid.monthly_totals()
+    variance, percentage = _variance(forecast, targets)
+    total_forecast, total_budget = float(forecast.sum()), float(targets.sum())
+    yearly_variance, yearly_percentage = _variance(np.float64(total_forecast), np.float64(total_budget))
+
+    monthly = [
+        {
+            'month': MONTHS[index],
+            'year': year,
+            'original_budget': float(targets[index]),
+            'forecast_impact': float(forecast[index]),
+            'new_projected_budget': float(targets[index] + variance[index]),
+            'variance': float(variance[index]),
+            'variance_percentage': float(percentage[index]),
+        }
+        for index in range(12)
+    ]
+    return {
+        'monthly': monthly,
+        'yearly': {
+            'month': 'YEARLY',
+            'year': year,
+            'original_budget': total_budget,
+            'forecast_impact': total_forecast,
+            'new_projected_budget': total_budget + float(yearly_variance),
+            'variance': float(yearly_variance),
+            'variance_percentage': float(yearly_percentage),
+        },
+        'summary': {
+            'total_forecast': total_forecast,
+            'total_budget': total_budget,
+            'overall_variance': float(yearly_variance),
+            'overall_variance_percentage': float(yearly_percentage),
+            'months_over_budget': int((variance > 0).sum()),
+            'months_under_budget': int((variance < 0).sum()),
+        },
+    }
+
+
+def _top(totals, limit):
+    """Indices of the ``limit`` largest totals, largest first, without a full sort"""
+    if len(totals) > limit:
+        candidates = np.argpartition(-totals, limit)[:limit]
+    else:
+        candidates = np.arange(len(totals))
+    return candidates[np.argsort(-totals[candidates], kind='stable')]
+
+
+def yearly_summary(grid, targets, year, customer_names, item_categories, limit=5):
+    """Totals, top customers and top categories, as ``generateYearlyForecastSummary``"""
+    yearly = grid.yearly_totals()
+    customer_totals = grid.customer_totals()
+
+    # Categories are resolved per item, then broadcast to pairs by index.
+    item_category = np.array([item_categories.get(int(item_id), '') for item_id in grid.item_ids], dtype=str)
+    category_names, item_category_idx = np.unique(item_category, return_inverse=True)
+    category_idx = item_category_idx[grid.item_idx]
+    category_totals = np.bincount(category_idx, weights=yearly, minlength=len(category_names))
+    category_counts = np.bincount(category_idx, minlength=len(category_names))
+
+    return {
+        'year': year,
+        'total_forecast': float(yearly.sum()),
+        'total_budget': float(targets.sum()),
+        'customer_count': len(grid.customer_ids),
+        'item_count': len(grid.item_ids),
+        'forecast_count': len(grid),
+        'avg_confidence': round(float(grid.confidence.mean()) * 33.33) if len(grid) else 0,
+        'top_customers': [
+            {
+                'customer_id': int(grid.customer_ids[index]),
+                'customer_name': customer_names.get(int(grid.customer_ids[index]), 'Unknown'),
+                'forecast_value': float(customer_totals[index]),
+            }
+            for index in _top(customer_totals, limit)
+        ],
+        'top_categories': [
+            {
+                'category': category_names[index],
+                'forecast_value': float(category_totals[index]),
+                'item_count': int(category_counts[index]),
+            }
+            for index in _top(category_totals, limit)
+        ],
+    }
+
+
+def reforecast_remaining(grid, as_of_month):
+    """
+    Re-forecast months ``as_of_month``..Dec from the run-rate of elapsed months.
+
+    Each pair's remaining planned quantities are scaled by actual / planned
+    over the months before ``as_of_month`` that have actuals (clipped to
+    ``RUN_RATE_BOUNDS``). Pairs without actuals keep their plan. Both sides
+    use the plan from before any earlier re-forecast, so running it again on
+    the same actuals gives the same quantities. Returns the new quantity
+    array; ``grid`` is not modified.
+    """
+    elapsed = slice(0, as_of_month)
+    reported = ~np.isnan(grid.actual_quantity[:, elapsed])
+    actual = np.where(reported, grid.actual_quantity[:, elapsed], 0.0).sum(axis=1)
+    planned = np.where(reported, grid.planned_quantity[:, elapsed], 0.0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        run_rate = np.where(planned > 0, actual / planned, 1.0)
+    run_rate = np.clip(run_rate, *RUN_RATE_BOUNDS)
+    run_rate[~reported.any(axis=1)] = 1.0
+
+    quantity = grid.quantity.copy()
+    quantity[:, as_of_month:] = grid.planned_quantity[:, as_of_month:] * run_rate[:, np.newaxis]
+    return np.round(quantity, 2)
+
+
+def _to_decimal(value):
+    return Decimal(f'{value:.2f}')
+
+
+def save_reforecast(grid, quantity, as_of_month):
+    """
+    Write re-forecast quantities and yearly totals for the pairs that changed,
+    keeping the plan they were scaled from
+    """
+    changed = np.flatnonzero((quantity[:, as_of_month:] != grid.quantity[:, as_of_month:]).any(axis=1))
+    if not len(changed):
+        return 0
+    yearly = (quantity * grid.unit_price).sum(axis=1)
+
+    now = timezone.now()
+    with transaction.atomic():
+        CustomerItemForecast.objects.bulk_update([
+            CustomerItemForecast(
+                pk=int(grid.forecast_ids[row]), quantities=pack_months(quantity[row]),
+                planned_quantities=pack_months(grid.planned_quantity[row]),
+                yearly_total=_to_decimal(yearly[row]), status='revised', updated_at=now,
+            )
+            for row in changed
+        ], ['quantities', 'planned_quantities', 'yearly_total', 'status', 'updated_at'], batch_size=1000)
+    forecasts_bulk_updated.send(
+        CustomerItemForecast, customer_ids=set(grid.customer_ids[grid.customer_idx[changed]].tolist())
+    )
+    return len(changed)
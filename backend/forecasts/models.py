@@ -0,0 +1,409 @@
+import numpy as np
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.validators import MinValueValidator, MaxValueValidator
+from decimal import Decimal
+
+User = get_user_model()
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Monthly values are stored packed: 12 little-endian float64s per column.
+MONTH_DTYPE = np.dtype('<f8')
+
+
+def pack_months(values):
+    return np.asarray(values, dtype=MONTH_DTYPE).reshape(12).tobytes()
+
+
+def unpack_months(packed):
+    """Read-only NumPy view over a packed column, without copying it"""
+    return np.frombuffer(packed, dtype=MONTH_DTYPE, count=12)
+
+
+EMPTY_MONTHS = pack_months(np.zeros(12))
+UNSET_MONTHS = pack_months(np.full(12, np.nan))
+UNREPORTED_MONTHS = UNSET_MONTHS
+
+
+class Customer(models.Model):
+    """Customer that forecasts are made for"""
+    SEASONALITY_CHOICES = [
+        ('high', 'High'),
+        ('medium', 'Medium'),
+        ('low', 'Low'),
+    ]
+    TIER_CHOICES = [
+        ('platinum', 'Platinum'),
+        ('gold', 'Gold'),
+        ('silver', 'Silver'),
+        ('bronze', 'Bronze'),
+    ]
+
+    name = models.CharField(max_length=200)
+    code = models.CharField(max_length=50, unique=True)
+    email = models.EmailField(blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    region = models.CharField(max_length=100, blank=True)
+    segment = models.CharField(max_length=100, blank=True)
+    credit_limit = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    currency = models.CharField(max_length=3, default='USD')
+    active = models.BooleanField(default=True)
+    channels = models.JSONField(default=list, blank=True)
+    seasonality = models.CharField(max_length=10, choices=SEASONALITY_CHOICES, default='medium')
+    tier = models.CharField(max_length=10, choices=TIER_CHOICES, default='bronze')
+    manager = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='managed_customers'
+    )
+    last_activity = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.code})"
+
+
+class Item(models.Model):
+    """Sellable item that forecasts are made for"""
+    sku = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=200)
+    category = models.CharField(max_length=100, blank=True)
+    brand = models.CharField(max_length=100, blank=True)
+    unit_price = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    cost_price = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    currency = models.CharField(max_length=3, default='USD')
+    unit = models.CharField(max_length=20, blank=True)
+    active = models.BooleanField(default=True)
+    description = models.TextField(blank=True)
+    seasonal = models.BooleanField(default=False)
+    seasonal_months = models.JSONField(default=list, blank=True)
+    min_order_quantity = models.PositiveIntegerField(default=1)
+    lead_time = models.PositiveIntegerField(default=0)  # days
+    supplier = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.sku})"
+
+
+class CustomerItemForecast(models.Model):
+    """
+    A customer's forecast for one item over one year.
+
+    The twelve monthly quantities, unit prices and reported actuals live in
+    packed binary columns on this row rather than in one row per month, so a
+    year is a single row and loads straight into NumPy.
+    """
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('submitted', 'Submitted'),
+        ('approved', 'Approved'),
+        ('revised', 'Revised'),
+    ]
+    CONFIDENCE_CHOICES = [
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('high', 'High'),
+    ]
+
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='forecasts')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='forecasts')
+    year = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    confidence = models.CharField(max_length=10, choices=CONFIDENCE_CHOICES, default='medium')
+    quantities = models.BinaryField(default=EMPTY_MONTHS)
+    unit_prices = models.BinaryField(default=EMPTY_MONTHS)
+    actual_quantities = models.BinaryField(default=UNREPORTED_MONTHS)  # NaN until reported
+    # Quantities as planned, before any re-forecast rescaled them; NULL when never re-forecast
+    planned_quantities = models.BinaryField(null=True, blank=True)
+    monthly_notes = models.JSONField(default=dict, blank=True)  # {month_index: note}
+    yearly_total = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    notes = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='forecasts')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['customer__name', 'item__name']
+        unique_together = ['customer', 'item', 'year']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['year', 'customer']),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.name} - {self.item.name} ({self.year})"
+
+    def save(self, *args, **kwargs):
+        # Auto-calculate yearly total
+        self.yearly_total = Decimal(f'{float(self.monthly_values.sum()):.2f}')
+        super().save(*args, **kwargs)
+
+    @property
+    def quantity_array(self):
+        return unpack_months(self.quantities)
+
+    @property
+    def unit_price_array(self):
+        return unpack_months(self.unit_prices)
+
+    @property
+    def actual_quantity_array(self):
+        return unpack_months(self.actual_quantities)
+
+    @property
+    def monthly_values(self):
+        return self.quantity_array * self.unit_price_array
+
+    @property
+    def monthly_forecasts(self):
+        """Per-month view matching the frontend's ``MonthlyForecast`` objects"""
+        values = self.monthly_values
+        return [
+            {
+                'month': MONTHS[index],
+                'month_index': index,
+                'quantity': self.quantity_array[index],
+                'unit_price': self.unit_price_array[index],
+                'total_value': values[index],
+                'actual_quantity': None if np.isnan(actual) else actual,
+                'notes': self.monthly_notes.get(str(index), ''),
+            }
+            for index, actual in enumerate(self.actual_quantity_array)
+        ]
+
+    def set_months(self, quantity=None, unit_price=None, actual_quantity=None):
+        if quantity is not None:
+            packed = pack_months(quantity)
+            if packed != bytes(self.quantities):
+                # Entered quantities are the new plan re-forecasts start from
+                self.planned_quantities = None
+            self.quantities = packed
+        if unit_price is not None:
+            self.unit_prices = pack_months(unit_price)
+        if actual_quantity is not None:
+            self.actual_quantities = pack_months(actual_quantity)
+
+
+class ForecastBudgetTarget(models.Model):
+    """Monthly sales budget target the forecasts are compared against"""
+    year = models.PositiveIntegerField()
+    month_index = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(0), MaxValueValidator(11)]
+    )
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['year', 'month_index']
+        unique_together = ['year', 'month_index']
+
+    def __str__(self):
+        return f"{MONTHS[self.month_index]} {self.year}: {self.amount}"
+
+
+class ForecastRecompute(models.Model):
+    """
+    A re-forecast of every forecast in a year, run as one task per
+    customer segment/region shard.
+
+    Only one recompute per year can be pending or running; see
+    ``forecasts.tasks.schedule_recompute`` for how new requests coalesce with
+    or cancel the active one.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    year = models.PositiveIntegerField()
+    as_of_month = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(11)]
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    shards = models.JSONField(default=list, blank=True)  # [[segment, region], ...]
+    shards_total = models.PositiveIntegerField(default=0)
+    shards_done = models.PositiveIntegerField(default=0)
+    forecasts_updated = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='forecast_recomputes'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['year'], condition=models.Q(status__in=['pending', 'running']),
+                name='one_active_forecast_recompute_per_year',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Recompute {self.year} from {MONTHS[self.as_of_month]} ({self.status})"
+
+    @property
+    def progress(self):
+        if not self.shards_total:
+            return 100.0 if self.status == self.STATUS_COMPLETED else 0.0
+        return round(self.shards_done / self.shards_total * 100, 1)
+
+
+class ForecastScenario(models.Model):
+    """
+    A what-if version of one year's forecasts.
+
+    The scenario does not copy the forecasts. It holds optional volume/price
+    adjustments applied to every pair plus per-cell overrides
+    (``ForecastScenarioOverride``), and is resolved by overlaying those on the
+    live forecasts, which act as its base.
+    """
+    TYPE_CHOICES = [
+        ('optimistic', 'Optimistic'),
+        ('realistic', 'Realistic'),
+        ('pessimistic', 'Pessimistic'),
+        ('custom', 'Custom'),
+    ]
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('promoted', 'Promoted'),
+    ]
+
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    scenario_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='custom')
+    year = models.PositiveIntegerField()
+    probability = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(100)]
+    )
+    # Percentage adjustments applied to every pair before cell overrides.
+    volume_change = models.DecimalField(
+        max_digits=7, decimal_places=2, default=Decimal('0.00'),
+        validators=[MinValueValidator(-100)]
+    )
+    price_change = models.DecimalField(
+        max_digits=7, decimal_places=2, default=Decimal('0.00'),
+        validators=[MinValueValidator(-100)]
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    promoted_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='forecast_scenarios')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['year', 'name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.year})"
+
+    @property
+    def quantity_factor(self):
+        return 1 + float(self.volume_change) / 100
+
+    @property
+    def price_factor(self):
+        return 1 + float(self.price_change) / 100
+
+
+class ForecastScenarioOverride(models.Model):
+    """Cells a scenario overrides on one forecast; NaN months keep the base value"""
+    scenario = models.ForeignKey(ForecastScenario, on_delete=models.CASCADE, related_name='overrides')
+    forecast = models.ForeignKey(CustomerItemForecast, on_delete=models.CASCADE, related_name='scenario_overrides')
+    quantities = models.BinaryField(default=UNSET_MONTHS)
+    unit_prices = models.BinaryField(default=UNSET_MONTHS)
+
+    class Meta:
+        unique_together = ['scenario', 'forecast']
+
+    def __str__(self):
+        return f"{self.scenario} - forecast {self.forecast_id}"
+
+    @property
+    def quantity_array(self):
+        return unpack_months(self.quantities)
+
+    @property
+    def unit_price_array(self):
+        return unpack_months(self.unit_prices)
+
+
+class ForecastSnapshot(models.Model):
+    """
+    A forecast's monthly values as they stood at ``taken_at``.
+
+    Backtesting scores each month against the last snapshot taken before that
+    month began, i.e. what was actually forecast ahead of time.
+    """
+    forecast = models.ForeignKey(CustomerItemForecast, on_delete=models.CASCADE, related_name='snapshots')
+    taken_at = models.DateTimeField()
+    values = models.BinaryField()  # packed monthly quantity x unit price
+
+    class Meta:
+        ordering = ['-taken_at']
+        indexes = [models.Index(fields=['forecast', 'taken_at'])]
+
+    def __str__(self):
+        return f"{self.forecast} @ {self.taken_at:%Y-%m-%d}"
+
+    @property
+    def value_array(self):
+        return unpack_months(self.values)
+
+
+class ForecastAccuracy(models.Model):
+    """Backtest error metrics for one year, per salesman, customer, item or month"""
+    DIMENSION_CHOICES = [
+        ('overall', 'Overall'),
+        ('salesman', 'Salesman'),
+        ('customer', 'Customer'),
+        ('item', 'Item'),
+        ('month', 'Month'),
+    ]
+
+    year = models.PositiveIntegerField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.PositiveIntegerField(null=True, blank=True)  # user/customer/item id or month index
+    label = models.CharField(max_length=200, blank=True)
+    observations = models.PositiveIntegerField(default=0)
+    mape = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    bias = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)  # % over (+) / under (-)
+    mae = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    forecast_total = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    actual_total = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['year', 'dimension', 'key']
+        unique_together = ['year', 'dimension', 'key']
+        indexes = [models.Index(fields=['dimension', 'year'])]
+        verbose_name_plural = 'forecast accuracy'
+
+    def __str__(self):
+        return f"{self.get_dimension_display()} {self.label or self.key} ({self.year}): MAPE {self.mape}"
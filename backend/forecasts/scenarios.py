@@ -0,0 +1,198 @@
+"""
+Copy-on-write forecast scenarios.
+
+A scenario stores only what differs from the live forecasts: a volume and
+price adjustment for every pair, plus the individual cells it overrides. Reads
+overlay those on a base ``ForecastGrid``; comparisons compute every scenario's
+monthly totals from the base totals and the overridden rows alone, so the cost
+grows with the number of overrides rather than scenarios x pairs.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .engine import _to_decimal, _variance
+from .models import MONTHS, MONTH_DTYPE, CustomerItemForecast, ForecastScenarioOverride, pack_months
+from .signals import forecasts_bulk_updated
+
+
+class ScenarioOverlay:
+    """Overridden rows of several scenarios, aligned to a grid's pair rows"""
+
+    def __init__(self, scenario_idx, rows, quantity, unit_price):
+        self.scenario_idx = scenario_idx
+        self.rows = rows
+        self.quantity = quantity
+        self.unit_price = unit_price
+
+    def __len__(self):
+        return len(self.rows)
+
+    def select(self, index):
+        mask = self.scenario_idx == index
+        return self.rows[mask], self.quantity[mask], self.unit_price[mask]
+
+
+def load_overlay(grid, scenarios):
+    """Load the overrides of ``scenarios`` for the pairs present in ``grid``"""
+    positions = {scenario.pk: index for index, scenario in enumerate(scenarios)}
+    overrides = list(
+        ForecastScenarioOverride.objects.filter(scenario_id__in=positions)
+        .order_by('scenario_id', 'forecast_id')
+        .values_list('scenario_id', 'forecast_id', 'quantities', 'unit_prices')
+    )
+    if not overrides or not len(grid):
+        empty = np.zeros((0, 12))
+        return ScenarioOverlay(np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), empty, empty)
+
+    scenario_ids, forecast_ids, quantities, unit_prices = zip(*overrides)
+    forecast_ids = np.array(forecast_ids, dtype=np.int64)
+    rows = np.minimum(np.searchsorted(grid.forecast_ids, forecast_ids), len(grid) - 1)
+    # Overrides on forecasts outside the grid (other years, out of scope) are dropped.
+    present = grid.forecast_ids[rows] == forecast_ids
+
+    def stack(columns):
+        return np.frombuffer(b''.join(columns), dtype=MONTH_DTYPE).reshape(-1, 12)[present]
+
+    return ScenarioOverlay(
+        np.array([positions[pk] for pk in scenario_ids], dtype=np.intp)[present],
+        rows[present], stack(quantities), stack(unit_prices),
+    )
+
+
+def resolve(grid, scenario, overlay, index=0):
+    """Full (pairs x 12) quantity and unit price arrays of one scenario"""
+    quantity = grid.quantity * scenario.quantity_factor
+    unit_price = grid.unit_price * scenario.price_factor
+    rows, override_quantity, override_price = overlay.select(index)
+    quantity[rows] = np.where(np.isnan(override_quantity), quantity[rows], override_quantity)
+    unit_price[rows] = np.where(np.isnan(override_price), unit_price[rows], override_price)
+    return quantity, unit_price
+
+
+def compare(grid, scenarios, overlay, targets):
+    """Monthly and yearly totals of the base and each scenario, side by side"""
+    base_monthly = grid.monthly_totals()
+    quantity_factor = np.array([scenario.quantity_factor for scenario in scenarios])
+    price_factor = np.array([scenario.price_factor for scenario in scenarios])
+
+    # Adjustments scale every pair, so unmodified totals scale with them.
+    monthly = (quantity_factor * price_factor)[:, np.newaxis] * base_monthly
+    if len(overlay):
+        scaled_quantity = grid.quantity[overlay.rows] * quantity_factor[overlay.scenario_idx, np.newaxis]
+        scaled_price = grid.unit_price[overlay.rows] * price_factor[overlay.scenario_idx, np.newaxis]
+        quantity = np.where(np.isnan(overlay.quantity), scaled_quantity, overlay.quantity)
+        unit_price = np.where(np.isnan(overlay.unit_price), scaled_price, overlay.unit_price)
+        np.add.at(monthly, overlay.scenario_idx, quantity * unit_price - scaled_quantity * scaled_price)
+
+    yearly = monthly.sum(axis=1)
+    base_yearly = float(base_monthly.sum())
+    variance, percentage = _variance(yearly, np.float64(base_yearly))
+    budget_variance, budget_percentage = _variance(yearly, np.float64(targets.sum()))
+    override_counts = np.bincount(overlay.scenario_idx, minlength=len(scenarios))
+
+    return {
+        'months': MONTHS,
+        'base': {
+            'monthly': base_monthly.tolist(),
+            'total_forecast': base_yearly,
+        },
+        'total_budget': float(targets.sum()),
+        'scenarios': [
+            {
+                'id': scenario.pk,
+                'name': scenario.name,
+                'scenario_type': scenario.scenario_type,
+                'probability': float(scenario.probability) if scenario.probability is not None else None,
+                'monthly': monthly[index].tolist(),
+                'total_forecast': float(yearly[index]),
+                'variance': float(variance[index]),
+                'variance_percentage': float(percentage[index]),
+                'budget_variance': float(budget_variance[index]),
+                'budget_variance_percentage': float(budget_percentage[index]),
+                'overridden_forecasts': int(override_counts[index]),
+            }
+            for index, scenario in enumerate(scenarios)
+        ],
+    }
+
+
+def apply_cells(scenario, cells):
+    """
+    Set or clear override cells, given as dicts of ``forecast``,
+    ``month_index`` and optional ``quantity`` / ``unit_price`` (``None``
+    clears the cell). Rows left with no overridden cell are deleted.
+    """
+    existing = {
+        override.forecast_id: override
+        for override in ForecastScenarioOverride.objects.filter(
+            scenario=scenario, forecast_id__in={cell['forecast'] for cell in cells}
+        )
+    }
+    arrays = {
+        forecast_id: [override.quantity_array.copy(), override.unit_price_array.copy()]
+        for forecast_id, override in existing.items()
+    }
+    for cell in cells:
+        quantity, unit_price = arrays.setdefault(
+            cell['forecast'], [np.full(12, np.nan), np.full(12, np.nan)]
+        )
+        for array, field in ((quantity, 'quantity'), (unit_price, 'unit_price')):
+            if field in cell:
+                array[cell['month_index']] = np.nan if cell[field] is None else cell[field]
+
+    created, updated, cleared = [], [], []
+    for forecast_id, (quantity, unit_price) in arrays.items():
+        override = existing.get(forecast_id)
+        if np.isnan(quantity).all() and np.isnan(unit_price).all():
+            if override is not None:
+                cleared.append(override.pk)
+            continue
+        if override is None:
+            override = ForecastScenarioOverride(scenario=scenario, forecast_id=forecast_id)
+            created.append(override)
+        else:
+            updated.append(override)
+        override.quantities = pack_months(quantity)
+        override.unit_prices = pack_months(unit_price)
+
+    with transaction.atomic():
+        ForecastScenarioOverride.objects.filter(pk__in=cleared).delete()
+        ForecastScenarioOverride.objects.bulk_create(created, batch_size=1000)
+        ForecastScenarioOverride.objects.bulk_update(updated, ['quantities', 'unit_prices'], batch_size=1000)
+    return len(created) + len(updated)
+
+
+def promote(grid, scenario, overlay):
+    """
+    Make ``scenario`` the new baseline: write its resolved values onto the
+    forecasts that differ, then drop its overrides. Other scenarios keep
+    their deltas, which now apply on top of the promoted values.
+    """
+    quantity, unit_price = (np.round(values, 2) for values in resolve(grid, scenario, overlay))
+    changed = np.flatnonzero(
+        ((quantity != grid.quantity) | (unit_price != grid.unit_price)).any(axis=1)
+    )
+    yearly = (quantity * unit_price).sum(axis=1)
+
+    now = timezone.now()
+    with transaction.atomic():
+        # The promoted values are the new plan that re-forecasts start from
+        fields = ['quantities', 'unit_prices', 'planned_quantities', 'yearly_total', 'status', 'updated_at']
+        CustomerItemForecast.objects.bulk_update([
+            CustomerItemForecast(
+                pk=int(grid.forecast_ids[row]),
+                quantities=pack_months(quantity[row]), unit_prices=pack_months(unit_price[row]),
+                planned_quantities=None, yearly_total=_to_decimal(yearly[row]), status='revised', updated_at=now,
+            )
+            for row in changed
+        ], fields, batch_size=1000)
+        scenario.overrides.all().delete()
+        scenario.status = 'promoted'
+        scenario.promoted_at = now
+        scenario.volume_change = scenario.price_change = 0
+        scenario.save(update_fields=['status', 'promoted_at', 'volume_change', 'price_change', 'updated_at'])
+    forecasts_bulk_updated.send(
+        CustomerItemForecast, customer_ids=set(grid.customer_ids[grid.customer_idx[changed]].tolist())
+    )
+    return len(changed)
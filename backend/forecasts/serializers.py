@@ -0,0 +1,162 @@
+import numpy as np
+from rest_framework import serializers
+from .models import (
+    Customer, Item, CustomerItemForecast, ForecastBudgetTarget, ForecastRecompute,
+    ForecastScenario, ForecastAccuracy
+)
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = [
+            'id', 'name', 'code', 'email', 'phone', 'region', 'segment', 'credit_limit',
+            'currency', 'active', 'channels', 'seasonality', 'tier', 'manager',
+            'last_activity', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class ItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Item
+        fields = [
+            'id', 'sku', 'name', 'category', 'brand', 'unit_price', 'cost_price', 'currency',
+            'unit', 'active', 'description', 'seasonal', 'seasonal_months',
+            'min_order_quantity', 'lead_time', 'supplier', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class MonthlyForecastSerializer(serializers.Serializer):
+    month = serializers.CharField(read_only=True)
+    month_index = serializers.IntegerField(min_value=0, max_value=11)
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=2)
+    unit_price = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_value = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+    actual_quantity = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True, required=False)
+    notes = serializers.CharField(allow_blank=True, required=False)
+
+
+class CustomerItemForecastSerializer(serializers.ModelSerializer):
+    monthly_forecasts = MonthlyForecastSerializer(many=True, required=False)
+    customer_name = serializers.CharField(source='customer.name', read_only=True)
+    item_name = serializers.CharField(source='item.name', read_only=True)
+
+    class Meta:
+        model = CustomerItemForecast
+        fields = [
+            'id', 'customer', 'customer_name', 'item', 'item_name', 'year',
+            'monthly_forecasts', 'yearly_total', 'status', 'confidence', 'notes',
+            'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'yearly_total', 'created_by', 'created_at', 'updated_at']
+
+    def validate_monthly_forecasts(self, value):
+        month_indexes = [month['month_index'] for month in value]
+        if len(month_indexes) != len(set(month_indexes)):
+            raise serializers.ValidationError('Each month may only appear once.')
+        return value
+
+    def _set_months(self, forecast, months_data):
+        """Replace the packed monthly arrays; months not sent are cleared"""
+        quantity, unit_price = np.zeros(12), np.zeros(12)
+        actual_quantity = np.full(12, np.nan)
+        notes = {}
+        for month in months_data:
+            index = month['month_index']
+            quantity[index] = month['quantity']
+            unit_price[index] = month['unit_price']
+            if month.get('actual_quantity') is not None:
+                actual_quantity[index] = month['actual_quantity']
+            if month.get('notes'):
+                notes[str(index)] = month['notes']
+        forecast.set_months(quantity, unit_price, actual_quantity)
+        forecast.monthly_notes = notes
+
+    def create(self, validated_data):
+        months_data = validated_data.pop('monthly_forecasts', [])
+        forecast = CustomerItemForecast(**validated_data)
+        self._set_months(forecast, months_data)
+        forecast.save()
+        return forecast
+
+    def update(self, instance, validated_data):
+        months_data = validated_data.pop('monthly_forecasts', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        if months_data is not None:
+            self._set_months(instance, months_data)
+        instance.save()
+        return instance
+
+
+class ForecastBudgetTargetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ForecastBudgetTarget
+        fields = ['id', 'year', 'month_index', 'amount', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class ReforecastSerializer(serializers.Serializer):
+    year = serializers.IntegerField()
+    as_of_month = serializers.IntegerField(min_value=1, max_value=11)
+
+
+class ForecastRecomputeSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ForecastRecompute
+        fields = [
+            'id', 'year', 'as_of_month', 'status', 'shards_total', 'shards_done', 'progress',
+            'forecasts_updated', 'error', 'requested_by', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'shards_total', 'shards_done', 'forecasts_updated', 'error',
+            'requested_by', 'created_at', 'started_at', 'finished_at'
+        ]
+
+
+class ForecastScenarioSerializer(serializers.ModelSerializer):
+    override_count = serializers.IntegerField(source='overrides.count', read_only=True)
+
+    class Meta:
+        model = ForecastScenario
+        fields = [
+            'id', 'name', 'description', 'scenario_type', 'year', 'probability',
+            'volume_change', 'price_change', 'status', 'promoted_at', 'override_count',
+            'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'status', 'promoted_at', 'created_by', 'created_at', 'updated_at']
+
+
+class ScenarioCellSerializer(serializers.Serializer):
+    """One overridden cell; omit a value to leave it, send null to clear it"""
+    forecast = serializers.IntegerField()
+    month_index = serializers.IntegerField(min_value=0, max_value=11)
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True, required=False)
+    unit_price = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True, required=False)
+
+    def validate(self, attrs):
+        if 'quantity' not in attrs and 'unit_price' not in attrs:
+            raise serializers.ValidationError('Provide a quantity or unit_price.')
+        return attrs
+
+
+class ScenarioCellBatchSerializer(serializers.Serializer):
+    cells = ScenarioCellSerializer(many=True, allow_empty=False)
+
+
+class ForecastAccuracySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ForecastAccuracy
+        fields = [
+            'id', 'year', 'dimension', 'key', 'label', 'observations', 'mape', 'bias', 'mae',
+            'forecast_total', 'actual_total', 'computed_at'
+        ]
+        read_only_fields = fields
+
+
+class BacktestSerializer(serializers.Serializer):
+    years = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after bulk writes that bypass post_save, with the ids of the customers
+# whose forecasts changed: forecasts_bulk_updated.send(sender, customer_ids=...)
+forecasts_bulk_updated = Signal()
@@ -0,0 +1,136 @@
+"""
+Background re-forecasting.
+
+A recompute is split into shards, one per customer segment and region. Each
+shard is a Celery task that loads only its own pairs into a ``ForecastGrid``,
+re-forecasts them and bulk-writes the result. Shards run in parallel across
+the workers, so no request thread waits on a full year.
+"""
+import logging
+
+from celery import group, shared_task
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import backtest, engine
+from .models import Customer, CustomerItemForecast, ForecastRecompute
+
+logger = logging.getLogger(__name__)
+
+
+def recompute_shards(year):
+    """Distinct ``[segment, region]`` pairs of customers with forecasts in ``year``"""
+    return [
+        list(shard) for shard in
+        Customer.objects.filter(forecasts__year=year)
+        .values_list('segment', 'region').distinct().order_by('segment', 'region')
+    ]
+
+
+def _schedule(year, as_of_month, user):
+    with transaction.atomic():
+        active = (
+            ForecastRecompute.objects.select_for_update()
+            .filter(year=year, status__in=ForecastRecompute.ACTIVE_STATUSES).first()
+        )
+        if active:
+            if active.as_of_month == as_of_month:
+                return active, False
+            cancel_recompute(active)
+
+        shards = recompute_shards(year)
+        recompute = ForecastRecompute.objects.create(
+            year=year, as_of_month=as_of_month, requested_by=user,
+            shards=shards, shards_total=len(shards),
+        )
+        if shards:
+            transaction.on_commit(lambda: dispatch_recompute(recompute))
+        else:
+            recompute.status = ForecastRecompute.STATUS_COMPLETED
+            recompute.finished_at = timezone.now()
+            recompute.save(update_fields=['status', 'finished_at'])
+        return recompute, True
+
+
+def schedule_recompute(year, as_of_month, user=None):
+    """
+    Start a recompute of ``year``, or reuse the one already active.
+
+    A request with the same ``as_of_month`` as the active recompute joins it.
+    A different ``as_of_month`` cancels the active one, so its remaining shards
+    exit without writing, and starts a replacement. Returns
+    ``(recompute, created)``.
+    """
+    try:
+        return _schedule(year, as_of_month, user)
+    except IntegrityError:
+        # A concurrent request created the active recompute first; join or replace it.
+        return _schedule(year, as_of_month, user)
+
+
+def cancel_recompute(recompute):
+    """Cancel an active recompute; returns False if it had already finished"""
+    return bool(
+        ForecastRecompute.objects.filter(pk=recompute.pk, status__in=ForecastRecompute.ACTIVE_STATUSES)
+        .update(status=ForecastRecompute.STATUS_CANCELLED, finished_at=timezone.now())
+    )
+
+
+def dispatch_recompute(recompute):
+    group(
+        recompute_shard.s(recompute.pk, segment, region) for segment, region in recompute.shards
+    ).apply_async()
+
+
+def _record_shard(recompute_id, updated):
+    ForecastRecompute.objects.filter(pk=recompute_id).update(
+        shards_done=F('shards_done') + 1, forecasts_updated=F('forecasts_updated') + updated
+    )
+    ForecastRecompute.objects.filter(pk=recompute_id, shards_done=F('shards_total')).update(
+        status=ForecastRecompute.STATUS_COMPLETED, finished_at=timezone.now()
+    )
+
+
+@shared_task(ignore_result=True)
+def recompute_shard(recompute_id, segment, region):
+    """Re-forecast one segment/region shard of a recompute"""
+    active = ForecastRecompute.objects.filter(pk=recompute_id, status__in=ForecastRecompute.ACTIVE_STATUSES)
+    recompute = active.first()
+    if recompute is None:
+        return 0
+    active.filter(status=ForecastRecompute.STATUS_PENDING).update(
+        status=ForecastRecompute.STATUS_RUNNING, started_at=timezone.now()
+    )
+
+    try:
+        with transaction.atomic():
+            # Lock the recompute so a cancel cannot land between this check and the write.
+            if not active.select_for_update().exists():
+                return 0
+            # Lock the shard's forecasts from the read to the write, so an edit
+            # saved meanwhile waits for the recompute instead of being overwritten.
+            grid = engine.load_grid(
+                CustomerItemForecast.objects.select_for_update(of=('self',))
+                .filter(customer__segment=segment, customer__region=region),
+                recompute.year,
+            )
+            quantity = engine.reforecast_remaining(grid, recompute.as_of_month)
+            updated = engine.save_reforecast(grid, quantity, recompute.as_of_month)
+            _record_shard(recompute_id, updated)
+    except Exception as exc:
+        logger.exception('Forecast recompute %s failed on shard %s/%s', recompute_id, segment, region)
+        active.update(status=ForecastRecompute.STATUS_FAILED, error=str(exc), finished_at=timezone.now())
+        raise
+    return updated
+
+
+@shared_task(ignore_result=True)
+def snapshot_forecasts():
+    """Snapshot every forecast; scheduled at the start of each month for backtesting"""
+    return backtest.take_snapshots()
+
+
+@shared_task(ignore_result=True)
+def run_backtest(years=None):
+    return backtest.run_backtest(years)
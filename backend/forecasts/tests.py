@@ -0,0 +1,75 @@
+import numpy as np
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import User, UserType
+from . import engine
+from .models import Customer, CustomerItemForecast, ForecastRecompute, Item
+from .tasks import recompute_shard
+
+
+class ReforecastTests(TestCase):
+    """Re-forecasting twice on the same actuals must not compound the run-rate"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('admin', 'admin@example.com', 'pw', user_type=UserType.ADMIN)
+        customer = Customer.objects.create(name='Acme', code='ACME', segment='retail', region='north')
+        item = Item.objects.create(sku='W-1', name='Widget')
+        actual = np.full(12, np.nan)
+        actual[:3] = 15  # 1.5x the plan in Jan-Mar
+        self.forecast = CustomerItemForecast(customer=customer, item=item, year=2026, created_by=self.user)
+        self.forecast.set_months(np.full(12, 10.0), np.full(12, 2.0), actual)
+        self.forecast.save()
+
+    def quantities(self):
+        self.forecast.refresh_from_db()
+        return self.forecast.quantity_array.tolist()
+
+    def reforecast(self):
+        grid = engine.load_grid(CustomerItemForecast.objects.all(), 2026)
+        return engine.save_reforecast(grid, engine.reforecast_remaining(grid, 3), 3)
+
+    def test_engine_is_idempotent(self):
+        self.assertEqual(self.reforecast(), 1)
+        expected = [10.0] * 3 + [15.0] * 9
+        self.assertEqual(self.quantities(), expected)
+        self.assertEqual(self.reforecast(), 0)
+        self.assertEqual(self.quantities(), expected)
+
+    def test_endpoint_is_idempotent(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for updated in (1, 0, 0):
+            response = client.post(
+                '/api/forecasts/forecasts/reforecast/', {'year': 2026, 'as_of_month': 3}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['updated'], updated)
+        self.assertEqual(self.quantities(), [10.0] * 3 + [15.0] * 9)
+
+    def test_recompute_shards_are_idempotent(self):
+        for _ in range(2):
+            recompute = ForecastRecompute.objects.create(year=2026, as_of_month=3)
+            recompute_shard(recompute.pk, 'retail', 'north')
+            recompute.status = ForecastRecompute.STATUS_COMPLETED
+            recompute.save()
+        self.assertEqual(self.quantities(), [10.0] * 3 + [15.0] * 9)
+
+    def test_later_actuals_rescale_the_plan(self):
+        self.reforecast()
+        self.forecast.refresh_from_db()
+        actual = self.forecast.actual_quantity_array.copy()
+        actual[3:6] = 5  # Apr-Jun at half the plan: 60 / 60 over Jan-Jun
+        self.forecast.set_months(actual_quantity=actual)
+        self.forecast.save()
+        grid = engine.load_grid(CustomerItemForecast.objects.all(), 2026)
+        engine.save_reforecast(grid, engine.reforecast_remaining(grid, 6), 6)
+        self.assertEqual(self.quantities(), [10.0] * 3 + [15.0] * 3 + [10.0] * 6)
+
+    def test_entered_quantities_become_the_plan(self):
+        self.reforecast()
+        self.forecast.refresh_from_db()
+        self.forecast.set_months(np.full(12, 20.0))
+        self.forecast.save()
+        self.reforecast()
+        self.assertEqual(self.quantities(), [20.0] * 3 + [15.0] * 9)  # 15 / 20 run-rate
@@ -0,0 +1,19 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    CustomerViewSet, ItemViewSet, CustomerItemForecastViewSet, ForecastBudgetTargetViewSet,
+    ForecastRecomputeViewSet, ForecastScenarioViewSet, ForecastAccuracyViewSet
+)
+
+router = DefaultRouter()
+router.register(r'customers', CustomerViewSet, basename='customer')
+router.register(r'items', ItemViewSet, basename='item')
+router.register(r'forecasts', CustomerItemForecastViewSet, basename='customeritemforecast')
+router.register(r'targets', ForecastBudgetTargetViewSet, basename='forecastbudgettarget')
+router.register(r'recomputes', ForecastRecomputeViewSet, basename='forecastrecompute')
+router.register(r'scenarios', ForecastScenarioViewSet, basename='forecastscenario')
+router.register(r'accuracy', ForecastAccuracyViewSet, basename='forecastaccuracy')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,319 @@
+import numpy as np
+from rest_framework import viewsets, permissions, mixins, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import UserType, org_scope_filter
+from users.permissions import IsAdminUser
+from users.sync import DeltaSyncMixin
+from . import engine, scenarios
+from .models import (
+    Customer, Item, CustomerItemForecast, ForecastBudgetTarget, ForecastRecompute,
+    ForecastScenario, ForecastAccuracy
+)
+from .tasks import schedule_recompute, cancel_recompute, run_backtest
+from .serializers import (
+    CustomerSerializer, ItemSerializer, CustomerItemForecastSerializer,
+    ForecastBudgetTargetSerializer, ReforecastSerializer, ForecastRecomputeSerializer,
+    ForecastScenarioSerializer, ScenarioCellBatchSerializer, ForecastAccuracySerializer,
+    BacktestSerializer
+)
+
+
+def filter_forecast_scope(queryset, user, prefix=''):
+    """Restrict forecasts to those created within the user's scope"""
+    if user.user_type == UserType.ADMIN:
+        return queryset
+    elif user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+        return queryset.filter(org_scope_filter(user.org_unit_id, f'{prefix}created_by__'))
+    elif user.user_type == UserType.MANAGER:
+        return queryset.filter(**{f'{prefix}created_by__department': user.department})
+    elif user.user_type == UserType.BRANCH_MANAGER:
+        return queryset.filter(**{f'{prefix}created_by__location': user.location})
+    return queryset.filter(**{f'{prefix}created_by': user})
+
+
+class CustomerViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = Customer.objects.all()
+    serializer_class = CustomerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['region', 'segment', 'tier', 'seasonality', 'active', 'manager']
+    search_fields = ['name', 'code', 'email']
+    ordering_fields = ['name', 'code', 'credit_limit', 'created_at']
+    ordering = ['name']
+
+
+class ItemViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = Item.objects.all()
+    serializer_class = ItemSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['category', 'brand', 'active', 'seasonal', 'supplier']
+    search_fields = ['sku', 'name', 'description']
+    ordering_fields = ['name', 'sku', 'unit_price', 'created_at']
+    ordering = ['name']
+
+
+class ForecastBudgetTargetViewSet(viewsets.ModelViewSet):
+    queryset = ForecastBudgetTarget.objects.all()
+    serializer_class = ForecastBudgetTargetSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['year']
+    ordering = ['year', 'month_index']
+
+    def get_permissions(self):
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            permission_classes = [IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+
+class CustomerItemForecastViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = CustomerItemForecast.objects.select_related('customer', 'item')
+    serializer_class = CustomerItemForecastSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['customer', 'item', 'year', 'status', 'confidence']
+    search_fields = ['customer__name', 'item__name', 'item__sku']
+    ordering_fields = ['year', 'yearly_total', 'created_at', 'updated_at']
+    ordering = ['customer__name', 'item__name']
+
+    def get_queryset(self):
+        return filter_forecast_scope(super().get_queryset(), self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    def _year(self):
+        try:
+            return int(self.request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            return timezone.now().year
+
+    def _grid(self, year):
+        return engine.load_grid(self.filter_queryset(self.get_queryset()), year)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Yearly forecast summary with top customers and categories"""
+        year = self._year()
+        grid = self._grid(year)
+        customer_names = dict(Customer.objects.filter(id__in=grid.customer_ids.tolist()).values_list('id', 'name'))
+        item_categories = dict(Item.objects.filter(id__in=grid.item_ids.tolist()).values_list('id', 'category'))
+        return Response(engine.yearly_summary(
+            grid, engine.monthly_targets(year), year, customer_names, item_categories
+        ))
+
+    @action(detail=False, methods=['get'])
+    def budget_impact(self, request):
+        """Monthly and yearly forecast impact against the budget targets"""
+        year = self._year()
+        return Response(engine.budget_impact(self._grid(year), engine.monthly_targets(year), year))
+
+    @action(detail=False, methods=['post'])
+    def reforecast(self, request):
+        """Re-forecast the remaining months of a year from actuals to date"""
+        serializer = ReforecastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        year = serializer.validated_data['year']
+        as_of_month = serializer.validated_data['as_of_month']
+
+        grid = self._grid(year)
+        quantity = engine.reforecast_remaining(grid, as_of_month)
+        updated = engine.save_reforecast(grid, quantity, as_of_month)
+        return Response({'year': year, 'as_of_month': as_of_month, 'updated': updated})
+
+
+class ForecastRecomputeViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Background re-forecasts of a whole year, sharded across the Celery workers.
+
+    ``POST`` returns 202 with the recompute to poll: a new one, or the active
+    one for the year if it has the same ``as_of_month``.
+    """
+    queryset = ForecastRecompute.objects.select_related('requested_by')
+    serializer_class = ForecastRecomputeSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['year', 'status']
+    ordering = ['-created_at']
+
+    def get_permissions(self):
+        if self.action in ['create', 'cancel']:
+            permission_classes = [IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+    def create(self, request, *args, **kwargs):
+        serializer = ReforecastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recompute, created = schedule_recompute(
+            serializer.validated_data['year'], serializer.validated_data['as_of_month'], request.user
+        )
+        data = self.get_serializer(recompute).data
+        data['coalesced'] = not created
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Stop an active recompute; shards that already finished keep their writes"""
+        recompute = self.get_object()
+        if not cancel_recompute(recompute):
+            return Response({'error': 'Recompute has already finished'}, status=status.HTTP_400_BAD_REQUEST)
+        recompute.refresh_from_db()
+        return Response(self.get_serializer(recompute).data)
+
+
+class ForecastScenarioViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    """What-if scenarios stored as overrides on top of the live forecasts"""
+    queryset = ForecastScenario.objects.all()
+    serializer_class = ForecastScenarioSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['year', 'scenario_type', 'status']
+    search_fields = ['name', 'description']
+    ordering_fields = ['year', 'name', 'probability', 'created_at']
+    ordering = ['year', 'name']
+
+    def get_permissions(self):
+        if self.action == 'promote':
+            permission_classes = [IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        return filter_forecast_scope(super().get_queryset(), self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    def _forecasts(self):
+        return filter_forecast_scope(CustomerItemForecast.objects.all(), self.request.user)
+
+    def _cells(self, scenario):
+        cells = []
+        for override in scenario.overrides.order_by('forecast_id'):
+            quantity, unit_price = override.quantity_array, override.unit_price_array
+            for month_index in np.flatnonzero(~(np.isnan(quantity) & np.isnan(unit_price))):
+                cell = {'forecast': override.forecast_id, 'month_index': int(month_index)}
+                if not np.isnan(quantity[month_index]):
+                    cell['quantity'] = float(quantity[month_index])
+                if not np.isnan(unit_price[month_index]):
+                    cell['unit_price'] = float(unit_price[month_index])
+                cells.append(cell)
+        return cells
+
+    @action(detail=True, methods=['get', 'post'])
+    def overrides(self, request, pk=None):
+        """List the scenario's overridden cells, or set/clear a batch of them"""
+        scenario = self.get_object()
+        if request.method == 'GET':
+            return Response({'cells': self._cells(scenario)})
+
+        if scenario.status == 'promoted':
+            return Response({'error': 'Promoted scenarios cannot be edited'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = ScenarioCellBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cells = serializer.validated_data['cells']
+
+        forecast_ids = {cell['forecast'] for cell in cells}
+        allowed = set(
+            self._forecasts().filter(year=scenario.year, pk__in=forecast_ids).values_list('id', flat=True)
+        )
+        if forecast_ids - allowed:
+            return Response(
+                {'error': 'Unknown forecasts for this scenario year', 'forecasts': sorted(forecast_ids - allowed)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = scenarios.apply_cells(scenario, cells)
+        return Response({'overridden_forecasts': scenario.overrides.count(), 'written': rows})
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """Yearly summary and budget impact of the scenario's resolved forecasts"""
+        scenario = self.get_object()
+        grid = engine.load_grid(self._forecasts(), scenario.year)
+        resolved = grid.with_values(*scenarios.resolve(grid, scenario, scenarios.load_overlay(grid, [scenario])))
+        targets = engine.monthly_targets(scenario.year)
+        customer_names = dict(Customer.objects.filter(id__in=grid.customer_ids.tolist()).values_list('id', 'name'))
+        item_categories = dict(Item.objects.filter(id__in=grid.item_ids.tolist()).values_list('id', 'category'))
+        return Response({
+            'summary': engine.yearly_summary(resolved, targets, scenario.year, customer_names, item_categories),
+            'budget_impact': engine.budget_impact(resolved, targets, scenario.year),
+        })
+
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        """Compare several scenarios of one year side by side: ``?ids=1,2,3``"""
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            return Response({'error': 'ids must be a comma-separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        selected = list(self.get_queryset().filter(pk__in=ids).order_by('pk'))
+        if not selected or len(selected) != len(set(ids)):
+            return Response({'error': 'Unknown scenarios'}, status=status.HTTP_400_BAD_REQUEST)
+        years = {scenario.year for scenario in selected}
+        if len(years) > 1:
+            return Response({'error': 'Scenarios must share a year'}, status=status.HTTP_400_BAD_REQUEST)
+
+        year = years.pop()
+        grid = engine.load_grid(self._forecasts(), year)
+        result = scenarios.compare(grid, selected, scenarios.load_overlay(grid, selected), engine.monthly_targets(year))
+        return Response({'year': year, **result})
+
+    @action(detail=True, methods=['post'])
+    def promote(self, request, pk=None):
+        """Write the scenario onto the live forecasts, making it the new baseline"""
+        scenario = self.get_object()
+        if scenario.status == 'promoted':
+            return Response({'error': 'Scenario has already been promoted'}, status=status.HTTP_400_BAD_REQUEST)
+        grid = engine.load_grid(CustomerItemForecast.objects.all(), scenario.year)
+        updated = scenarios.promote(grid, scenario, scenarios.load_overlay(grid, [scenario]))
+        return Response({'updated': updated, 'scenario': self.get_serializer(scenario).data})
+
+
+class ForecastAccuracyViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Stored backtest metrics; ``?dimension=salesman&year=2024&ordering=-mape``.
+    Non-administrators see the salesman, customer and item rows of the
+    forecasts in their scope; the company-wide overall and month rows are
+    for administrators only.
+    """
+    queryset = ForecastAccuracy.objects.all()
+    serializer_class = ForecastAccuracySerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['year', 'dimension', 'key']
+    ordering_fields = ['mape', 'bias', 'mae', 'observations', 'actual_total', 'key']
+    ordering = ['year', 'dimension', 'key']
+
+    def get_permissions(self):
+        if self.action == 'run':
+            permission_classes = [IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.user_type == UserType.ADMIN:
+            return queryset
+        forecasts = filter_forecast_scope(CustomerItemForecast.objects.all(), self.request.user)
+        return queryset.filter(
+            Q(dimension='salesman', key__in=forecasts.values('created_by_id'))
+            | Q(dimension='customer', key__in=forecasts.values('customer_id'))
+            | Q(dimension='item', key__in=forecasts.values('item_id'))
+        )
+
+    @action(detail=False, methods=['post'])
+    def run(self, request):
+        """Queue a backtest of the given years (default: all past and current years)"""
+        serializer = BacktestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        run_backtest.delay(serializer.validated_data.get('years'))
+        return Response({'message': 'Backtest queued'}, status=status.HTTP_202_ACCEPTED)
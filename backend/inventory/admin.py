@@ -0,0 +1,80 @@
+from django.contrib import admin
+from .models import (
+    ItemCategory, ItemBrand, Supplier, InventoryItem, StockLevel, StockMovement, StockCheckpoint,
+    ReplenishmentPlan, OrderProposal
+)
+
+
+@admin.register(ItemCategory)
+class ItemCategoryAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'parent', 'is_active', 'display_order']
+    list_filter = ['is_active']
+    search_fields = ['name', 'code']
+
+
+@admin.register(ItemBrand)
+class ItemBrandAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'country', 'is_active']
+    list_filter = ['is_active', 'country']
+    search_fields = ['name', 'code']
+
+
+@admin.register(Supplier)
+class SupplierAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'contact_person', 'lead_time', 'rating', 'is_active']
+    list_filter = ['is_active', 'currency']
+    search_fields = ['name', 'code', 'email']
+
+
+class StockLevelInline(admin.TabularInline):
+    model = StockLevel
+    extra = 0
+    can_delete = False
+    readonly_fields = ['location', 'quantity', 'average_cost', 'total_value', 'stock_status', 'last_movement_id']
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(admin.ModelAdmin):
+    list_display = ['name', 'sku', 'category', 'current_stock', 'total_value', 'stock_status', 'is_active']
+    list_filter = ['stock_status', 'category', 'brand', 'is_active']
+    search_fields = ['name', 'sku', 'barcode']
+    raw_id_fields = ['created_by']
+    readonly_fields = ['current_stock', 'total_value', 'average_cost', 'stock_status', 'last_stock_update']
+    inlines = [StockLevelInline]
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """Read-only: movements are appended through the API"""
+    list_display = ['item', 'movement_type', 'reason', 'quantity', 'location', 'created_at']
+    list_filter = ['movement_type', 'reason', 'location']
+    search_fields = ['item__sku', 'reference']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockCheckpoint)
+class StockCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['taken_at', 'level_count']
+
+
+@admin.register(ReplenishmentPlan)
+class ReplenishmentPlanAdmin(admin.ModelAdmin):
+    list_display = ['year', 'start_month', 'status', 'proposal_count', 'total_cost', 'created_at']
+    list_filter = ['status', 'year']
+    readonly_fields = ['item_count', 'proposal_count', 'total_cost', 'error', 'started_at', 'finished_at']
+
+
+@admin.register(OrderProposal)
+class OrderProposalAdmin(admin.ModelAdmin):
+    list_display = ['item', 'supplier', 'due_date', 'release_date', 'quantity', 'estimated_cost', 'status']
+    list_filter = ['status', 'past_due', 'plan']
+    search_fields = ['item__sku', 'item__name']
+    raw_id_fields = ['plan', 'item', 'reviewed_by']
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class InventoryConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'inventory'
+
+    def ready(self):
+        from users.sync import track_deletions
+        from .lookup import connect_cache_invalidation
+        from .models import ItemCategory, ItemBrand, Supplier, InventoryItem
+
+        track_deletions(ItemCategory, ItemBrand, Supplier, InventoryItem)
+        connect_cache_invalidation()
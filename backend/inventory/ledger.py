@@ -0,0 +1,191 @@
+"""
+Append-only stock ledger.
+
+Every stock change is a ``StockMovement``. Recording one locks the item,
+appends the movement and applies it to the affected per-location
+``StockLevel`` rows and to the item totals in the same transaction. On-hand
+quantity, moving-average cost and status therefore always agree with the
+ledger without ever summing it.
+
+Checkpoints periodically copy every stock level. Stock as of a past moment
+starts from the latest checkpoint before it and replays only the movements
+recorded since.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .lookup import invalidate_item
+from .models import InventoryItem, StockLevel, StockMovement, StockCheckpoint, StockSnapshot
+
+MONEY = Decimal('0.01')
+COST = Decimal('0.0001')
+# Movements created this long before a checkpoint are assumed committed (and
+# so included) when it was taken; later ones are replayed if they were not.
+CHECKPOINT_GRACE = timedelta(minutes=10)
+
+
+class InsufficientStock(ValidationError):
+    pass
+
+
+def apply_delta(level, delta, unit_cost):
+    """Apply a signed quantity to ``level``; inbound stock updates the moving-average cost"""
+    if delta > 0:
+        quantity = level.quantity + delta
+        level.average_cost = ((level.quantity * level.average_cost + delta * unit_cost) / quantity).quantize(COST)
+    level.quantity += delta
+    level.total_value = (level.quantity * level.average_cost).quantize(MONEY)
+
+
+def _movement_cost(movement, levels, item):
+    if movement.movement_type == 'transfer':
+        return levels[movement.from_location].average_cost
+    if movement.unit_cost is not None and movement.quantity > 0:
+        return movement.unit_cost
+    level = levels[movement.location]
+    return level.average_cost if level.quantity > 0 else item.unit_cost
+
+
+def _validate(movement):
+    if movement.movement_type == 'adjustment':
+        if not movement.quantity:
+            raise ValidationError({'quantity': 'Adjustments must change the quantity.'})
+    elif movement.quantity <= 0:
+        raise ValidationError({'quantity': 'Quantity must be positive.'})
+    if movement.movement_type == 'transfer':
+        if not movement.from_location or not movement.to_location:
+            raise ValidationError('Transfers need a from_location and a to_location.')
+        if movement.from_location == movement.to_location:
+            raise ValidationError('Cannot transfer stock to the same location.')
+    elif not movement.location:
+        raise ValidationError({'location': 'A location is required.'})
+
+
+def record_movement(item, movement_type, quantity, reason, location='', unit_cost=None, **details):
+    """
+    Append a movement and apply it to stock levels and item totals atomically.
+
+    ``details`` are other ``StockMovement`` fields (``from_location``,
+    ``to_location``, ``reference``, ``performed_by``...). ``location``
+    defaults to the item's stocking location. Raises ``InsufficientStock`` if
+    stock at a location would go negative.
+    """
+    with transaction.atomic():
+        # Movements of one item are serialized, so per-level ids increase in
+        # the order movements are applied.
+        item = InventoryItem.objects.select_for_update().get(pk=item.pk)
+        movement = StockMovement(
+            item=item, movement_type=movement_type, quantity=Decimal(quantity), reason=reason,
+            location='' if movement_type == 'transfer' else location or item.location,
+            unit_cost=unit_cost, **details
+        )
+        _validate(movement)
+        deltas = movement.deltas()
+
+        levels = {
+            level.location: level
+            for level in StockLevel.objects.filter(item=item, location__in=[loc for loc, _ in deltas])
+        }
+        for loc, delta in deltas:
+            level = levels.setdefault(loc, StockLevel(item=item, location=loc))
+            if level.quantity + delta < 0:
+                raise InsufficientStock(
+                    f'Only {level.quantity} of {item.sku} in stock at {loc or "the default location"}.'
+                )
+
+        cost = _movement_cost(movement, levels, item)
+        movement.unit_cost = cost
+        movement.total_cost = (abs(movement.quantity) * cost).quantize(MONEY)
+        movement.save()
+
+        value_change = Decimal('0.00')
+        for loc, delta in deltas:
+            level = levels[loc]
+            previous_value = level.total_value
+            apply_delta(level, delta, cost)
+            level.stock_status = item.status_for(level.quantity)
+            level.last_movement_id = movement.pk
+            level.save()
+            value_change += level.total_value - previous_value
+
+        item.current_stock += sum(delta for _, delta in deltas)
+        item.total_value += value_change
+        item.average_cost = (
+            (item.total_value / item.current_stock).quantize(COST) if item.current_stock > 0 else cost
+        )
+        item.stock_status = item.status_for(item.current_stock)
+        item.last_stock_update = movement.created_at
+        item.save(update_fields=[
+            'current_stock', 'total_value', 'average_cost', 'stock_status', 'last_stock_update', 'updated_at'
+        ])
+    return movement
+
+
+def refresh_stock_status(item):
+    """Re-derive the stored statuses of ``item`` and its levels after its thresholds change"""
+    StockLevel.objects.filter(item=item).update(stock_status=item.status_expression())
+    InventoryItem.objects.filter(pk=item.pk).update(stock_status=item.status_expression('current_stock'))
+    invalidate_item(item.pk)
+
+
+def take_checkpoint():
+    """Copy every stock level into a new checkpoint"""
+    with transaction.atomic():
+        checkpoint = StockCheckpoint.objects.create(taken_at=timezone.now())
+        snapshots = [
+            StockSnapshot(
+                checkpoint=checkpoint, item_id=item_id, location=location, quantity=quantity,
+                average_cost=average_cost, last_movement_id=last_movement_id,
+            )
+            for item_id, location, quantity, average_cost, last_movement_id in StockLevel.objects.values_list(
+                'item_id', 'location', 'quantity', 'average_cost', 'last_movement_id'
+            )
+        ]
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+        # Stamped after the copy: every movement it contains was created before this.
+        checkpoint.taken_at = timezone.now()
+        checkpoint.level_count = len(snapshots)
+        checkpoint.save(update_fields=['taken_at', 'level_count'])
+    return checkpoint
+
+
+def stock_as_of(when, item_ids=None):
+    """
+    Rebuild stock levels as of ``when`` from the latest earlier checkpoint.
+
+    Returns ``StockLevel`` instances (unsaved) keyed by ``(item_id, location)``.
+    """
+    checkpoint = StockCheckpoint.objects.filter(taken_at__lte=when).order_by('-taken_at').first()
+    levels, watermarks = {}, {}
+    movements = StockMovement.objects.filter(created_at__lte=when)
+    if item_ids is not None:
+        movements = movements.filter(item_id__in=item_ids)
+
+    if checkpoint is not None:
+        snapshots = checkpoint.snapshots.all()
+        if item_ids is not None:
+            snapshots = snapshots.filter(item_id__in=item_ids)
+        for snapshot in snapshots:
+            key = (snapshot.item_id, snapshot.location)
+            levels[key] = StockLevel(
+                item_id=snapshot.item_id, location=snapshot.location,
+                quantity=snapshot.quantity, average_cost=snapshot.average_cost,
+                last_movement_id=snapshot.last_movement_id,
+            )
+            levels[key].total_value = (snapshot.quantity * snapshot.average_cost).quantize(MONEY)
+            watermarks[key] = snapshot.last_movement_id
+        movements = movements.filter(created_at__gt=checkpoint.taken_at - CHECKPOINT_GRACE)
+
+    for movement in movements.order_by('id'):
+        for loc, delta in movement.deltas():
+            key = (movement.item_id, loc)
+            if movement.pk <= watermarks.get(key, 0):
+                continue  # already in the checkpoint
+            level = levels.setdefault(key, StockLevel(item_id=movement.item_id, location=loc))
+            apply_delta(level, delta, movement.unit_cost)
+            level.last_movement_id = movement.pk
+    return levels
@@ -0,0 +1,126 @@
+"""
+Exact-match item lookup by SKU or barcode, for scanners.
+
+Both columns are uniquely indexed. Resolved items are kept in a bounded
+in-process LRU keyed by code, so repeated scans of the same codes never
+reach the database; a batch of codes that are not cached is resolved in a
+single query. Entries for an item are dropped when it is saved or deleted
+in this process, and expire after ``ENTRY_TTL`` seconds so other processes
+converge too.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+
+from .models import InventoryItem
+
+MAX_ENTRIES = 10000
+ENTRY_TTL = 60
+MAX_BATCH = 500
+
+LOOKUP_FIELDS = [
+    'id', 'sku', 'barcode', 'name', 'unit', 'unit_cost', 'selling_price', 'location', 'shelf',
+    'current_stock', 'stock_status', 'is_active',
+]
+
+
+class LookupCache:
+    """Thread-safe LRU of code -> item values, with per-item invalidation"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=ENTRY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # code -> (expires, values)
+        self._codes = {}  # item id -> codes cached for it
+        self._lock = threading.Lock()
+
+    def get_many(self, codes):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    self._discard(code)
+                    continue
+                self._entries.move_to_end(code)
+                found[code] = entry[1]
+        return found
+
+    def set_many(self, items):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for code, values in items.items():
+                self._discard(code)
+                self._entries[code] = (expires, values)
+                self._codes.setdefault(values['id'], set()).add(code)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, item_id):
+        with self._lock:
+            for code in self._codes.pop(item_id, ()):
+                self._entries.pop(code, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._codes.clear()
+
+    def _discard(self, code):
+        entry = self._entries.pop(code, None)
+        if entry is not None:
+            codes = self._codes.get(entry[1]['id'])
+            if codes is not None:
+                codes.discard(code)
+                if not codes:
+                    del self._codes[entry[1]['id']]
+
+
+item_cache = LookupCache()
+
+
+def lookup_items(codes):
+    """
+    Resolve ``codes`` (SKUs or barcodes) to item values; unknown codes are
+    left out. A code matching one item's SKU and another's barcode resolves
+    to the SKU.
+    """
+    codes = list(dict.fromkeys(code for code in codes if code))
+    found = item_cache.get_many(codes)
+    missing = {code for code in codes if code not in found}
+    if missing:
+        resolved = {}
+        for values in InventoryItem.objects.filter(Q(sku__in=missing) | Q(barcode__in=missing)).values(*LOOKUP_FIELDS):
+            if values['barcode'] in missing:
+                resolved.setdefault(values['barcode'], values)
+            if values['sku'] in missing:
+                resolved[values['sku']] = values
+        item_cache.set_many(resolved)
+        found.update(resolved)
+    return found
+
+
+def lookup_item(code):
+    return lookup_items([code]).get(code)
+
+
+def invalidate_item(item_id):
+    item_cache.invalidate(item_id)
+    # Again after commit: a lookup running meanwhile may have re-cached the old row
+    transaction.on_commit(lambda: item_cache.invalidate(item_id))
+
+
+def _on_item_change(sender, instance, **kwargs):
+    invalidate_item(instance.pk)
+
+
+def connect_cache_invalidation():
+    for name, signal in (('save', post_save), ('delete', post_delete)):
+        signal.connect(_on_item_change, sender=InventoryItem, dispatch_uid=f'inventory_lookup_{name}')
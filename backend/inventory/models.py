@@ -0,0 +1,383 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from decimal import Decimal
+
+User = get_user_model()
+
+
+class StockStatus(models.TextChoices):
+    OUT_OF_STOCK = 'out_of_stock', 'Out of Stock'
+    LOW = 'low', 'Low'
+    NORMAL = 'normal', 'Normal'
+    HIGH = 'high', 'High'
+
+
+# At or below the reorder point; these rows back the alert lists.
+ALERT_STATUSES = [StockStatus.OUT_OF_STOCK, StockStatus.LOW]
+
+
+class ItemCategory(models.Model):
+    """Inventory item category, optionally nested"""
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=50, unique=True)
+    description = models.TextField(blank=True)
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='subcategories'
+    )
+    is_active = models.BooleanField(default=True)
+    display_order = models.PositiveIntegerField(default=0)
+    color = models.CharField(max_length=7, blank=True)
+    tax_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    margin_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['display_order', 'name']
+        verbose_name_plural = 'item categories'
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return self.name
+
+
+class ItemBrand(models.Model):
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=50, unique=True)
+    description = models.TextField(blank=True)
+    website = models.URLField(blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    contact_info = models.JSONField(default=dict, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return self.name
+
+
+class Supplier(models.Model):
+    name = models.CharField(max_length=200)
+    code = models.CharField(max_length=50, unique=True)
+    contact_person = models.CharField(max_length=200, blank=True)
+    email = models.EmailField(blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    address = models.JSONField(default=dict, blank=True)
+    payment_terms = models.CharField(max_length=100, blank=True)
+    lead_time = models.PositiveIntegerField(default=0)  # days
+    min_order_value = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    currency = models.CharField(max_length=3, default='USD')
+    tax_id = models.CharField(max_length=50, blank=True)
+    rating = models.DecimalField(max_digits=3, decimal_places=1, default=Decimal('0.0'))
+    is_active = models.BooleanField(default=True)
+    categories = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.code})"
+
+
+class InventoryItem(models.Model):
+    """
+    A stocked item.
+
+    ``current_stock``, ``total_value``, ``average_cost``, ``stock_status`` and
+    ``last_stock_update`` are totals over all locations. They are maintained by
+    ``inventory.ledger.record_movement`` and are never written directly.
+    """
+    sku = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    category = models.ForeignKey(
+        ItemCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='items'
+    )
+    brand = models.ForeignKey(
+        ItemBrand, on_delete=models.SET_NULL, null=True, blank=True, related_name='items'
+    )
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='items'
+    )
+    supplier_code = models.CharField(max_length=100, blank=True)
+    barcode = models.CharField(max_length=100, blank=True)
+    unit_cost = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    selling_price = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    min_stock = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    max_stock = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    reorder_point = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    reorder_quantity = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    unit = models.CharField(max_length=20, blank=True)
+    location = models.CharField(max_length=100, blank=True)  # default stocking location
+    shelf = models.CharField(max_length=50, blank=True)
+    weight = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
+    dimensions = models.JSONField(default=dict, blank=True)
+    is_active = models.BooleanField(default=True)
+    is_serial_tracked = models.BooleanField(default=False)
+    is_batch_tracked = models.BooleanField(default=False)
+    tags = models.JSONField(default=list, blank=True)
+    notes = models.TextField(blank=True)
+
+    # Maintained from the movement ledger
+    current_stock = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), editable=False)
+    total_value = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), editable=False)
+    average_cost = models.DecimalField(max_digits=15, decimal_places=4, default=Decimal('0.0000'), editable=False)
+    stock_status = models.CharField(
+        max_length=20, choices=StockStatus.choices, default=StockStatus.OUT_OF_STOCK, editable=False
+    )
+    last_stock_update = models.DateTimeField(null=True, blank=True, editable=False)
+
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='inventory_items'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+            # Partial: only items needing reorder are indexed
+            models.Index(
+                fields=['stock_status', 'id'], condition=models.Q(stock_status__in=ALERT_STATUSES),
+                name='inventory_item_alert_idx',
+            ),
+        ]
+        constraints = [
+            # Scanned codes resolve to one item; many items may have no barcode
+            models.UniqueConstraint(
+                fields=['barcode'], condition=~models.Q(barcode=''), name='inventory_item_unique_barcode'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.sku})"
+
+    def status_expression(self, field='quantity'):
+        """``status_for`` as a SQL expression over ``field``, for set-based refreshes"""
+        whens = [
+            models.When(**{f'{field}__lte': 0}, then=models.Value(StockStatus.OUT_OF_STOCK)),
+            models.When(**{f'{field}__lte': max(self.reorder_point, self.min_stock)}, then=models.Value(StockStatus.LOW)),
+        ]
+        if self.max_stock:
+            whens.append(models.When(**{f'{field}__gte': self.max_stock}, then=models.Value(StockStatus.HIGH)))
+        return models.Case(*whens, default=models.Value(StockStatus.NORMAL))
+
+    def status_for(self, quantity):
+        """Stock status of ``quantity`` against this item's thresholds"""
+        if quantity <= 0:
+            return StockStatus.OUT_OF_STOCK
+        if quantity <= max(self.reorder_point, self.min_stock):
+            return StockStatus.LOW
+        if self.max_stock and quantity >= self.max_stock:
+            return StockStatus.HIGH
+        return StockStatus.NORMAL
+
+
+class StockLevel(models.Model):
+    """On-hand stock of one item at one location, maintained from the ledger"""
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_levels')
+    location = models.CharField(max_length=100)
+    quantity = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    average_cost = models.DecimalField(max_digits=15, decimal_places=4, default=Decimal('0.0000'))
+    total_value = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    stock_status = models.CharField(max_length=20, choices=StockStatus.choices, default=StockStatus.OUT_OF_STOCK)
+    # Id of the last movement applied, used to replay from a checkpoint
+    last_movement_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['item', 'location']
+        unique_together = ['item', 'location']
+        indexes = [
+            models.Index(fields=['location', 'stock_status']),
+            models.Index(
+                fields=['location', 'item'], condition=models.Q(stock_status__in=ALERT_STATUSES),
+                name='inventory_level_alert_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.sku} @ {self.location}: {self.quantity}"
+
+
+class StockMovement(models.Model):
+    """
+    One entry in the append-only stock ledger.
+
+    Movements are created through ``inventory.ledger.record_movement`` and
+    are never updated or deleted; corrections are new adjustment movements.
+    """
+    TYPE_CHOICES = [
+        ('in', 'In'),
+        ('out', 'Out'),
+        ('adjustment', 'Adjustment'),
+        ('transfer', 'Transfer'),
+    ]
+    REASON_CHOICES = [
+        ('purchase', 'Purchase'),
+        ('sale', 'Sale'),
+        ('return', 'Return'),
+        ('damage', 'Damage'),
+        ('expired', 'Expired'),
+        ('adjustment', 'Adjustment'),
+        ('transfer', 'Transfer'),
+        ('production', 'Production'),
+    ]
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT, related_name='movements')
+    movement_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    # Positive, except adjustments, which are signed
+    quantity = models.DecimalField(max_digits=15, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True)
+    total_cost = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    reference = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    from_location = models.CharField(max_length=100, blank=True)
+    to_location = models.CharField(max_length=100, blank=True)
+    notes = models.TextField(blank=True)
+    performed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements'
+    )
+    approved_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_stock_movements'
+    )
+    batch_number = models.CharField(max_length=100, blank=True)
+    serial_numbers = models.JSONField(default=list, blank=True)
+    expiry_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['item', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.movement_type} {self.quantity} x {self.item.sku}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError('Stock movements are append-only.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError('Stock movements are append-only.')
+
+    def deltas(self):
+        """``[(location, signed quantity)]`` this movement applies"""
+        if self.movement_type == 'transfer':
+            return [(self.from_location, -self.quantity), (self.to_location, self.quantity)]
+        sign = -1 if self.movement_type == 'out' else 1
+        return [(self.location, sign * self.quantity)]
+
+
+class StockCheckpoint(models.Model):
+    """Point-in-time copy of every stock level, the starting point for as-of rebuilds"""
+    taken_at = models.DateTimeField(db_index=True)
+    level_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-taken_at']
+
+    def __str__(self):
+        return f"Checkpoint {self.taken_at:%Y-%m-%d %H:%M}"
+
+
+class StockSnapshot(models.Model):
+    checkpoint = models.ForeignKey(StockCheckpoint, on_delete=models.CASCADE, related_name='snapshots')
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='stock_snapshots')
+    location = models.CharField(max_length=100)
+    quantity = models.DecimalField(max_digits=15, decimal_places=2)
+    average_cost = models.DecimalField(max_digits=15, decimal_places=4)
+    last_movement_id = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ['checkpoint', 'item', 'location']
+
+    def __str__(self):
+        return f"{self.checkpoint} - {self.item_id} @ {self.location}"
+
+
+class ReplenishmentPlan(models.Model):
+    """
+    A run of the replenishment planner for the rest of a forecast year.
+
+    Computed in the background by ``inventory.tasks.run_replenishment_plan``;
+    its ``OrderProposal`` rows are then reviewed by supply chain.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    year = models.PositiveIntegerField()
+    start_month = models.PositiveSmallIntegerField()  # 1-12; earlier months are not planned
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    item_count = models.PositiveIntegerField(default=0)
+    proposal_count = models.PositiveIntegerField(default=0)
+    total_cost = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='replenishment_plans'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Replenishment plan {self.year}/{self.start_month} ({self.status})"
+
+
+class OrderProposal(models.Model):
+    """A planned purchase: ``quantity`` to release on ``release_date`` to arrive by ``due_date``"""
+    STATUS_CHOICES = [
+        ('proposed', 'Proposed'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ]
+
+    plan = models.ForeignKey(ReplenishmentPlan, on_delete=models.CASCADE, related_name='proposals')
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='order_proposals')
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_proposals'
+    )
+    due_date = models.DateField()  # first day of the month the stock is needed
+    release_date = models.DateField()
+    # The release date had already passed when the plan ran
+    past_due = models.BooleanField(default=False)
+    net_requirement = models.DecimalField(max_digits=15, decimal_places=2)
+    quantity = models.DecimalField(max_digits=15, decimal_places=2)
+    estimated_cost = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='proposed')
+    reviewed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_order_proposals'
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['release_date', 'item']
+        indexes = [models.Index(fields=['plan', 'status', 'release_date'])]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.item.sku} by {self.due_date}"
@@ -0,0 +1,100 @@
+"""
+Reorder suggestions.
+
+Candidates are the items (or item-locations) whose stored status is low or
+out of stock, read through the partial alert indexes. Order quantities for
+all of them are computed in one NumPy pass: order up to ``max_stock`` where
+one is set, otherwise up to the reorder level plus ``reorder_quantity``,
+rounded up to whole multiples of ``reorder_quantity``.
+"""
+import numpy as np
+
+from .models import ALERT_STATUSES, InventoryItem, StockLevel
+
+ITEM_FIELDS = [
+    'sku', 'name', 'reorder_point', 'min_stock', 'max_stock', 'reorder_quantity',
+    'unit_cost', 'supplier_id', 'supplier__name', 'supplier__lead_time',
+]
+
+
+def _candidates(location=None, supplier_id=None):
+    if location is not None:
+        queryset = StockLevel.objects.filter(
+            location=location, stock_status__in=ALERT_STATUSES, item__is_active=True
+        )
+        fields = ['item_id', 'quantity', 'stock_status'] + [f'item__{field}' for field in ITEM_FIELDS]
+        prefix = 'item__'
+    else:
+        queryset = InventoryItem.objects.filter(stock_status__in=ALERT_STATUSES, is_active=True)
+        fields = ['id', 'current_stock', 'stock_status'] + ITEM_FIELDS
+        prefix = ''
+    if supplier_id is not None:
+        queryset = queryset.filter(**{f'{prefix}supplier_id': supplier_id})
+    return list(queryset.order_by(fields[0]).values_list(*fields))
+
+
+def order_quantities(on_hand, reorder_level, max_stock, reorder_quantity):
+    """Vectorized order sizes; all arguments are equal-length float arrays"""
+    target = np.where(max_stock > 0, max_stock, reorder_level + reorder_quantity)
+    need = np.maximum(target - on_hand, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        packs = np.maximum(np.ceil(need / reorder_quantity), 1)
+        return np.where(reorder_quantity > 0, packs * reorder_quantity, need)
+
+
+def suggest_reorders(location=None, supplier_id=None):
+    """Reorder suggestions, most urgent first, with per-supplier totals"""
+    rows = _candidates(location, supplier_id)
+    if not rows:
+        return {'location': location, 'suggestions': [], 'suppliers': [], 'total_cost': 0.0}
+
+    columns = list(zip(*rows))
+    item_ids, statuses, skus, names = columns[0], columns[2], columns[3], columns[4]
+    on_hand, reorder_point, min_stock, max_stock, reorder_quantity, unit_cost = (
+        np.array(columns[index], dtype=np.float64) for index in (1, 5, 6, 7, 8, 9)
+    )
+    supplier_ids, supplier_names, lead_times = columns[10], columns[11], columns[12]
+
+    reorder_level = np.maximum(reorder_point, min_stock)
+    quantity = order_quantities(on_hand, reorder_level, max_stock, reorder_quantity)
+    cost = quantity * unit_cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coverage = np.where(reorder_level > 0, on_hand / reorder_level, 0.0)
+    # Out of stock first, then the least covered
+    order = np.lexsort((coverage, on_hand > 0))
+    order = order[quantity[order] > 0]
+
+    supplier_keys = np.array([supplier or 0 for supplier in supplier_ids], dtype=np.int64)
+    suppliers, supplier_idx = np.unique(supplier_keys[order], return_inverse=True)
+    supplier_cost = np.bincount(supplier_idx, weights=cost[order], minlength=len(suppliers))
+    supplier_lines = np.bincount(supplier_idx, minlength=len(suppliers))
+    supplier_name = {supplier or 0: name for supplier, name in zip(supplier_ids, supplier_names)}
+
+    return {
+        'location': location,
+        'suggestions': [
+            {
+                'item': item_ids[index],
+                'sku': skus[index],
+                'name': names[index],
+                'stock_status': statuses[index],
+                'on_hand': float(on_hand[index]),
+                'reorder_level': float(reorder_level[index]),
+                'suggested_quantity': float(quantity[index]),
+                'estimated_cost': round(float(cost[index]), 2),
+                'supplier': supplier_ids[index],
+                'lead_time': lead_times[index],
+            }
+            for index in order.tolist()
+        ],
+        'suppliers': [
+            {
+                'supplier': int(supplier) or None,
+                'supplier_name': supplier_name.get(int(supplier)),
+                'lines': int(supplier_lines[index]),
+                'estimated_cost': round(float(supplier_cost[index]), 2),
+            }
+            for index, supplier in enumerate(suppliers)
+        ],
+        'total_cost': round(float(cost[order].sum()), 2),
+    }
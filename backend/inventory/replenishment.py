@@ -0,0 +1,133 @@
+"""
+Forecast-driven replenishment planning.
+
+Demand is the forecast quantity of every item, summed over all customers.
+For each stocked SKU the planner nets it month by month against on-hand
+stock, keeping ``min_stock`` as safety stock, and proposes purchases of the
+net requirement, raised to the item's minimum order quantity where it is
+smaller, released a lead time ahead of the month they are needed. All SKUs are planned at once as
+(items x months) NumPy matrices.
+"""
+import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from forecasts.engine import _to_decimal
+from forecasts.models import MONTH_DTYPE, CustomerItemForecast, Item
+from .models import InventoryItem, OrderProposal
+
+DAYS_PER_MONTH = 30
+
+
+def forecast_demand(year, skus):
+    """(len(skus) x 12) forecast quantities of ``year`` summed per SKU, in the order of ``skus``"""
+    demand = np.zeros((len(skus), 12))
+    rows = list(CustomerItemForecast.objects.filter(year=year).values_list('item__sku', 'quantities'))
+    if not rows or not len(skus):
+        return demand
+    forecast_skus, quantities = zip(*rows)
+    forecast_skus = np.array(forecast_skus)
+    quantities = np.frombuffer(b''.join(quantities), dtype=MONTH_DTYPE).reshape(-1, 12)
+    # Sorted here rather than trusted from the caller: a database collation
+    # need not order SKUs the way NumPy compares them.
+    order = np.argsort(skus, kind='stable')
+    positions = np.minimum(np.searchsorted(skus[order], forecast_skus), len(skus) - 1)
+    rows = order[positions]
+    # Forecasts of items that are not stocked have no row
+    stocked = skus[rows] == forecast_skus
+    np.add.at(demand, rows[stocked], np.nan_to_num(quantities[stocked]))
+    return demand
+
+
+def plan_requirements(demand, on_hand, safety_stock, min_order_quantity, lead_months, start):
+    """
+    Time-phased requirements from month index ``start`` to the end of the year.
+
+    Returns (items x months) arrays: ``gross`` and ``net`` requirements,
+    planned ``receipts``, ``projected`` on-hand stock after receipts, and the
+    ``release`` month index of each receipt (negative before January).
+    """
+    gross = demand[:, start:]
+    cumulative_gross = np.cumsum(gross, axis=1)
+    # What must have arrived by the end of each month to stay at safety stock
+    shortfall = np.round(np.maximum(cumulative_gross + (safety_stock - on_hand)[:, np.newaxis], 0), 2)
+    net = np.diff(shortfall, axis=1, prepend=0)
+    # Each order covers what is still missing but is at least the minimum
+    # order quantity; the excess of a minimum order carries into later
+    # months. Months depend on the orders before them, so only this steps
+    # through the months, all items at once.
+    receipts = np.zeros_like(shortfall)
+    received = np.zeros(len(shortfall))
+    for month in range(shortfall.shape[1]):
+        missing = shortfall[:, month] - received
+        receipts[:, month] = np.where(missing > 0, np.maximum(missing, min_order_quantity), 0)
+        received += receipts[:, month]
+    cumulative_receipts = np.cumsum(receipts, axis=1)
+    return {
+        'gross': gross,
+        'net': net,
+        'receipts': receipts,
+        'projected': on_hand[:, np.newaxis] - cumulative_gross + cumulative_receipts,
+        'release': np.arange(start, start + gross.shape[1]) - lead_months[:, np.newaxis],
+    }
+
+
+def _month_start(year, month_index):
+    year, month = divmod(year * 12 + int(month_index), 12)
+    return datetime.date(year, month + 1, 1)
+
+
+def build_proposals(plan, today=None):
+    """Plan every active stocked SKU that has a forecast item; returns unsaved ``OrderProposal`` rows"""
+    today = today or datetime.date.today()
+    forecast_items = {
+        sku: (lead_time, min_order_quantity)
+        for sku, lead_time, min_order_quantity in Item.objects.values_list('sku', 'lead_time', 'min_order_quantity')
+    }
+    items = [
+        row for row in
+        InventoryItem.objects.filter(is_active=True).order_by('sku').values_list(
+            'id', 'sku', 'current_stock', 'min_stock', 'unit_cost', 'supplier_id', 'supplier__lead_time'
+        )
+        if row[1] in forecast_items
+    ]
+    plan.item_count = len(items)
+    if not items:
+        return []
+
+    item_ids, skus, on_hand, safety_stock, unit_cost, supplier_ids, supplier_lead_times = zip(*items)
+    skus = np.array(skus)
+    item_lead_time, min_order_quantity = (
+        np.array(column, dtype=np.float64) for column in zip(*(forecast_items[sku] for sku in skus.tolist()))
+    )
+    # The item's own lead time, else its supplier's
+    lead_days = np.where(item_lead_time > 0, item_lead_time, np.array(supplier_lead_times, dtype=np.float64))
+    lead_days = np.nan_to_num(lead_days)
+    lead_months = np.ceil(lead_days / DAYS_PER_MONTH).astype(np.int64)
+
+    requirements = plan_requirements(
+        forecast_demand(plan.year, skus),
+        np.array(on_hand, dtype=np.float64), np.array(safety_stock, dtype=np.float64),
+        min_order_quantity, lead_months, plan.start_month - 1,
+    )
+    receipts = requirements['receipts']
+    unit_cost = np.array(unit_cost, dtype=np.float64)
+    current_month = today.year * 12 + today.month - 1
+
+    proposals = []
+    for row, month in zip(*np.nonzero(receipts > 0)):
+        release = plan.year * 12 + int(requirements['release'][row, month])
+        quantity = receipts[row, month]
+        proposals.append(OrderProposal(
+            plan=plan, item_id=item_ids[row], supplier_id=supplier_ids[row],
+            due_date=_month_start(plan.year, plan.start_month - 1 + month),
+            release_date=max(_month_start(0, release), today),
+            past_due=release < current_month,
+            net_requirement=_to_decimal(requirements['net'][row, month]),
+            quantity=_to_decimal(quantity),
+            estimated_cost=_to_decimal(quantity * unit_cost[row]),
+        ))
+    plan.proposal_count = len(proposals)
+    plan.total_cost = sum((proposal.estimated_cost for proposal in proposals), Decimal('0.00'))
+    return proposals
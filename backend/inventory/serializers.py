@@ -0,0 +1,139 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from .ledger import record_movement
+from .lookup import MAX_BATCH
+from .models import (
+    ItemCategory, ItemBrand, Supplier, InventoryItem, StockLevel, StockMovement, StockCheckpoint,
+    ReplenishmentPlan, OrderProposal
+)
+
+
+class ItemCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ItemCategory
+        fields = [
+            'id', 'name', 'code', 'description', 'parent', 'is_active', 'display_order',
+            'color', 'tax_rate', 'margin_percentage', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class ItemBrandSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ItemBrand
+        fields = [
+            'id', 'name', 'code', 'description', 'website', 'country', 'contact_info',
+            'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class SupplierSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Supplier
+        fields = [
+            'id', 'name', 'code', 'contact_person', 'email', 'phone', 'address', 'payment_terms',
+            'lead_time', 'min_order_value', 'currency', 'tax_id', 'rating', 'is_active',
+            'categories', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class InventoryItemSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    brand_name = serializers.CharField(source='brand.name', read_only=True)
+    supplier_name = serializers.CharField(source='supplier.name', read_only=True)
+
+    class Meta:
+        model = InventoryItem
+        fields = [
+            'id', 'sku', 'name', 'description', 'category', 'category_name', 'brand', 'brand_name',
+            'supplier', 'supplier_name', 'supplier_code', 'barcode', 'unit_cost', 'selling_price',
+            'min_stock', 'max_stock', 'reorder_point', 'reorder_quantity', 'unit', 'location',
+            'shelf', 'weight', 'dimensions', 'is_active', 'is_serial_tracked', 'is_batch_tracked',
+            'tags', 'notes', 'current_stock', 'total_value', 'average_cost', 'stock_status',
+            'last_stock_update', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'current_stock', 'total_value', 'average_cost', 'stock_status',
+            'last_stock_update', 'created_by', 'created_at', 'updated_at'
+        ]
+
+
+class StockLevelSerializer(serializers.ModelSerializer):
+    sku = serializers.CharField(source='item.sku', read_only=True)
+
+    class Meta:
+        model = StockLevel
+        fields = [
+            'id', 'item', 'sku', 'location', 'quantity', 'average_cost', 'total_value',
+            'stock_status', 'last_movement_id', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockMovement
+        fields = [
+            'id', 'item', 'movement_type', 'reason', 'quantity', 'unit_cost', 'total_cost',
+            'reference', 'location', 'from_location', 'to_location', 'notes', 'performed_by',
+            'approved_by', 'batch_number', 'serial_numbers', 'expiry_date', 'created_at'
+        ]
+        read_only_fields = ['id', 'total_cost', 'performed_by', 'created_at']
+
+    def create(self, validated_data):
+        try:
+            return record_movement(**validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict if hasattr(exc, 'error_dict') else exc.messages)
+
+
+class StockCheckpointSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockCheckpoint
+        fields = ['id', 'taken_at', 'level_count']
+        read_only_fields = fields
+
+
+class ReplenishmentPlanSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReplenishmentPlan
+        fields = [
+            'id', 'year', 'start_month', 'status', 'item_count', 'proposal_count', 'total_cost',
+            'error', 'requested_by', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'item_count', 'proposal_count', 'total_cost', 'error',
+            'requested_by', 'created_at', 'started_at', 'finished_at'
+        ]
+        extra_kwargs = {'start_month': {'required': False, 'min_value': 1, 'max_value': 12}}
+
+
+class OrderProposalSerializer(serializers.ModelSerializer):
+    sku = serializers.CharField(source='item.sku', read_only=True)
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    supplier_name = serializers.CharField(source='supplier.name', read_only=True)
+
+    class Meta:
+        model = OrderProposal
+        fields = [
+            'id', 'plan', 'item', 'sku', 'item_name', 'supplier', 'supplier_name', 'due_date',
+            'release_date', 'past_due', 'net_requirement', 'quantity', 'estimated_cost', 'status',
+            'reviewed_by', 'reviewed_at'
+        ]
+        read_only_fields = [
+            'id', 'plan', 'item', 'supplier', 'due_date', 'release_date', 'past_due',
+            'net_requirement', 'estimated_cost', 'reviewed_by', 'reviewed_at'
+        ]
+
+
+class ProposalReviewSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    status = serializers.ChoiceField(choices=['approved', 'rejected'])
+
+
+class ItemLookupSerializer(serializers.Serializer):
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=100), allow_empty=False, max_length=MAX_BATCH
+    )
@@ -0,0 +1,40 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import take_checkpoint
+from .models import OrderProposal, ReplenishmentPlan
+from .replenishment import build_proposals
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def take_stock_checkpoint():
+    """Daily checkpoint so as-of stock rebuilds replay at most a day of movements"""
+    return take_checkpoint().level_count
+
+
+@shared_task(ignore_result=True)
+def run_replenishment_plan(plan_id):
+    """Compute and store the order proposals of a pending replenishment plan"""
+    pending = ReplenishmentPlan.objects.filter(pk=plan_id, status=ReplenishmentPlan.STATUS_PENDING)
+    if not pending.update(status=ReplenishmentPlan.STATUS_RUNNING, started_at=timezone.now()):
+        return 0
+    plan = ReplenishmentPlan.objects.get(pk=plan_id)
+    try:
+        proposals = build_proposals(plan)
+        with transaction.atomic():
+            OrderProposal.objects.bulk_create(proposals, batch_size=1000)
+            plan.status = ReplenishmentPlan.STATUS_COMPLETED
+            plan.finished_at = timezone.now()
+            plan.save(update_fields=['status', 'finished_at', 'item_count', 'proposal_count', 'total_cost'])
+    except Exception as exc:
+        logger.exception('Replenishment plan %s failed', plan_id)
+        ReplenishmentPlan.objects.filter(pk=plan_id).update(
+            status=ReplenishmentPlan.STATUS_FAILED, error=str(exc), finished_at=timezone.now()
+        )
+        raise
+    return len(proposals)
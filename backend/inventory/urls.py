@@ -0,0 +1,22 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    ItemCategoryViewSet, ItemBrandViewSet, SupplierViewSet, InventoryItemViewSet,
+    StockMovementViewSet, StockLevelViewSet, StockCheckpointViewSet, ReplenishmentPlanViewSet,
+    OrderProposalViewSet
+)
+
+router = DefaultRouter()
+router.register(r'items', InventoryItemViewSet, basename='inventoryitem')
+router.register(r'categories', ItemCategoryViewSet, basename='itemcategory')
+router.register(r'brands', ItemBrandViewSet, basename='itembrand')
+router.register(r'suppliers', SupplierViewSet, basename='supplier')
+router.register(r'movements', StockMovementViewSet, basename='stockmovement')
+router.register(r'levels', StockLevelViewSet, basename='stocklevel')
+router.register(r'checkpoints', StockCheckpointViewSet, basename='stockcheckpoint')
+router.register(r'replenishment-plans', ReplenishmentPlanViewSet, basename='replenishmentplan')
+router.register(r'order-proposals', OrderProposalViewSet, basename='orderproposal')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,302 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import ProtectedError, Q
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets, permissions, mixins, status
+from rest_framework.decorators import action
+from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.response import Response
+
+from users.models import UserType
+from users.permissions import CanManageInventory
+from users.sync import DeltaSyncMixin
+from .ledger import stock_as_of, take_checkpoint, refresh_stock_status
+from .lookup import lookup_item, lookup_items
+from .models import (
+    ALERT_STATUSES, ItemCategory, ItemBrand, Supplier, InventoryItem, StockLevel, StockMovement, StockCheckpoint,
+    ReplenishmentPlan, OrderProposal
+)
+from .reorder import suggest_reorders
+from .serializers import (
+    ItemCategorySerializer, ItemBrandSerializer, SupplierSerializer, InventoryItemSerializer,
+    StockLevelSerializer, StockMovementSerializer, StockCheckpointSerializer, ReplenishmentPlanSerializer,
+    OrderProposalSerializer, ProposalReviewSerializer, ItemLookupSerializer
+)
+from .tasks import run_replenishment_plan
+
+
+class InventoryPermissionsMixin:
+    """Anyone signed in can read inventory; only inventory managers can change it"""
+
+    def get_permissions(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            permission_classes = [permissions.IsAuthenticated]
+        else:
+            permission_classes = [CanManageInventory]
+        return [permission() for permission in permission_classes]
+
+
+def filter_location_scope(queryset, user, fields=('location',)):
+    """Branch managers only see stock at their own location"""
+    if user.user_type == UserType.BRANCH_MANAGER:
+        scope = Q()
+        for field in fields:
+            scope |= Q(**{field: user.location})
+        return queryset.filter(scope)
+    return queryset
+
+
+class ItemCategoryViewSet(InventoryPermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = ItemCategory.objects.all()
+    serializer_class = ItemCategorySerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['parent', 'is_active']
+    search_fields = ['name', 'code']
+    ordering = ['display_order', 'name']
+
+
+class ItemBrandViewSet(InventoryPermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = ItemBrand.objects.all()
+    serializer_class = ItemBrandSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['is_active', 'country']
+    search_fields = ['name', 'code']
+    ordering = ['name']
+
+
+class SupplierViewSet(InventoryPermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = Supplier.objects.all()
+    serializer_class = SupplierSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['is_active', 'currency']
+    search_fields = ['name', 'code', 'contact_person', 'email']
+    ordering_fields = ['name', 'rating', 'lead_time']
+    ordering = ['name']
+
+
+class InventoryItemViewSet(InventoryPermissionsMixin, DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = InventoryItem.objects.select_related('category', 'brand', 'supplier')
+    serializer_class = InventoryItemSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['category', 'brand', 'supplier', 'stock_status', 'is_active', 'location']
+    search_fields = ['sku', 'name', 'barcode', 'description']
+    ordering_fields = ['name', 'sku', 'current_stock', 'total_value', 'last_stock_update']
+    ordering = ['name']
+
+    THRESHOLD_FIELDS = ['reorder_point', 'min_stock', 'max_stock']
+
+    def get_permissions(self):
+        if self.action == 'lookup':
+            return [permissions.IsAuthenticated()]
+        return super().get_permissions()
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    def perform_update(self, serializer):
+        previous = [getattr(serializer.instance, field) for field in self.THRESHOLD_FIELDS]
+        item = serializer.save()
+        if previous != [getattr(item, field) for field in self.THRESHOLD_FIELDS]:
+            refresh_stock_status(item)
+            item.refresh_from_db(fields=['stock_status'])
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            # The stock ledger is append-only, so items with movements are retired instead
+            return Response(
+                {'error': 'This item has stock movements; set is_active to false instead of deleting it.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+    @action(detail=False, methods=['get', 'post'])
+    def lookup(self, request):
+        """
+        Resolve scanned SKUs or barcodes: ``GET ?code=`` for one, ``POST``
+        ``{"codes": [...]}`` for a burst; unknown codes are listed in ``missing``.
+        """
+        if request.method == 'GET':
+            item = lookup_item(request.query_params.get('code', ''))
+            if item is None:
+                return Response({'error': 'No item with this SKU or barcode'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(item)
+        serializer = ItemLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        codes = serializer.validated_data['codes']
+        found = lookup_items(codes)
+        return Response({
+            'results': found,
+            'missing': [code for code in dict.fromkeys(codes) if code not in found],
+        })
+
+    @action(detail=False, methods=['get'])
+    def reorder_suggestions(self, request):
+        """Order quantities for every low or out-of-stock item, optionally at one ``location``"""
+        location = request.query_params.get('location')
+        if request.user.user_type == UserType.BRANCH_MANAGER:
+            location = request.user.location
+        try:
+            supplier_id = int(request.query_params['supplier']) if 'supplier' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'supplier must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(suggest_reorders(location, supplier_id))
+
+
+class StockMovementViewSet(InventoryPermissionsMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """The stock ledger: movements can be recorded and read, never changed"""
+    queryset = StockMovement.objects.select_related('item')
+    serializer_class = StockMovementSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['item', 'movement_type', 'reason', 'location', 'from_location', 'to_location']
+    search_fields = ['reference', 'batch_number', 'item__sku']
+    ordering = ['-created_at', '-id']
+
+    def get_queryset(self):
+        return filter_location_scope(
+            super().get_queryset(), self.request.user, ('location', 'from_location', 'to_location')
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(performed_by=self.request.user)
+
+
+class StockLevelViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = StockLevel.objects.select_related('item')
+    serializer_class = StockLevelSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['item', 'location', 'stock_status']
+    ordering_fields = ['quantity', 'total_value', 'updated_at']
+    ordering = ['item', 'location']
+
+    def get_queryset(self):
+        return filter_location_scope(super().get_queryset(), self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def alerts(self, request):
+        """Levels at or below their reorder point, e.g. ``?location=WH1``"""
+        queryset = self.filter_queryset(self.get_queryset()).filter(stock_status__in=ALERT_STATUSES)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def as_of(self, request):
+        """Stock levels as of ``?at=<datetime or date>``, optionally for ``item`` ids"""
+        value = request.query_params.get('at', '')
+        try:
+            day = parse_date(value)
+            # A bare date means the end of that day
+            when = parse_datetime(f'{value}T23:59:59.999999' if day else value)
+        except ValueError:
+            when = None
+        if when is None:
+            return Response({'error': 'at must be an ISO date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when)
+        try:
+            item_ids = [int(value) for value in request.query_params.getlist('item')] or None
+        except ValueError:
+            return Response({'error': 'item must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        levels = stock_as_of(when, item_ids)
+        items = InventoryItem.objects.in_bulk({item_id for item_id, _ in levels})
+        location = request.query_params.get('location')
+        if request.user.user_type == UserType.BRANCH_MANAGER:
+            location = request.user.location
+        results = [
+            {
+                'item': item_id,
+                'sku': items[item_id].sku,
+                'location': loc,
+                'quantity': level.quantity,
+                'average_cost': level.average_cost,
+                'total_value': level.total_value,
+                'stock_status': items[item_id].status_for(level.quantity),
+            }
+            for (item_id, loc), level in sorted(levels.items())
+            if location is None or loc == location
+        ]
+        return Response({'at': when, 'results': results})
+
+
+class StockCheckpointViewSet(InventoryPermissionsMixin, mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = StockCheckpoint.objects.all()
+    serializer_class = StockCheckpointSerializer
+    ordering = ['-taken_at']
+
+    def create(self, request, *args, **kwargs):
+        checkpoint = take_checkpoint()
+        return Response(self.get_serializer(checkpoint).data, status=status.HTTP_201_CREATED)
+
+
+class ReplenishmentPlanViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Forecast-driven replenishment runs.
+
+    ``POST`` with a ``year`` (and optionally ``start_month``, by default the
+    current month) returns 202 with the plan to poll; its proposals are
+    computed in the background.
+    """
+    queryset = ReplenishmentPlan.objects.all()
+    serializer_class = ReplenishmentPlanSerializer
+    permission_classes = [CanManageInventory]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['year', 'status']
+    ordering = ['-created_at']
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        today = timezone.localdate()
+        year = serializer.validated_data['year']
+        start_month = serializer.validated_data.get('start_month') or (today.month if year == today.year else 1)
+        plan = serializer.save(start_month=start_month, requested_by=request.user)
+        transaction.on_commit(lambda: run_replenishment_plan.delay(plan.pk))
+        return Response(self.get_serializer(plan).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def proposals(self, request, pk=None):
+        """The plan's order proposals, optionally filtered by ``status``"""
+        queryset = self.get_object().proposals.select_related('item', 'supplier')
+        if 'status' in request.query_params:
+            queryset = queryset.filter(status=request.query_params['status'])
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(OrderProposalSerializer(page, many=True).data)
+        return Response(OrderProposalSerializer(queryset, many=True).data)
+
+
+class OrderProposalViewSet(mixins.UpdateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Review of planned orders: adjust the quantity, approve or reject"""
+    queryset = OrderProposal.objects.select_related('item', 'supplier')
+    serializer_class = OrderProposalSerializer
+    permission_classes = [CanManageInventory]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['plan', 'item', 'supplier', 'status', 'past_due']
+    search_fields = ['item__sku', 'item__name']
+    ordering_fields = ['release_date', 'due_date', 'estimated_cost']
+    ordering = ['release_date', 'item']
+
+    def perform_update(self, serializer):
+        proposal = serializer.instance
+        quantity = serializer.validated_data.get('quantity', proposal.quantity)
+        extra = {'estimated_cost': (quantity * proposal.item.unit_cost).quantize(Decimal('0.01'))}
+        if serializer.validated_data.get('status', proposal.status) != proposal.status:
+            extra.update(reviewed_by=self.request.user, reviewed_at=timezone.now())
+        serializer.save(**extra)
+
+    @action(detail=False, methods=['post'])
+    def review(self, request):
+        """Approve or reject many proposals at once"""
+        serializer = ProposalReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = OrderProposal.objects.filter(pk__in=serializer.validated_data['ids']).update(
+            status=serializer.validated_data['status'], reviewed_by=request.user, reviewed_at=timezone.now()
+        )
+        return Response({'updated': updated})
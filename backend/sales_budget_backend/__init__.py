@@ -1 +1,4 @@
-# Sales Budget Backend 
\ No newline at end of file
+# Sales Budget Backend
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
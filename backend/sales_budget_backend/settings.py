@@ -116,6 +116,9 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# CSV and Excel data sources are read from under this directory
+DATA_SOURCE_FILE_ROOT = config('DATA_SOURCE_FILE_ROOT', default=os.path.join(MEDIA_ROOT, 'data_sources'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -206,6 +209,62 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+from celery.schedules import crontab
+CELERY_BEAT_SCHEDULE = {
+    # Ex-ante forecast snapshots, scored against actuals by the backtest
+    'snapshot-forecasts': {
+        'task': 'forecasts.tasks.snapshot_forecasts',
+        'schedule': crontab(minute=5, hour=0, day_of_month=1),
+    },
+    'backtest-forecasts': {
+        'task': 'forecasts.tasks.run_backtest',
+        'schedule': crontab(minute=0, hour=2, day_of_month=1),
+    },
+    'prune-tombstones': {
+        'task': 'users.tasks.prune_tombstones',
+        'schedule': crontab(minute=15, hour=3),
+    },
+    'stock-checkpoint': {
+        'task': 'inventory.tasks.take_stock_checkpoint',
+        'schedule': crontab(minute=30, hour=1),
+    },
+    # Queues data source syncs whose schedule is due
+    'dispatch-data-syncs': {
+        'task': 'data_sources.tasks.dispatch_due_syncs',
+        'schedule': crontab(),
+    },
+    # Folds changed transactions and synced sales into the analytics cube
+    'refresh-analytics-cube': {
+        'task': 'analytics.tasks.refresh_cube',
+        'schedule': crontab(),
+    },
+    # Recomputes every dashboard snapshot; writes refresh the scopes they touch in between
+    'refresh-dashboard-stats': {
+        'task': 'analytics.tasks.refresh_dashboard_stats',
+        'schedule': crontab(minute='*/15'),
+        'kwargs': {'stale_only': False},
+    },
+    # Queues the BI reports whose schedule is due
+    'render-due-reports': {
+        'task': 'analytics.tasks.render_due_reports',
+        'schedule': crontab(),
+    },
+}
+
+# Deletions are served to delta sync clients for this long; older sync tokens
+# get 410 and the client lists everything again
+DELTA_SYNC_TOMBSTONE_RETENTION_DAYS = config('DELTA_SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Data source syncs hold a slot of their job, their source (config syncConcurrency,
+# default 1) and of this many shared by all sources while they run. The same
+# slots cap each SQL source at its poolSize open queries across all processes.
+# Use 'data_sources.slots.LocalSyncSlots' for tests or a single worker.
+DATA_SYNC_MAX_CONCURRENT = config('DATA_SYNC_MAX_CONCURRENT', default=4, cast=int)
+DATA_SYNC_SLOTS = {
+    'BACKEND': 'data_sources.slots.RedisSyncSlots',
+    'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+}
+
 # Cache settings
 CACHES = {
     'default': {
@@ -214,6 +273,28 @@ CACHES = {
     }
 }
 
+# Change notification channel for the budget event stream (server-sent events).
+# Use 'budgets.events.InMemoryEventChannel' for tests or a single dev process.
+EVENT_CHANNEL = {
+    'BACKEND': 'budgets.events.RedisEventChannel',
+    'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    'OPTIONS': {'maxlen': 10000},
+}
+
+# Each open event stream holds a worker thread for up to five minutes. Serve
+# /api/budgets/events/ from gevent or threaded workers; a process answers 503
+# beyond this many open streams.
+EVENT_STREAM_MAX_CONNECTIONS = config('EVENT_STREAM_MAX_CONNECTIONS', default=50, cast=int)
+
+# Cache of data query results. Falls back to a per-process store while Redis is down;
+# use 'data_sources.query_cache.LocalResultStore' for tests or a single dev process.
+DATA_QUERY_CACHE = {
+    'BACKEND': 'data_sources.query_cache.RedisResultStore',
+    'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    'TIMEOUT': 15 * 60,
+    'OPTIONS': {'max_bytes': 256 * 1024 * 1024},  # compressed
+}
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, UserProfile, Permission, UserType
+from .models import User, UserProfile, Permission, UserType, OrgUnit
 
 
 class UserProfileInline(admin.StackedInline):
@@ -27,7 +27,7 @@ class UserAdmin(BaseUserAdmin):
         (None, {'fields': ('username', 'password')}),
         (_('Personal info'), {'fields': ('first_name', 'last_name', 'email')}),
         (_('Role & Access'), {
-            'fields': ('user_type', 'department', 'location', 'budget_id', 'permissions')
+            'fields': ('user_type', 'department', 'location', 'org_unit', 'budget_id', 'permissions')
         }),
         (_('Permissions'), {
             'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions'),
@@ -58,4 +58,13 @@ class PermissionAdmin(admin.ModelAdmin):
     list_display = ['name', 'description', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'description']
-    ordering = ['name'] 
\ No newline at end of file
+    ordering = ['name'] 
+
+
+@admin.register(OrgUnit)
+class OrgUnitAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'unit_type', 'parent', 'created_at']
+    list_filter = ['unit_type']
+    search_fields = ['name', 'code']
+    raw_id_fields = ['parent']
+    ordering = ['name']
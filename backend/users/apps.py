@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'users'
+
+    def ready(self):
+        from .models import User, UserProfile, Permission, OrgUnit
+        from .sync import track_deletions
+
+        track_deletions(User, UserProfile, Permission, OrgUnit)
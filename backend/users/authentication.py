@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+class QueryTokenJWTAuthentication(JWTAuthentication):
+    """
+    JWT from the ``Authorization`` header or, for clients that cannot set
+    headers such as ``EventSource``, from an ``access_token`` query parameter.
+    Query strings end up in access logs, so only use it on views that need it.
+    """
+
+    def authenticate(self, request):
+        if self.get_header(request) is not None:
+            return super().authenticate(request)
+        raw_token = request.query_params.get('access_token')
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token.encode())
+        return self.get_user(validated_token), validated_token
@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -11,6 +14,131 @@ class UserType(models.IntegerChoices):
     BRANCH_MANAGER = 5, _('Branch Manager')
 
 
+class OrgUnitType(models.TextChoices):
+    COMPANY = 'company', _('Company')
+    REGION = 'region', _('Region')
+    BRANCH = 'branch', _('Branch')
+    DEPARTMENT = 'department', _('Department')
+
+
+class OrgUnitQuerySet(models.QuerySet):
+    def rebuild_closure(self):
+        """Recompute the whole closure table from ``parent`` links"""
+        with transaction.atomic():
+            OrgUnitClosure.objects.all().delete()
+            parents = dict(OrgUnit.objects.values_list('id', 'parent_id'))
+            links = []
+            for unit_id in parents:
+                ancestor_id, depth = unit_id, 0
+                while ancestor_id is not None:
+                    links.append(OrgUnitClosure(ancestor_id=ancestor_id, descendant_id=unit_id, depth=depth))
+                    ancestor_id, depth = parents[ancestor_id], depth + 1
+            OrgUnitClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class OrgUnit(models.Model):
+    """
+    Node of the organisation hierarchy (company > region > branch > department).
+
+    Ancestry is kept in ``OrgUnitClosure`` so "everything under this unit" is a
+    single indexed join instead of a walk up or down the tree.
+    """
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=50, unique=True)
+    unit_type = models.CharField(max_length=20, choices=OrgUnitType.choices)
+    parent = models.ForeignKey(
+        'self', on_delete=models.PROTECT, null=True, blank=True, related_name='children'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = OrgUnitQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_unit_type_display()})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        moved = not adding and self.parent_id != getattr(self, '_loaded_parent_id', self.parent_id)
+        if moved and self.parent_id is not None and self.is_ancestor_of(self.parent_id):
+            raise ValidationError('An org unit cannot be moved under its own subtree.')
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self._link_to_parent()
+            elif moved:
+                self._move_subtree()
+        self._loaded_parent_id = self.parent_id
+
+    def is_ancestor_of(self, unit_id):
+        return OrgUnitClosure.objects.filter(ancestor_id=self.pk, descendant_id=unit_id).exists()
+
+    def descendants(self, include_self=True):
+        queryset = OrgUnit.objects.filter(ancestor_links__ancestor_id=self.pk)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
+
+    def _link_to_parent(self):
+        links = [OrgUnitClosure(ancestor_id=self.pk, descendant_id=self.pk, depth=0)]
+        if self.parent_id is not None:
+            links += [
+                OrgUnitClosure(ancestor_id=ancestor_id, descendant_id=self.pk, depth=depth + 1)
+                for ancestor_id, depth in OrgUnitClosure.objects.filter(
+                    descendant_id=self.parent_id
+                ).values_list('ancestor_id', 'depth')
+            ]
+        OrgUnitClosure.objects.bulk_create(links)
+
+    def _move_subtree(self):
+        """Re-hang this unit's subtree, touching only links that cross the moved edge"""
+        subtree = list(
+            OrgUnitClosure.objects.filter(ancestor_id=self.pk).values_list('descendant_id', 'depth')
+        )
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        OrgUnitClosure.objects.filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+        if self.parent_id is None:
+            return
+        new_ancestors = OrgUnitClosure.objects.filter(
+            descendant_id=self.parent_id
+        ).values_list('ancestor_id', 'depth')
+        OrgUnitClosure.objects.bulk_create([
+            OrgUnitClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in new_ancestors
+            for descendant_id, down in subtree
+        ], batch_size=1000)
+
+
+class OrgUnitClosure(models.Model):
+    """One row per (ancestor, descendant) pair, including each unit with itself"""
+    ancestor = models.ForeignKey(OrgUnit, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(OrgUnit, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['ancestor', 'descendant']
+        indexes = [models.Index(fields=['descendant', 'ancestor'])]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
+
+
+def org_scope_filter(unit_id, prefix=''):
+    """``Q`` matching rows whose ``org_unit`` lies under ``unit_id`` (inclusive)"""
+    return models.Q(**{f'{prefix}org_unit__ancestor_links__ancestor_id': unit_id})
+
+
 class Permission(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -19,6 +147,7 @@ class Permission(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
 
     def __str__(self):
         return self.name
@@ -31,6 +160,9 @@ class User(AbstractUser):
     )
     department = models.CharField(max_length=100, blank=True)
     location = models.CharField(max_length=100, blank=True)
+    org_unit = models.ForeignKey(
+        OrgUnit, on_delete=models.SET_NULL, null=True, blank=True, related_name='users'
+    )
     budget_id = models.IntegerField(null=True, blank=True)
     permissions = models.ManyToManyField(Permission, blank=True)
     is_active = models.BooleanField(default=True)
@@ -39,6 +171,7 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['username']
+        indexes = [models.Index(fields=['updated_at', 'id'])]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_user_type_display()})"
@@ -130,5 +263,22 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['updated_at', 'id'])]
+
+    def __str__(self):
+        return f"Profile for {self.user.username}"
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row so delta sync clients can drop it too"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [models.Index(fields=['content_type', 'deleted_at', 'id'])]
+
     def __str__(self):
-        return f"Profile for {self.user.username}" 
\ No newline at end of file
+        return f"{self.content_type} {self.object_id} deleted at {self.deleted_at}" 
\ No newline at end of file
@@ -0,0 +1,13 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class IgnoreClientContentNegotiation(DefaultContentNegotiation):
+    """
+    Always the view's first renderer, whatever the ``Accept`` header says.
+    For views that stream their own content type (event streams, file
+    downloads): clients ask for that type, which no JSON renderer offers,
+    and would otherwise get 406.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
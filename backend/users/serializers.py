@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, UserProfile, Permission, UserType
+from .models import User, UserProfile, Permission, UserType, OrgUnit
 
 
 class PermissionSerializer(serializers.ModelSerializer):
@@ -9,6 +9,23 @@ class PermissionSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'created_at', 'updated_at']
 
 
+class OrgUnitSerializer(serializers.ModelSerializer):
+    unit_type_display = serializers.CharField(source='get_unit_type_display', read_only=True)
+
+    class Meta:
+        model = OrgUnit
+        fields = [
+            'id', 'name', 'code', 'unit_type', 'unit_type_display', 'parent',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_parent(self, value):
+        if value is not None and self.instance is not None and self.instance.is_ancestor_of(value.pk):
+            raise serializers.ValidationError('An org unit cannot be moved under its own subtree.')
+        return value
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
@@ -25,7 +42,7 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
-            'user_type', 'user_type_display', 'department', 'location', 'budget_id',
+            'user_type', 'user_type_display', 'department', 'location', 'org_unit', 'budget_id',
             'permissions', 'access_pattern', 'profile', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -70,7 +87,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'username', 'email', 'password', 'password_confirm', 'first_name', 'last_name',
-            'user_type', 'department', 'location', 'budget_id', 'profile'
+            'user_type', 'department', 'location', 'org_unit', 'budget_id', 'profile'
         ]
 
     def validate(self, attrs):
@@ -99,7 +116,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'first_name', 'last_name', 'email', 'user_type', 'department', 
-            'location', 'budget_id', 'is_active', 'profile'
+            'location', 'org_unit', 'budget_id', 'is_active', 'profile'
         ]
 
     def update(self, instance, validated_data):
@@ -175,7 +192,7 @@ class UserListSerializer(serializers.ModelSerializer):
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
-            'user_type', 'user_type_display', 'department', 'location', 
+            'user_type', 'user_type_display', 'department', 'location', 'org_unit',
             'is_active', 'permissions_count', 'created_at'
         ]
 
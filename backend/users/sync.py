@@ -0,0 +1,154 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Tombstone
+
+DELTA_SYNC_PAGE_SIZE = 500
+
+# Rows are only served once they are this old, so a transaction that stamped
+# ``updated_at`` but had not committed yet cannot be skipped by the high-water mark.
+DELTA_SYNC_SETTLE = timedelta(seconds=2)
+
+
+
+def tombstone_retention():
+    """How long tombstones are kept; clients that last synced before that must resync fully"""
+    return timedelta(days=settings.DELTA_SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than the retention window; returns how many"""
+    cutoff = (now or timezone.now()) - tombstone_retention()
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_sync_token(cursor):
+    raw = json.dumps(cursor, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_sync_token(value):
+    """
+    Decode an ``updated_since`` value into ``{'u': [ts, id], 'd': [ts, id]}``.
+
+    Accepts either a token returned by a previous sync or a plain ISO 8601
+    timestamp for the very first sync.
+    """
+    since = parse_datetime(value)
+    if since is not None:
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return {'u': [since.isoformat(), 0], 'd': [since.isoformat(), 0]}
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        for key in ('u', 'd'):
+            cursor[key] = [parse_datetime(cursor[key][0]).isoformat(), int(cursor[key][1])]
+        return cursor
+    except (ValueError, TypeError, KeyError, AttributeError, IndexError):
+        raise InvalidSyncToken(value)
+
+
+def _after(cursor, field):
+    since, last_id = parse_datetime(cursor[0]), cursor[1]
+    return Q(**{f'{field}__gt': since}) | Q(**{field: since, 'id__gt': last_id})
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        content_type=ContentType.objects.get_for_model(sender),
+        object_id=instance.pk,
+    )
+
+
+def track_deletions(*models):
+    """Record a ``Tombstone`` whenever a row of one of ``models`` is deleted"""
+    for model in models:
+        post_delete.connect(
+            record_tombstone, sender=model,
+            dispatch_uid=f'tombstone_{model._meta.label_lower}'
+        )
+
+
+class DeltaSyncMixin:
+    """
+    ViewSet mixin adding ``?updated_since=`` incremental sync to ``list``.
+
+    Changed rows are walked in ``(updated_at, id)`` order, which the models
+    index, and deletions come from tombstones. The response carries a
+    ``sync_token`` high-water mark to pass as ``updated_since`` next time.
+
+    Tombstones are kept for ``DELTA_SYNC_TOMBSTONE_RETENTION_DAYS``; a client
+    whose ``updated_since`` is older gets 410 and must list everything again.
+    ``deleted`` holds the ids of every deleted row of the model, not only of
+    rows in the caller's scope: a deleted row's scope is gone with it. The
+    ids are all the client learns about such rows.
+    """
+
+    def list(self, request, *args, **kwargs):
+        updated_since = request.query_params.get('updated_since')
+        if updated_since is None:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            cursor = decode_sync_token(updated_since)
+        except InvalidSyncToken:
+            return Response(
+                {'updated_since': 'Expected an ISO 8601 timestamp or a sync token.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.now()
+        if parse_datetime(cursor['d'][0]) < now - tombstone_retention():
+            return Response(
+                {
+                    'updated_since': 'Older than the kept deletion history; a full resync is required.',
+                    'full_resync_required': True,
+                },
+                status=status.HTTP_410_GONE
+            )
+
+        settled = now - DELTA_SYNC_SETTLE
+        queryset = self.filter_queryset(self.get_queryset())
+        changed = list(
+            queryset.filter(_after(cursor['u'], 'updated_at'), updated_at__lte=settled)
+            .order_by('updated_at', 'id')[:DELTA_SYNC_PAGE_SIZE]
+        )
+        deleted = list(
+            Tombstone.objects.filter(
+                _after(cursor['d'], 'deleted_at'),
+                content_type=ContentType.objects.get_for_model(queryset.model),
+                deleted_at__lte=settled,
+            ).order_by('deleted_at', 'id').values_list('deleted_at', 'id', 'object_id')[:DELTA_SYNC_PAGE_SIZE]
+        )
+
+        if changed:
+            cursor['u'] = [changed[-1].updated_at.isoformat(), changed[-1].pk]
+        if len(deleted) == DELTA_SYNC_PAGE_SIZE:
+            cursor['d'] = [deleted[-1][0].isoformat(), deleted[-1][1]]
+        else:
+            # Every settled deletion was returned, so the mark can move up to
+            # ``settled`` and stays inside the retention window between deletions
+            cursor['d'] = [settled.isoformat(), 0]
+
+        serializer = self.get_serializer(changed, many=True)
+        return Response({
+            'results': serializer.data,
+            'deleted': [object_id for _, _, object_id in deleted],
+            'sync_token': encode_sync_token(cursor),
+            'has_more': DELTA_SYNC_PAGE_SIZE in (len(changed), len(deleted)),
+        })
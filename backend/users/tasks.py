@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .sync import prune_tombstones as prune
+
+
+@shared_task(ignore_result=True)
+def prune_tombstones():
+    """Drop tombstones past the delta sync retention window; run daily by Celery beat"""
+    return prune()
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, UserProfileViewSet, PermissionViewSet
+from .views import UserViewSet, UserProfileViewSet, PermissionViewSet, OrgUnitViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
 router.register(r'profiles', UserProfileViewSet, basename='userprofile')
 router.register(r'permissions', PermissionViewSet, basename='permission')
+router.register(r'org-units', OrgUnitViewSet, basename='orgunit')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -3,20 +3,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from django.db.models import Q
+from django.db.models import ProtectedError, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import User, UserProfile, Permission, UserType
+from .models import User, UserProfile, Permission, UserType, OrgUnit, org_scope_filter
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer, UserListSerializer,
     LoginSerializer, ChangePasswordSerializer, PermissionSerializer,
-    PermissionAssignmentSerializer, UserProfileSerializer
+    PermissionAssignmentSerializer, UserProfileSerializer, OrgUnitSerializer
 )
 from .permissions import IsAdminUser, IsOwnerOrAdmin, CanManageUsers
+from .sync import DeltaSyncMixin
 
 
-class PermissionViewSet(viewsets.ReadOnlyModelViewSet):
+class PermissionViewSet(DeltaSyncMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -26,7 +27,7 @@ class PermissionViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = User.objects.select_related('profile').prefetch_related('permissions')
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -60,6 +61,9 @@ class UserViewSet(viewsets.ModelViewSet):
         # Filter based on user permissions
         if user.user_type == UserType.ADMIN:
             return queryset
+        elif user.user_type in (UserType.MANAGER, UserType.BRANCH_MANAGER) and user.org_unit_id:
+            # Managers placed in the org hierarchy see everyone under their unit
+            return queryset.filter(org_scope_filter(user.org_unit_id))
         elif user.user_type == UserType.MANAGER:
             # Managers can see users in their department
             return queryset.filter(department=user.department)
@@ -194,7 +198,7 @@ class UserViewSet(viewsets.ModelViewSet):
         })
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [IsOwnerOrAdmin]
@@ -203,4 +207,37 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.user_type == UserType.ADMIN:
             return UserProfile.objects.all()
-        return UserProfile.objects.filter(user=user) 
\ No newline at end of file
+        return UserProfile.objects.filter(user=user) 
+
+
+class OrgUnitViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
+    queryset = OrgUnit.objects.select_related('parent')
+    serializer_class = OrgUnitSerializer
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ['unit_type', 'parent']
+    search_fields = ['name', 'code']
+    ordering_fields = ['name', 'code', 'created_at']
+    ordering = ['name']
+
+    def get_permissions(self):
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            permission_classes = [IsAdminUser]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {'error': 'This unit has units under it; move or delete them first.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+    @action(detail=True, methods=['get'])
+    def descendants(self, request, pk=None):
+        """Get every unit under this one"""
+        unit = self.get_object()
+        serializer = self.get_serializer(unit.descendants(include_self=False), many=True)
+        return Response(serializer.data)